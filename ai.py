@@ -0,0 +1,378 @@
+"""
+Intelligence artificielle pour jouer une équipe (par défaut 'enemy').
+
+L'IA joue les mêmes actions qu'un joueur humain (déplacements, validation,
+attaques 0/1, soin du magicien, passer son tour), appliquées par le moteur de
+règles. Elle choisit le tour de chaque unité par une recherche arborescente
+Monte-Carlo (MCTS) dont les coups sont des « macro-actions » : une case
+d'arrivée atteignable et une action finale. Les simulations sont réparties sur
+un `ProcessPoolExecutor` (parallélisation à la racine) et la recherche respecte
+un budget de temps par tour.
+"""
+
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from pathfinding import DistanceField
+from rules import (MOVE_PHASE, HEAL_ACTION, SKIP_ACTION, VALIDATE_ACTION,
+                   apply_action, attack_action, move_action)
+from unit import Wizard
+
+
+def unit_field(state):
+    """Retourne le champ de distances de l'unité active pour ses déplacements restants."""
+    unit = state.active_unit
+    if state.phase != MOVE_PHASE:
+        return None
+    if (unit.x, unit.y) == state.reach.origin and state.remaining_moves == unit.movement_speed:
+        return state.reach
+    return DistanceField(unit.grid, (unit.x, unit.y), state.remaining_moves, unit.movement_class,
+                         unit.move_step, state.occupancy.occupied_except(unit))
+
+
+def hits_enemy(state, unit, cell, attack_type):
+    """Vérifie si l'attaque donnée, lancée depuis `cell`, touche au moins une unité adverse (en ligne de vue)."""
+    occupied = state.occupancy.cells
+    for target_cell in unit.attackable_cells_at(cell[0], cell[1], attack_type):
+        target = occupied.get(target_cell)
+        if target is not None and target.team != unit.team:
+            return True
+    return False
+
+
+def macro_actions(state):
+    """
+    Retourne les macro-actions de l'unité active : (case d'arrivée, action finale).
+
+    Les attaques qui ne toucheraient aucune unité adverse sont écartées (elles
+    équivalent à passer son tour).
+    """
+    unit = state.active_unit
+    if unit is None:
+        return []
+    field = unit_field(state)
+    destinations = [(unit.x, unit.y)] if field is None else field.reachable_cells()
+
+    macros = []
+    for cell in destinations:
+        for attack_type in range(len(unit.attack_types)):
+            if hits_enemy(state, unit, cell, attack_type):
+                macros.append((cell, attack_action(attack_type)))
+        if isinstance(unit, Wizard) and unit.health < unit.max_health:
+            macros.append((cell, HEAL_ACTION))
+        macros.append((cell, SKIP_ACTION))
+    return macros
+
+
+def macro_to_actions(state, macro):
+    """Traduit une macro-action en suite d'actions du moteur de règles (comme au clavier)."""
+    cell, final_action = macro
+    actions = []
+    field = unit_field(state)
+    if field is not None:
+        path = field.path_to(*cell) or []
+        actions.extend(move_action(dx, dy) for dx, dy in path)
+        if len(path) < state.remaining_moves:
+            actions.append(VALIDATE_ACTION)  # Valider la position avec "Espace"
+    actions.append(final_action)
+    return actions
+
+
+def apply_macro(state, macro):
+    """Applique une macro-action à l'état (modifié en place)."""
+    for action in macro_to_actions(state, macro):
+        apply_action(state, action)
+
+
+def evaluate(state, team):
+    """
+    Évalue l'état pour l'équipe donnée, entre 0 (défaite) et 1 (victoire).
+
+    Hors fin de partie, compare la santé relative restante des deux équipes et
+    la santé que chacune peut perdre à la prochaine attaque adverse (lue en O(1)
+    dans les cartes des menaces), avec un léger bonus pour l'équipe qui se
+    rapproche de ses adversaires (sans lui, les simulations courtes ne
+    distinguent pas les déplacements loin du combat).
+    """
+    if state.winner is not None:
+        return 1.0 if state.winner == team else 0.0
+    units, opponents = state.units_of(team), state.opponents_of(team)
+    own = sum(unit.health / unit.max_health for unit in units)
+    other = sum(unit.health / unit.max_health for unit in opponents)
+
+    # Santé menacée de chaque équipe (les unités adverses attaquent depuis leur position actuelle)
+    own_threats = state.threat_map('enemy' if team == 'player' else 'player')
+    other_threats = state.threat_map(team)
+    own_exposure = sum(min(unit.health, own_threats.damage_at(unit.x, unit.y, unit.defense)) / unit.max_health
+                       for unit in units)
+    other_exposure = sum(min(unit.health, other_threats.damage_at(unit.x, unit.y, unit.defense)) / unit.max_health
+                         for unit in opponents)
+    count = max(1, len(units) + len(opponents))
+    score = 0.5 + 0.3 * (own - other) / count + 0.1 * (other_exposure - own_exposure) / count
+
+    # Distance moyenne de chaque unité à l'adversaire le plus proche
+    size = units[0].grid.width + units[0].grid.height
+    distance = sum(min(abs(unit.x - opponent.x) + abs(unit.y - opponent.y) for opponent in opponents)
+                   for unit in units) / max(1, len(units))
+    return score + 0.1 * (1 - distance / size)
+
+
+def prepare_threats(state):
+    """Calcule les cartes des menaces de l'état, pour chaque défense adverse (copiées ensuite par les simulations)."""
+    for team in ('player', 'enemy'):
+        threats = state.threat_map(team)
+        for unit in state.opponents_of(team):
+            threats.damage_totals(unit.defense)
+
+
+def rollout_macro(state, rng, greedy=0.8):
+    """Choisit une macro-action pour les simulations : une attaque si possible (le plus souvent), sinon au hasard."""
+    macros = macro_actions(state)
+    attacks = [macro for macro in macros if macro[1][0] != SKIP_ACTION[0] and macro[1] != HEAL_ACTION]
+    if attacks and rng.random() < greedy:
+        return rng.choice(attacks)
+    return rng.choice(macros)
+
+
+class Node:
+    """Noeud de l'arbre de recherche (une macro-action jouée par `team`)."""
+
+    __slots__ = ("parent", "macro", "team", "children", "untried", "visits", "value")
+
+    def __init__(self, parent, macro, team, untried):
+        self.parent = parent
+        self.macro = macro
+        self.team = team  # Equipe qui a joué la macro-action menant à ce noeud
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.value = 0.0
+
+    def best_child(self, exploration):
+        """Retourne l'enfant qui maximise le critère UCT."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.value / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+
+def search(state, time_budget, seed=None, exploration=1.4, rollout_depth=6, iterations=None, deadline=None):
+    """
+    Recherche MCTS depuis l'état donné pendant `time_budget` secondes.
+
+    Avec un nombre d'itérations fixé, le budget de temps est ignoré et la
+    recherche est reproductible (même graine, même résultat).
+
+    Paramètres
+    ----------
+    state : GameState
+        L'état de la partie (non modifié).
+    time_budget : float
+        La durée de la recherche en secondes.
+    seed : int, optional
+        La graine du générateur aléatoire.
+    exploration : float
+        Le coefficient d'exploration UCT.
+    rollout_depth : int
+        Le nombre maximal de tours d'unités simulés après l'expansion.
+    iterations : int, optional
+        Le nombre d'itérations (à la place du budget de temps).
+    deadline : float, optional
+        L'instant (`time.monotonic`) où arrêter la recherche, à la place de
+        `time_budget` : une recherche lancée en retard dans un processus
+        s'arrête quand même à temps.
+
+    Retourne
+    -------
+    stats : dict[tuple, tuple]
+        Pour chaque macro-action de la racine, (nombre de visites, valeur cumulée).
+    """
+    if deadline is None:
+        deadline = time.monotonic() + time_budget
+    rng = random.Random(seed)
+    prepare_threats(state)  # Cache des menaces seulement : l'état n'est pas modifié
+    root = Node(None, None, None, macro_actions(state))
+    rng.shuffle(root.untried)
+
+    iteration = 0
+    while root.untried or root.children:
+        if iterations is None and time.monotonic() >= deadline:
+            break
+        if iterations is not None and iteration >= iterations:
+            break
+        iteration += 1
+        node = root
+        simulation = state.clone()
+
+        # Sélection
+        while not node.untried and node.children:
+            node = node.best_child(exploration)
+            apply_macro(simulation, node.macro)
+
+        # Expansion
+        if node.untried and simulation.winner is None:
+            macro = node.untried.pop()
+            team = simulation.team
+            apply_macro(simulation, macro)
+            untried = macro_actions(simulation)
+            rng.shuffle(untried)
+            child = Node(node, macro, team, untried)
+            node.children.append(child)
+            node = child
+
+        # Simulation
+        for _ in range(rollout_depth):
+            if simulation.winner is not None:
+                break
+            apply_macro(simulation, rollout_macro(simulation, rng))
+
+        # Rétropropagation (valeur du point de vue de l'équipe qui a joué chaque noeud)
+        values = {team: evaluate(simulation, team) for team in ('player', 'enemy')}
+        while node is not None:
+            node.visits += 1
+            if node.team is not None:
+                node.value += values[node.team]
+            node = node.parent
+
+    return {child.macro: (child.visits, child.value) for child in root.children}
+
+
+class MCTSController:
+    """
+    Classe pour faire jouer une équipe par la recherche MCTS.
+
+    ...
+    Attributs
+    ---------
+    team : str
+        L'équipe jouée par l'IA ('enemy' par défaut).
+    time_budget : float
+        Le temps de réflexion par tour d'unité, en secondes.
+    workers : int
+        Le nombre de processus de recherche (0 pour chercher dans le processus courant).
+    iterations : int or None
+        Le nombre d'itérations par recherche, à la place du budget de temps.
+    """
+
+    def __init__(self, team='enemy', time_budget=1.0, workers=None, seed=None, iterations=None):
+        """
+        Construit le contrôleur.
+
+        Paramètres
+        ----------
+        team : str
+            L'équipe jouée par l'IA.
+        time_budget : float
+            Le temps de réflexion par tour d'unité, en secondes.
+        workers : int, optional
+            Le nombre de processus (tous les coeurs par défaut, 0 pour aucun).
+        seed : int, optional
+            La graine des recherches (reproductibles à nombre d'itérations égal).
+        iterations : int, optional
+            Le nombre d'itérations par recherche (parties reproductibles).
+        """
+        self.team = team
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.rng = random.Random(seed)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.pool = ProcessPoolExecutor(self.workers) if self.workers else None
+        self.pending = []  # Recherches des tours précédents encore en cours dans les processus
+
+    def choose_macro(self, state):
+        """Retourne la meilleure macro-action de l'unité active (la plus visitée)."""
+        macros = macro_actions(state)
+        if len(macros) == 1:
+            return macros[0]
+
+        deadline = time.monotonic() + self.time_budget
+        self.pending = [future for future in self.pending if not future.done()]
+        free = self.workers - len(self.pending)  # Pas de nouvelle recherche derrière une recherche en retard
+        if self.pool is None or free <= 0:
+            results = [search(state, self.time_budget, self.rng.random(), iterations=self.iterations,
+                              deadline=deadline)]
+        else:
+            # Chaque processus libre cherche indépendamment jusqu'à la même échéance ; les résultats en retard sont ignorés
+            futures = [self.pool.submit(search, state, self.time_budget, self.rng.random(),
+                                        iterations=self.iterations, deadline=deadline)
+                       for _ in range(free)]
+            remaining = deadline - time.monotonic()
+            timeout = None if self.iterations is not None else max(0.0, remaining) + 0.25 * self.time_budget
+            done, not_done = wait(futures, timeout=timeout)
+            self.pending = [future for future in not_done if not future.cancel()]  # Déjà lancées : arrêt à l'échéance
+            results = [future.result() for future in done]
+
+        totals = {}
+        for stats in results:
+            for macro, (visits, value) in stats.items():
+                total_visits, total_value = totals.get(macro, (0, 0.0))
+                totals[macro] = (total_visits + visits, total_value + value)
+        if not totals:
+            return rollout_macro(state, self.rng)
+        return max(totals, key=lambda macro: (totals[macro][0], totals[macro][1]))
+
+    def choose_actions(self, state):
+        """
+        Retourne les actions à jouer pour terminer le tour de l'unité active.
+
+        Paramètres
+        ----------
+        state : GameState
+            L'état de la partie (non modifié).
+
+        Retourne
+        -------
+        actions : list[tuple]
+            Les actions du moteur de règles, dans l'ordre.
+        """
+        return macro_to_actions(state, self.choose_macro(state))
+
+    def close(self):
+        """Arrête les processus de recherche."""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+class GreedyController:
+    """
+    Classe pour faire jouer une équipe en choisissant la meilleure macro-action à un coup.
+
+    Chaque macro-action de l'unité active est simulée puis évaluée ; les égalités
+    sont départagées au hasard. Beaucoup plus rapide que la recherche MCTS, elle
+    sert d'adversaire de référence et pour les tournois (tournament.py).
+
+    ...
+    Attributs
+    ---------
+    team : str
+        L'équipe jouée par l'IA.
+    rng : random.Random
+        Le générateur aléatoire utilisé pour départager les égalités.
+    """
+
+    def __init__(self, team='enemy', seed=None):
+        self.team = team
+        self.rng = random.Random(seed)
+
+    def choose_macro(self, state):
+        """Retourne la macro-action qui donne la meilleure évaluation après un coup."""
+        macros = macro_actions(state)
+        self.rng.shuffle(macros)
+        prepare_threats(state)
+        best, best_value = macros[0], -1.0
+        for macro in macros:
+            simulation = state.clone()
+            apply_macro(simulation, macro)
+            value = evaluate(simulation, self.team)
+            if value > best_value:
+                best, best_value = macro, value
+        return best
+
+    def choose_actions(self, state):
+        """Retourne les actions à jouer pour terminer le tour de l'unité active."""
+        return macro_to_actions(state, self.choose_macro(state))
+
+    def close(self):
+        """Rien à arrêter (pour la même interface que `MCTSController`)."""
@@ -0,0 +1,185 @@
+"""
+Gestionnaire d'images partagé.
+
+Chaque image est décodée une seule fois depuis le disque. Les variantes
+redimensionnées ou teintées sont mises en cache, indexées par
+(image, taille, teinte), avec une éviction LRU bornée. Les unités et les menus
+obtiennent leurs surfaces d'ici au lieu de recharger les fichiers.
+
+Le décodage et le redimensionnement peuvent être lancés à l'avance sur un
+thread de chargement (`load_async`), pendant que le menu est affiché. Chaque
+chargement a un indicateur de disponibilité (un `Future`) ; une image
+demandée avant la fin de son chargement attend celui-ci au lieu d'être
+chargée une seconde fois. Un événement ASSET_LOADED est posté à la fin de
+chaque chargement pour que les boucles d'affichage se redessinent.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame
+
+# Chemins des images, indexés par leur nom
+ASSET_PATHS = {
+    "archer": "images/archer.png",
+    "swordsman": "images/swordsman.png",
+    "wizard": "images/wizard.png",
+    "invincible": "images/invincible.png",
+    "bomber": "images/bomber.png",
+    "grille": "images/grille.png",
+    "menu_background": "images/menu_background.png",
+}
+
+# Evénement posté quand un chargement en arrière-plan est terminé
+ASSET_LOADED = pygame.event.custom_type()
+
+
+class AssetManager:
+    """
+    Classe pour charger et mettre en cache les images du jeu.
+
+    ...
+    Attributs
+    ---------
+    paths : dict[str, str]
+        Les chemins des images, indexés par leur nom.
+    images : dict[str, pygame.Surface]
+        Les images décodées (une seule fois par image).
+    variants : OrderedDict[tuple, pygame.Surface]
+        Les variantes redimensionnées ou teintées, de la moins à la plus récemment utilisée.
+    max_variants : int
+        Le nombre maximal de variantes gardées en cache.
+    pending : dict[tuple, Future]
+        Les chargements en arrière-plan en cours, indexés comme les variantes.
+    """
+
+    def __init__(self, paths=ASSET_PATHS, max_variants=64):
+        self.paths = dict(paths)
+        self.images = {}
+        self.converted = set()  # Images converties au format de l'écran
+        self.variants = OrderedDict()
+        self.max_variants = max_variants
+        self.pending = {}
+        self.lock = threading.Lock()  # Protège les caches, partagés avec le thread de chargement
+        self.loader = None  # Thread de chargement, créé au premier chargement en arrière-plan
+
+    def load(self, name):
+        """
+        Retourne l'image d'origine, décodée depuis le disque au premier appel.
+
+        L'image est convertie au format de l'écran dès qu'une fenêtre existe.
+        """
+        with self.lock:
+            image = self.images.get(name)
+            converted = name in self.converted
+        if image is None:
+            image = pygame.image.load(self.paths[name])  # Décodage hors du verrou
+        if not converted and pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+            converted = True
+        with self.lock:
+            self.images[name] = image
+            if converted:
+                self.converted.add(name)
+        return image
+
+    def get(self, name, size=None, tint=None):
+        """
+        Retourne une variante de l'image, créée au premier appel puis mise en cache.
+
+        Paramètres
+        ----------
+        name : str
+            Le nom de l'image (par exemple "archer").
+        size : tuple[int, int], optional
+            La taille voulue en pixels (taille d'origine si None).
+        tint : tuple, optional
+            Une couleur RGBA multipliée avec l'image.
+
+        Retourne
+        -------
+        image : pygame.Surface
+            L'image redimensionnée et teintée.
+        """
+        key = (name, size, tint)
+        with self.lock:
+            image = self.variants.get(key)
+            if image is not None:
+                self.variants.move_to_end(key)  # Plus récemment utilisée
+                return image
+            future = self.pending.get(key)
+        if future is not None:
+            return future.result()  # Chargement en arrière-plan en cours : l'attendre
+        return self.create(key)
+
+    def create(self, key):
+        """Crée la variante (image, taille, teinte) et la met en cache."""
+        name, size, tint = key
+        image = self.load(name)
+        if size is not None and image.get_size() != tuple(size):
+            image = pygame.transform.scale(image, size)
+        if tint is not None:
+            image = image.copy()
+            image.fill(tint, special_flags=pygame.BLEND_RGBA_MULT)
+
+        with self.lock:
+            self.variants[key] = image
+            self.pending.pop(key, None)
+            if len(self.variants) > self.max_variants:
+                self.variants.popitem(last=False)  # Retirer la moins récemment utilisée
+        return image
+
+    def submit(self, function, *args):
+        """
+        Exécute une fonction de chargement sur le thread de chargement.
+
+        Retourne
+        -------
+        future : concurrent.futures.Future
+            L'indicateur de disponibilité : `done()` sans attendre, `result()` pour attendre le résultat.
+        """
+        if self.loader is None:
+            self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+        future = self.loader.submit(function, *args)
+        future.add_done_callback(notify_loaded)
+        return future
+
+    def load_async(self, name, size=None, tint=None):
+        """
+        Lance le chargement d'une variante en arrière-plan (voir `get`).
+
+        Retourne
+        -------
+        future : concurrent.futures.Future
+            L'indicateur de disponibilité de la variante (déjà terminé si elle est en cache).
+        """
+        key = (name, size, tint)
+        with self.lock:
+            future = self.pending.get(key)
+            if future is not None:
+                return future
+            if key in self.variants:
+                future = Future()
+                future.set_result(self.variants[key])
+                return future
+            future = self.pending[key] = self.submit(self.create, key)
+        return future
+
+    def preload(self, names=None):
+        """Décode à l'avance les images données (toutes par défaut)."""
+        for name in names or self.paths:
+            self.load(name)
+
+
+def notify_loaded(future):
+    """Poste ASSET_LOADED pour réveiller la boucle d'affichage (appelée par le thread de chargement)."""
+    if pygame.display.get_init():
+        try:
+            pygame.event.post(pygame.event.Event(ASSET_LOADED))
+        except pygame.error:
+            pass  # File d'événements pleine : l'affichage suivant utilisera l'image
+
+
+# Gestionnaire partagé par tout le jeu
+assets = AssetManager()
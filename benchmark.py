@@ -0,0 +1,376 @@
+"""
+Mesures de performance des chemins critiques du jeu.
+
+Chaque mesure chronomètre une opération (cases atteignables et attaquables de
+chaque classe d'unité, déplacement, champ de vision, carte des menaces, attaque, affichage de la
+grille, découpage de texte, pas d'un environnement d'entraînement, attaques une à une
+et par lots) sur la carte par défaut (17 x 17) et sur des cartes plus grandes.
+Les résultats sont enregistrés en JSON et peuvent être comparés à une
+référence : une mesure plus lente que la référence au-delà du seuil est
+signalée comme régression (code de sortie 1).
+
+    python benchmark.py --output resultats.json
+    python benchmark.py --baseline reference.json [--threshold 0.1] [--sizes 17,64,256] [--filter move]
+
+Le jeu est lancé sans fenêtre (SDL_VIDEODRIVER=dummy).
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import pygame
+
+from unit import Unit, Archer, Swordsman, Wizard, Invincible, Bomber
+from rules import GameState, resolve_attack
+from terrain import Terrain, PASSAGE_VERT, MUR, ARBRE, MER, HEALING_ZONE
+from maps import DEFAULT_MAP, save_map
+from text import text_cache
+from threat import ThreatMap
+from visibility import SIGHT_RADIUS, visibility_of
+
+UNIT_CLASSES = [Archer, Swordsman, Wizard, Invincible, Bomber]
+DEFAULT_SIZES = [17, 64, 256]
+
+LONG_TEXT = ("Attaque normale et spéciale en direction cardinale sur 3 et 2 cases respectivement. "
+             "Valider sa position avec 'ESPACE' pour voir la portée des attaques de l'unité, "
+             "puis choisir l'attaque avec '1' ou '2', ou passer son tour avec 'S'.") * 3
+
+
+def measure(function, setup=None, min_time=0.2, repeat=5):
+    """
+    Chronomètre une fonction et retourne son temps par appel en microsecondes.
+
+    Le nombre d'appels par série est choisi pour qu'une série dure au moins
+    `min_time` secondes ; le temps retenu est le minimum des séries (le moins
+    perturbé par le reste du système), accompagné de la médiane.
+
+    Paramètres
+    ----------
+    function : callable
+        L'opération à mesurer.
+    setup : callable, optional
+        Appelée avant chaque appel, hors chronométrage (par exemple pour vider un cache).
+
+    Retourne
+    -------
+    result : dict
+        {"us": minimum, "median_us": médiane, "calls": appels par série}
+    """
+    def run(calls):
+        elapsed = 0.0
+        for _ in range(calls):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            function()
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    calls = 1
+    while run(calls) < min_time / 10 and calls < 1_000_000:
+        calls *= 10
+    calls = max(1, calls)
+    times = sorted(run(calls) / calls * 1e6 for _ in range(repeat))
+    return {"us": times[0], "median_us": times[len(times) // 2], "calls": calls}
+
+
+def make_terrain(size, seed=0):
+    """Retourne la carte par défaut (17) ou une carte aléatoire de la taille donnée (obstacles épars)."""
+    if size == 17:
+        from maps import load_map
+        return load_map(DEFAULT_MAP).terrain
+    rng = random.Random(seed)
+    population = [PASSAGE_VERT] * 16 + [MUR, ARBRE, MER, HEALING_ZONE]
+    codes = bytearray(rng.choice(population) for _ in range(size * size))
+    return Terrain.from_codes(size, size, codes)
+
+
+def open_cell(terrain, x, y):
+    """Retourne la case praticable (pour toutes les unités) la plus proche de (x, y), avec une voisine praticable à droite."""
+    for radius in range(max(terrain.width, terrain.height)):
+        for cell_y in range(max(0, y - radius), min(terrain.height, y + radius + 1)):
+            for cell_x in range(max(0, x - radius), min(terrain.width - 1, x + radius + 1)):
+                if all(terrain.is_passable(cell_x + dx, cell_y) for dx in (0, 1)):
+                    return cell_x, cell_y
+    raise ValueError("Aucune case praticable")
+
+
+class Recorder:
+    """
+    Classe pour mesurer seulement les opérations dont le nom passe le filtre.
+
+    ...
+    Attributs
+    ---------
+    results : dict[str, dict]
+        Les mesures effectuées, par nom.
+    name_filter : str or None
+        Le texte que doit contenir le nom d'une mesure (toutes les mesures si None).
+    """
+
+    def __init__(self, name_filter=None):
+        self.results = {}
+        self.name_filter = name_filter
+
+    def wanted(self, *names):
+        """Vérifie si l'une des mesures nommées passe le filtre (pour éviter une préparation inutile)."""
+        return any(self.name_filter is None or self.name_filter in name for name in names)
+
+    def __call__(self, name, function, setup=None):
+        """Mesure une opération (voir `measure`) si son nom passe le filtre, et affiche le résultat."""
+        if self.wanted(name):
+            result = self.results[name] = measure(function, setup=setup)
+            print(f"{name:45} {result['us']:10.2f} us")
+
+
+def unit_benchmarks(size, terrain, record):
+    """Cases atteignables, cases attaquables et déplacement de chaque classe d'unité, champ de vision et carte des menaces."""
+    x, y = open_cell(terrain, terrain.width // 2, terrain.height // 2)
+    visibility = visibility_of(terrain)
+
+    def clear_attack_caches():
+        # Les cases attaquables passent par le champ de vision (lignes de vue) : les deux caches sont vidés
+        Unit.cells_cache.clear()
+        visibility.views.clear()
+
+    for unit_class in UNIT_CLASSES:
+        name = unit_class.__name__
+        unit = unit_class(x, y, 'player', terrain)
+        enemy_x, enemy_y = open_cell(terrain, x + 2, y + 1)
+        GameState(terrain, [unit], [Swordsman(enemy_x, enemy_y, 'enemy', terrain)])  # Index d'occupation
+
+        record(f"movable_cells/{name}/{size}", unit.get_movable_cells, setup=Unit.cells_cache.clear)
+        record(f"movable_cells/{name}/{size}/cached", unit.get_movable_cells)
+        for attack_type in range(len(unit.attack_types)):
+            record(f"attackable_cells/{name}/{attack_type}/{size}",
+                   lambda: unit.get_attackable_cells(attack_type), setup=clear_attack_caches)
+            record(f"attackable_cells/{name}/{attack_type}/{size}/cached",
+                   lambda: unit.get_attackable_cells(attack_type))
+
+        def move_back_and_forth():
+            unit.move(1, 0)
+            unit.move(-1, 0)
+        record(f"move/{name}/{size}", move_back_and_forth)
+
+    record(f"field_of_view/{size}", lambda: visibility.field_of_view(x, y, SIGHT_RADIUS),
+           setup=visibility.views.clear)
+    record(f"field_of_view/{size}/cached", lambda: visibility.field_of_view(x, y, SIGHT_RADIUS))
+
+    # Carte des menaces d'une unité de chaque classe : une unité se déplace (mise à jour incrémentale), lecture d'une case
+    units = [unit_class(*open_cell(terrain, x + 2 * index - 4, y + index - 2), 'enemy', terrain)
+             for index, unit_class in enumerate(UNIT_CLASSES)]
+    threats = ThreatMap(terrain, 'enemy')
+    threats.update(units)
+    for defense in {unit_class.defense for unit_class in UNIT_CLASSES}:
+        threats.damage_totals(defense)
+    mover = units[0]
+
+    def move_and_update():
+        mover.x += 1
+        threats.update(units)
+        mover.x -= 1
+        threats.update(units)
+    record(f"threat_map/update/{size}", move_and_update)
+    record(f"threat_map/damage_at/{size}", lambda: threats.damage_at(x, y, Swordsman.defense))
+
+
+def combat_benchmarks(size, terrain, record):
+    """Attaques de toutes les unités d'une partie : une à une (`rules.resolve_attack`) et par lots (combat.py)."""
+    if not record.wanted(f"combat/resolve_attack/{size}", f"combat/resolve_attacks/{size}",
+                         f"combat/resolve_attacks/{size}/x1000"):
+        return
+    import numpy as np
+    from combat import UnitArrays, resolve_attacks, sight_mask
+
+    # Deux équipes au centre de la carte, à portée les unes des autres ; les cibles ne meurent jamais
+    center_x, center_y = terrain.width // 2, terrain.height // 2
+    cells = []
+    for dx, dy in [(0, 0), (1, 0), (0, 1), (2, 0), (2, 1), (1, 1)]:
+        cell = open_cell(terrain, center_x + dx, center_y + dy)
+        cells.append(cell if cell not in cells else open_cell(terrain, center_x + dx + 3, center_y + dy + 3))
+    players = [unit_class(x, y, 'player', terrain) for unit_class, (x, y) in zip([Wizard, Bomber, Archer], cells[:3])]
+    enemies = [unit_class(x, y, 'enemy', terrain) for unit_class, (x, y) in zip([Swordsman, Invincible, Archer], cells[3:])]
+    state = GameState(terrain, players, enemies)
+    units = players + enemies
+    for unit in units:
+        unit.health = 10 ** 9
+
+    def attack_one_by_one():
+        for unit in units:
+            resolve_attack(unit, unit.get_attackable_cells(0), state.opponents_of(unit.team), 0)
+    record(f"combat/resolve_attack/{size}", attack_one_by_one)
+
+    arrays = UnitArrays.from_units(units)
+    sight = sight_mask(arrays, terrain)
+    attackers = np.ones(len(units), dtype=bool)
+    record(f"combat/resolve_attacks/{size}", lambda: resolve_attacks(arrays, attackers, 0, sight))
+
+    # 1000 parties simulées en un appel : coût par partie = mesure / 1000
+    batch = arrays.tile(1000)
+    batch_sight = np.broadcast_to(sight, batch.x.shape + (len(units),))
+    batch_attackers = np.ones(batch.x.shape, dtype=bool)
+    record(f"combat/resolve_attacks/{size}/x1000", lambda: resolve_attacks(batch, batch_attackers, 0, batch_sight))
+
+
+def game_benchmarks(size, terrain, map_path, record):
+    """Attaque, affichage de la grille (avec et sans surbrillance) et découpage de texte dans `Game`."""
+    if not record.wanted(f"execute_attack/{size}", f"flip_display/plain/{size}/full",
+                         f"flip_display/highlights/{size}/full", f"wrap_text/{size}/cached"):
+        return  # Fenêtre et partie créées seulement si une mesure est demandée
+    from game import Game, SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH + 16 * TILE_SIZE, SCREEN_HEIGHT))
+    game = Game(screen, map_path=map_path, log_dir=None)
+
+    # Deux équipes au centre de la carte, à portée les unes des autres
+    center_x, center_y = terrain.width // 2, terrain.height // 2
+    cells = []
+    for dx, dy in [(0, 0), (1, 0), (0, 1), (2, 0), (2, 1), (1, 1)]:
+        cell = open_cell(terrain, center_x + dx, center_y + dy)
+        cells.append(cell if cell not in cells else open_cell(terrain, center_x + dx + 3, center_y + dy + 3))
+    game.player_units = [unit_class(x, y, 'player', terrain) for unit_class, (x, y) in zip([Wizard, Bomber, Archer], cells[:3])]
+    game.enemy_units = [unit_class(x, y, 'enemy', terrain) for unit_class, (x, y) in zip([Swordsman, Invincible, Archer], cells[3:])]
+    game.state = GameState(terrain, game.player_units, game.enemy_units)
+    for unit in game.enemy_units:
+        unit.health = 10 ** 9  # Les cibles ne meurent jamais pendant la mesure
+
+    attacker = game.player_units[0]
+    attacker.is_selected = True
+    normal_cells = attacker.get_attackable_cells(0)
+    special_cells = attacker.get_attackable_cells(1)
+    movable_cells = game.state.reach.reachable_cells()
+
+    record(f"execute_attack/{size}",
+           lambda: game.execute_attack(attacker, normal_cells, game.enemy_units, 0))
+
+    record(f"flip_display/plain/{size}", game.flip_display)
+    record(f"flip_display/highlights/{size}",
+           lambda: game.flip_display(normal_cells, special_cells, movable_cells, 'player'))
+    record(f"flip_display/plain/{size}/full", game.flip_display, setup=game.renderer.invalidate)
+    record(f"flip_display/highlights/{size}/full",
+           lambda: game.flip_display(normal_cells, special_cells, movable_cells, 'player'),
+           setup=game.renderer.invalidate)
+
+    font = text_cache.font(24)
+    record(f"wrap_text/{size}", lambda: game.wrap_text(LONG_TEXT, font, 700), setup=text_cache.lines.clear)
+    record(f"wrap_text/{size}/cached", lambda: game.wrap_text(LONG_TEXT, font, 700))
+
+
+def env_benchmarks(size, map_path, record):
+    """Pas d'un environnement d'entraînement (action autorisée au hasard, adversaire au hasard) et observation seule."""
+    if not record.wanted(f"env/step/{size}", f"env/observe/{size}"):
+        return
+    from environment import GameEnv
+
+    env = GameEnv(map_path, seed=0)
+    rng = random.Random(0)
+    info = env.reset()[1]
+
+    def step():
+        nonlocal info
+        action = rng.choice(info["action_mask"].nonzero()[0].tolist())
+        _, _, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            info = env.reset()[1]
+
+    record(f"env/step/{size}", step)
+    record(f"env/observe/{size}", env.observe)
+
+
+def run(sizes=DEFAULT_SIZES, name_filter=None):
+    """
+    Lance toutes les mesures.
+
+    Retourne
+    -------
+    report : dict
+        {"meta": environnement, "results": {nom: mesure}}
+    """
+    pygame.init()
+    record = Recorder(name_filter)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            terrain = make_terrain(size)
+            map_path = DEFAULT_MAP
+            if size != 17:
+                map_path = os.path.join(directory, f"bench_{size}.map")
+                save_map(map_path, terrain)
+            # Le filtre est appliqué avant chaque mesure : seules les mesures demandées sont chronométrées
+            unit_benchmarks(size, terrain, record)
+            combat_benchmarks(size, terrain, record)
+            game_benchmarks(size, terrain, map_path, record)
+            env_benchmarks(size, map_path, record)
+
+    meta = {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "sizes": list(sizes),
+    }
+    return {"meta": meta, "results": record.results}
+
+
+def compare(report, baseline, threshold=0.10):
+    """
+    Compare des mesures à une référence.
+
+    Paramètres
+    ----------
+    report, baseline : dict
+        Les résultats de `run` (courants et de référence).
+    threshold : float
+        Le ralentissement relatif toléré (0.10 = 10 %).
+
+    Retourne
+    -------
+    regressions : list[tuple]
+        Pour chaque mesure trop lente : (nom, temps de référence, temps courant, écart relatif).
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        change = result["us"] / reference["us"] - 1 if reference["us"] > 0 else 0.0
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:45} {reference['us']:10.2f} -> {result['us']:10.2f} us  {change:+7.1%}  {flag}")
+        if change > threshold:
+            regressions.append((name, reference["us"], result["us"], change))
+    return regressions
+
+
+def main(args):
+    """Lance les mesures, les enregistre et les compare à la référence éventuelle."""
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    sizes = [int(size) for size in option("--sizes", ",".join(map(str, DEFAULT_SIZES))).split(",")]
+    report = run(sizes, option("--filter"))
+
+    output = option("--output", "benchmark_results.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Résultats enregistrés dans {output}")
+
+    baseline_path = option("--baseline")
+    if baseline_path is not None:
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, float(option("--threshold", 0.10)))
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {float(option('--threshold', 0.10)):.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
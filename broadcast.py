@@ -0,0 +1,109 @@
+"""
+Diffusion d'une partie aux spectateurs.
+
+Après chaque action acceptée, l'état de la partie est encodé une seule fois
+en delta binaire par rapport à l'état précédent (positions, santés et unités
+mortes modifiées, voir protocol.py) et la même trame est écrite sur la
+connexion de chaque spectateur : le coût d'encodage ne dépend pas du nombre
+de spectateurs.
+
+Un spectateur qui arrive en cours de partie reçoit un état complet
+(KEYFRAME), encodé au plus une fois par état et partagé par tous les
+spectateurs qui arrivent avant l'action suivante. Un spectateur trop lent
+(trop de données en attente d'envoi) ne reçoit plus les deltas ; au premier
+état diffusé après que sa connexion s'est vidée, il reçoit l'état complet
+puis de nouveau les deltas.
+"""
+
+from protocol import KEYFRAME, DELTA, encode_frame, encode_keyframe, encode_delta, unit_states
+
+MAX_SPECTATOR_BUFFER = 16 * 1024  # Données en attente au-delà desquelles un spectateur ne reçoit plus les deltas
+
+
+class SpectatorFeed:
+    """
+    Classe pour diffuser les états successifs d'une partie à ses spectateurs.
+
+    ...
+    Attributs
+    ---------
+    spectators : dict[asyncio.StreamWriter, bool]
+        La connexion de chaque spectateur, et s'il a reçu le dernier état.
+    sequence : int
+        Le numéro du dernier état diffusé.
+    previous : list[tuple]
+        L'état des unités au dernier état diffusé (voir `protocol.unit_states`).
+    """
+
+    def __init__(self):
+        self.spectators = {}
+        self.state = None
+        self.roster = []
+        self.welcome = None
+        self.sequence = 0
+        self.previous = []
+        self.keyframe = None  # Trame de l'état complet courant (encodée à la demande)
+
+    def start(self, state, roster, welcome):
+        """
+        Commence la diffusion d'une partie.
+
+        Paramètres
+        ----------
+        state : GameState
+            L'état de la partie (suivi par référence).
+        roster : list[Unit]
+            Les unités de la partie, dans l'ordre de la composition initiale.
+        welcome : bytes
+            La trame WELCOME des spectateurs (carte et composition initiale).
+        """
+        self.state = state
+        self.roster = roster
+        self.welcome = welcome
+        self.previous = unit_states(state, roster)
+        self.keyframe = None
+        for writer in list(self.spectators):
+            writer.write(welcome)
+            self.send_keyframe(writer)
+
+    def add(self, writer):
+        """Ajoute un spectateur : il reçoit la partie et son état complet si elle a commencé."""
+        self.spectators[writer] = False
+        if self.state is not None:
+            writer.write(self.welcome)
+            self.send_keyframe(writer)
+
+    def remove(self, writer):
+        """Retire un spectateur (déconnexion)."""
+        self.spectators.pop(writer, None)
+
+    def keyframe_frame(self):
+        """Retourne la trame de l'état complet courant, encodée une seule fois par état."""
+        if self.keyframe is None:
+            self.keyframe = encode_frame(KEYFRAME, encode_keyframe(self.sequence, self.state, self.roster))
+        return self.keyframe
+
+    def send_keyframe(self, writer):
+        """Envoie l'état complet courant à un spectateur, qui recevra ensuite les deltas."""
+        writer.write(self.keyframe_frame())
+        self.spectators[writer] = True
+
+    def publish(self):
+        """Diffuse l'état courant : un delta encodé une fois, écrit pour chaque spectateur à jour."""
+        current = unit_states(self.state, self.roster)
+        self.sequence += 1
+        delta = None
+        self.keyframe = None
+        for writer, in_sync in list(self.spectators.items()):
+            transport = writer.transport
+            if transport.is_closing():
+                self.remove(writer)
+            elif transport.get_write_buffer_size() > MAX_SPECTATOR_BUFFER:
+                self.spectators[writer] = False  # Trop lent : deltas suspendus jusqu'à ce que sa connexion se vide
+            elif not in_sync:
+                self.send_keyframe(writer)
+            else:
+                if delta is None:
+                    delta = encode_frame(DELTA, encode_delta(self.sequence, self.state, self.previous, current))
+                writer.write(delta)
+        self.previous = current
@@ -0,0 +1,76 @@
+"""
+Caméra sur la grille.
+
+Seule une fenêtre de la carte (la vue) est affichée à l'écran : le coût d'une
+image dépend alors de la taille de l'écran et non de celle de la carte. La
+caméra défile avec la molette de la souris et suit l'unité sélectionnée.
+"""
+
+
+class Camera:
+    """
+    Classe pour représenter la partie visible de la carte.
+
+    ...
+    Attributs
+    ---------
+    map_width, map_height : int
+        La taille de la carte en nombre de cases.
+    width, height : int
+        La taille de la vue en nombre de cases (au plus celle de la carte).
+    x, y : int
+        La case de la carte affichée en haut à gauche de la vue.
+    """
+
+    def __init__(self, map_width, map_height, view_width, view_height):
+        """
+        Construit la caméra en haut à gauche de la carte.
+
+        Paramètres
+        ----------
+        map_width, map_height : int
+            La taille de la carte en nombre de cases.
+        view_width, view_height : int
+            La taille de la vue en nombre de cases.
+        """
+        self.map_width = map_width
+        self.map_height = map_height
+        self.width = min(view_width, map_width)
+        self.height = min(view_height, map_height)
+        self.x = 0
+        self.y = 0
+
+    def move_to(self, x, y):
+        """
+        Place le coin haut gauche de la vue en (x, y), sans sortir de la carte.
+
+        Retourne
+        -------
+        moved : bool
+            True si la vue a changé.
+        """
+        x = max(0, min(x, self.map_width - self.width))
+        y = max(0, min(y, self.map_height - self.height))
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+        return moved
+
+    def scroll(self, dx, dy):
+        """Fait défiler la vue de (dx, dy) cases."""
+        return self.move_to(self.x + dx, self.y + dy)
+
+    def follow(self, x, y, margin=3):
+        """Fait défiler la vue au minimum pour que (x, y) soit visible, à `margin` cases du bord si possible."""
+        margin_x = min(margin, (self.width - 1) // 2)
+        margin_y = min(margin, (self.height - 1) // 2)
+        new_x = min(max(self.x, x + margin_x + 1 - self.width), x - margin_x)
+        new_y = min(max(self.y, y + margin_y + 1 - self.height), y - margin_y)
+        return self.move_to(new_x, new_y)
+
+    def contains(self, x, y):
+        """Vérifie si la case (x, y) de la carte est visible."""
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def visible_cells(self):
+        """Retourne les cases visibles, ligne par ligne."""
+        return [(x, y) for y in range(self.y, self.y + self.height) for x in range(self.x, self.x + self.width)]
@@ -0,0 +1,164 @@
+"""
+Client léger d'une partie en réseau (voir server.py).
+
+La connexion est lue par un thread qui met les messages du serveur dans une
+file et poste NETWORK_MESSAGE pour réveiller la boucle d'affichage (comme
+ASSET_LOADED pour les images). La copie locale de la partie n'est modifiée
+que par la boucle d'affichage, dans `poll` : le client ne fait qu'afficher
+l'état reçu et envoyer les touches comme actions. Un spectateur reçoit un état
+complet puis des deltas (voir broadcast.py).
+"""
+
+import queue
+import socket
+import threading
+
+import pygame
+
+from protocol import (JOIN, ACTION_MESSAGE, SPECTATE, WELCOME, STATE, REJECTED, KEYFRAME, DELTA, SEQUENCE,
+                      encode_frame, read_frame_from, encode_join, decode_welcome,
+                      apply_state, apply_keyframe, apply_delta)
+from replay import encode_action, terrain_checksum
+from rules import GameState
+
+NETWORK_MESSAGE = pygame.event.custom_type()
+
+
+class RemoteMatch:
+    """
+    Classe pour représenter la connexion d'un joueur à une partie du serveur.
+
+    ...
+    Attributs
+    ---------
+    team : str or None
+        L'équipe attribuée par le serveur, une fois la partie commencée (None pour un spectateur).
+    state : GameState or None
+        La copie locale de la partie, mise à jour à chaque état reçu.
+    roster : list[Unit]
+        Les unités de la partie, dans l'ordre des états envoyés par le serveur.
+    sequence : int or None
+        Le numéro du dernier état reçu par un spectateur.
+    """
+
+    def __init__(self, host, port, match_name, composition, terrain):
+        """
+        Se connecte au serveur et demande à rejoindre une partie.
+
+        Paramètres
+        ----------
+        host, port : str, int
+            L'adresse du serveur.
+        match_name : str
+            Le nom de la partie (créée par le premier joueur qui la rejoint).
+        composition : list[type] or None
+            Les classes des unités choisies, ou None pour regarder la partie en spectateur.
+        terrain : Terrain
+            Le terrain de la carte du jeu (doit être celui de la partie).
+        """
+        self.terrain = terrain
+        self.team = None
+        self.state = None
+        self.roster = []
+        self.sequence = None
+        self.messages = queue.SimpleQueue()
+        self.socket = socket.create_connection((host, port))
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # Actions envoyées sans délai
+        if composition is None:
+            self.send(SPECTATE, match_name.encode("utf-8"))
+        else:
+            self.send(JOIN, encode_join(match_name, composition))
+        self.thread = threading.Thread(target=self.receive, daemon=True)
+        self.thread.start()
+
+    def send(self, kind, payload=b""):
+        """Envoie un message au serveur."""
+        self.socket.sendall(encode_frame(kind, payload))
+
+    def send_action(self, action):
+        """Envoie une action de l'unité active au serveur (qui la vérifie et l'applique)."""
+        self.send(ACTION_MESSAGE, encode_action(action))
+
+    def receive(self):
+        """Lit les messages du serveur jusqu'à la fermeture de la connexion (thread de lecture)."""
+        file = self.socket.makefile("rb")
+        try:
+            while True:
+                kind, payload = read_frame_from(file)
+                self.messages.put((kind, payload))
+                notify_message()
+                if kind is None:
+                    break
+        except (OSError, ValueError):
+            self.messages.put((None, b""))
+            notify_message()
+
+    def poll(self):
+        """
+        Applique les messages reçus depuis le dernier appel.
+
+        Retourne
+        -------
+        events : list[tuple]
+            ("welcome", équipe), ("state",), ("rejected", raison) et ("closed",).
+            Une partie sur une autre carte que celle du jeu est refusée : la
+            connexion est fermée ("rejected" puis "closed").
+        """
+        events = []
+        while True:
+            try:
+                kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                return events
+            if kind is None:
+                events.append(("closed",))
+            elif kind == WELCOME:
+                try:
+                    self.start(payload)
+                except ValueError as error:
+                    self.close()
+                    events.extend([("rejected", str(error)), ("closed",)])
+                    return events
+                events.append(("welcome", self.team))
+            elif kind == STATE and self.state is not None:
+                apply_state(payload, self.state, self.roster)
+                events.append(("state",))
+            elif kind == KEYFRAME and self.state is not None:
+                self.sequence = apply_keyframe(payload, self.state, self.roster)
+                events.append(("state",))
+            elif kind == DELTA and self.sequence is not None:
+                # Un delta ne s'applique qu'à l'état qui le précède (le serveur renvoie un état complet sinon)
+                if SEQUENCE.unpack_from(payload)[0] == self.sequence + 1:
+                    self.sequence = apply_delta(payload, self.state, self.roster)
+                    events.append(("state",))
+            elif kind == REJECTED:
+                events.append(("rejected", payload.decode("utf-8", errors="replace")))
+
+    def start(self, payload):
+        """Crée la copie locale de la partie à partir du message WELCOME (ValueError si la carte diffère)."""
+        team, seed, checksum, map_path, roster = decode_welcome(payload)
+        if terrain_checksum(self.terrain) != checksum:
+            raise ValueError(f"La carte du serveur ({map_path}) ne correspond pas à celle du jeu")
+        self.team = team
+        self.roster = [unit_class(x, y, unit_team, self.terrain) for unit_class, unit_team, x, y in roster]
+        self.state = GameState(self.terrain,
+                               [unit for unit in self.roster if unit.team == 'player'],
+                               [unit for unit in self.roster if unit.team == 'enemy'],
+                               seed=seed)
+
+    def close(self):
+        """Ferme la connexion (le serveur donne la victoire à l'adversaire si la partie est en cours)."""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+def notify_message():
+    """Poste NETWORK_MESSAGE pour réveiller la boucle d'affichage (appelée par le thread de lecture)."""
+    if pygame.display.get_init():
+        try:
+            pygame.event.post(pygame.event.Event(NETWORK_MESSAGE))
+        except pygame.error:
+            pass  # File d'événements pleine : le message sera lu au prochain réveil
@@ -0,0 +1,255 @@
+"""
+Stockage vectorisé des unités et résolution des combats par lots (NumPy).
+
+Les caractéristiques de toutes les unités sont rangées dans des tableaux
+(position, santé, défense, puissance et portée des attaques) au lieu d'objets
+`Unit` séparés. Les masques de portée et les dégâts `max(0, puissance - défense)`
+sont calculés pour toutes les paires attaquant/cible en une seule opération, et
+pour plusieurs parties simulées à la fois (dimension de lot en tête des
+tableaux dynamiques). Ce module est optionnel : seul le travail d'équilibrage
+(simulations en masse) a besoin de NumPy, pas le jeu.
+
+Les règles sont celles de `Unit.attack` et `rules.resolve_attack` : une cible
+est touchée si elle est une unité adverse vivante, sur une case du motif
+d'attaque de l'attaquant, à une distance (en x et en y) inférieure ou égale à
+la portée de l'attaque et en ligne de vue (masque `sight_mask`, calculé sur le
+terrain ; sans lui, les obstacles sont ignorés).
+"""
+
+import numpy as np
+
+from visibility import visibility_of
+
+TEAMS = ('player', 'enemy')
+
+
+class UnitArrays:
+    """
+    Classe pour représenter un ensemble d'unités sous forme de tableaux NumPy.
+
+    Les tableaux dynamiques (x, y, health) ont la forme (N,) pour une partie, ou
+    (M, N) pour M parties simulées avec la même composition d'équipes. Les
+    caractéristiques fixes sont partagées par toutes les parties.
+
+    ...
+    Attributs
+    ---------
+    x, y : numpy.ndarray[int]
+        Les positions des unités.
+    health : numpy.ndarray[float]
+        La santé des unités (une unité est morte si elle est <= 0).
+    max_health : numpy.ndarray[float], forme (N,)
+        La santé maximale des unités.
+    defense : numpy.ndarray[float], forme (N,)
+        La défense des unités.
+    team : numpy.ndarray[int8], forme (N,)
+        L'indice de l'équipe de chaque unité dans TEAMS.
+    power : numpy.ndarray[float], forme (N, 2)
+        La puissance de chaque type d'attaque.
+    range : numpy.ndarray[int], forme (N, 2)
+        La portée de chaque type d'attaque.
+    stencil : numpy.ndarray[int], forme (N, 2)
+        L'indice du motif d'attaque de chaque type d'attaque dans `stencils`.
+    stencils : numpy.ndarray[bool], forme (S, 2R+1, 2R+1)
+        Les motifs d'attaque (cases touchées autour de l'attaquant), déjà
+        restreints à la portée de l'attaque.
+    """
+
+    def __init__(self, x, y, health, max_health, defense, team, power, range, stencil, stencils):
+        self.x = np.asarray(x, dtype=np.int32)
+        self.y = np.asarray(y, dtype=np.int32)
+        self.health = np.asarray(health, dtype=np.float64)
+        self.max_health = np.asarray(max_health, dtype=np.float64)
+        self.defense = np.asarray(defense, dtype=np.float64)
+        self.team = np.asarray(team, dtype=np.int8)
+        self.power = np.asarray(power, dtype=np.float64)
+        self.range = np.asarray(range, dtype=np.int32)
+        self.stencil = np.asarray(stencil, dtype=np.int32)
+        self.stencils = np.asarray(stencils, dtype=bool)
+
+    @classmethod
+    def from_units(cls, units):
+        """
+        Construit les tableaux à partir d'une liste d'unités.
+
+        Les motifs d'attaque sont calculés une fois par (classe, portée) à partir
+        de `Unit.attack_offsets`.
+
+        Paramètres
+        ----------
+        units : list[Unit]
+            Les unités des deux équipes.
+
+        Retourne
+        -------
+        arrays : UnitArrays
+            Les unités sous forme de tableaux (forme (N,)).
+        """
+        offsets, stencil_ids, stencil = [], {}, []
+        for unit in units:
+            ids = []
+            for attack_type, attack in enumerate(unit.attack_types[:2]):
+                attack_range = attack.range
+                key = (unit.__class__, attack_range)
+                if key not in stencil_ids:
+                    # Cases du motif qui sont aussi dans la portée (comme dans Unit.attack)
+                    stencil_ids[key] = len(offsets)
+                    offsets.append([(dx, dy) for dx, dy in unit.attack_offsets(attack_type)
+                                    if abs(dx) <= attack_range and abs(dy) <= attack_range])
+                ids.append(stencil_ids[key])
+            stencil.append(ids)
+
+        radius = max([max(abs(dx), abs(dy)) for cells in offsets for dx, dy in cells] or [0])
+        stencils = np.zeros((len(offsets), 2 * radius + 1, 2 * radius + 1), dtype=bool)
+        for index, cells in enumerate(offsets):
+            for dx, dy in cells:
+                stencils[index, dy + radius, dx + radius] = True
+
+        return cls(
+            x=[unit.x for unit in units],
+            y=[unit.y for unit in units],
+            health=[unit.health for unit in units],
+            max_health=[unit.max_health for unit in units],
+            defense=[unit.defense for unit in units],
+            team=[TEAMS.index(unit.team) for unit in units],
+            power=[[attack.power for attack in unit.attack_types[:2]] for unit in units],
+            range=[[attack.range for attack in unit.attack_types[:2]] for unit in units],
+            stencil=stencil,
+            stencils=stencils,
+        )
+
+    def __len__(self):
+        return self.team.shape[0]
+
+    @property
+    def alive(self):
+        """Masque des unités vivantes."""
+        return self.health > 0
+
+    def tile(self, matches):
+        """
+        Retourne une copie avec `matches` parties simulées identiques (tableaux dynamiques de forme (M, N)).
+        """
+        def repeat(values):
+            return np.broadcast_to(values, (matches,) + values.shape[-1:]).copy()
+
+        return UnitArrays(repeat(self.x), repeat(self.y), repeat(self.health), self.max_health,
+                          self.defense, self.team, self.power, self.range, self.stencil, self.stencils)
+
+    def write_back(self, units):
+        """Recopie les positions et la santé (d'une seule partie) dans les objets `Unit`."""
+        for index, unit in enumerate(units):
+            unit.x = int(self.x[index])
+            unit.y = int(self.y[index])
+            unit.health = self.health[index].item()
+
+
+def sight_mask(arrays, terrain):
+    """
+    Calcule quelles unités chaque unité voit (lignes de vue de `visibility.py`).
+
+    Les champs de vision sont lus dans le cache du terrain ; le calcul se fait
+    unité par unité et n'est donc pas vectorisé.
+
+    Paramètres
+    ----------
+    arrays : UnitArrays
+        Les unités (une ou plusieurs parties).
+    terrain : Terrain
+        Le terrain des parties.
+
+    Retourne
+    -------
+    sight : numpy.ndarray[bool], forme (..., N, N)
+        sight[..., a, t] vaut True si t est en ligne de vue de a.
+    """
+    visibility = visibility_of(terrain)
+    xs = arrays.x.reshape(-1, len(arrays))
+    ys = arrays.y.reshape(-1, len(arrays))
+    sight = np.zeros(xs.shape + (len(arrays),), dtype=bool)
+    for match, (row_x, row_y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        for attacker, (x0, y0) in enumerate(zip(row_x, row_y)):
+            for target, (x1, y1) in enumerate(zip(row_x, row_y)):
+                sight[match, attacker, target] = visibility.line_of_sight(x0, y0, x1, y1)
+    return sight.reshape(arrays.x.shape + (len(arrays),))
+
+
+def attack_mask(arrays, attack_type=0, sight=None):
+    """
+    Calcule quelles cibles chaque unité toucherait avec le type d'attaque donné.
+
+    Paramètres
+    ----------
+    arrays : UnitArrays
+        Les unités (une ou plusieurs parties).
+    attack_type : int
+        Type d'attaque (0 pour normale, 1 pour spéciale).
+    sight : numpy.ndarray[bool], optional
+        Les lignes de vue (voir `sight_mask`) ; les obstacles sont ignorés si None.
+
+    Retourne
+    -------
+    mask : numpy.ndarray[bool], forme (..., N, N)
+        mask[..., a, t] vaut True si l'attaquant a touche la cible t.
+    """
+    radius = arrays.stencils.shape[-1] // 2
+    dx = arrays.x[..., None, :] - arrays.x[..., :, None]  # Décalage de la cible par rapport à l'attaquant
+    dy = arrays.y[..., None, :] - arrays.y[..., :, None]
+    inside = (np.abs(dx) <= radius) & (np.abs(dy) <= radius)
+
+    # Lecture du motif de chaque attaquant à la position relative de chaque cible
+    stencil = arrays.stencil[:, attack_type][:, None]
+    hit = arrays.stencils[stencil, np.clip(dy + radius, 0, 2 * radius), np.clip(dx + radius, 0, 2 * radius)]
+
+    alive = arrays.alive
+    opponents = arrays.team[:, None] != arrays.team[None, :]
+    mask = inside & hit & opponents & alive[..., :, None] & alive[..., None, :]
+    return mask if sight is None else mask & sight
+
+
+def damage_matrix(arrays, attack_type=0, sight=None):
+    """
+    Calcule les dégâts `max(0, puissance - défense)` infligés par chaque attaquant à chaque cible touchée.
+
+    Retourne
+    -------
+    damage : numpy.ndarray[float], forme (..., N, N)
+        damage[..., a, t] est le nombre de points de vie retirés à t par a (0 si t n'est pas touchée).
+    """
+    damage = np.maximum(0.0, arrays.power[:, attack_type][:, None] - arrays.defense[None, :])
+    return np.where(attack_mask(arrays, attack_type, sight), damage, 0.0)
+
+
+def resolve_attacks(arrays, attackers, attack_type=0, sight=None):
+    """
+    Applique simultanément les attaques des unités données (modifie `arrays.health`).
+
+    Pour un seul attaquant, le résultat est celui de `rules.resolve_attack`.
+    Pour plusieurs, les attaques sont simultanées : une unité tuée pendant le
+    lot attaque quand même.
+
+    Paramètres
+    ----------
+    arrays : UnitArrays
+        Les unités (une ou plusieurs parties).
+    attackers : numpy.ndarray[bool], forme (..., N)
+        Les unités qui attaquent.
+    attack_type : int or numpy.ndarray[int]
+        Le type d'attaque (le même pour tous, ou un par attaquant).
+    sight : numpy.ndarray[bool], optional
+        Les lignes de vue (voir `sight_mask`) ; les obstacles sont ignorés si None.
+
+    Retourne
+    -------
+    damage : numpy.ndarray[float], forme (..., N)
+        Les dégâts reçus par chaque unité.
+    """
+    attackers = np.asarray(attackers, dtype=bool)
+    if np.ndim(attack_type) == 0:
+        matrix = damage_matrix(arrays, attack_type, sight)
+    else:
+        chosen = np.asarray(attack_type)[..., :, None]
+        matrix = np.where(chosen == 0, damage_matrix(arrays, 0, sight), damage_matrix(arrays, 1, sight))
+    received = np.einsum('...a,...at->...t', attackers.astype(np.float64), matrix)
+    arrays.health -= received
+    return received
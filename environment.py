@@ -0,0 +1,495 @@
+"""
+Environnements d'entraînement des IA (interface reset/step, vectorisée).
+
+Une partie est jouée sans affichage par le moteur de règles, du point de vue
+d'une équipe (par défaut 'enemy') : chaque `step` applique une action de
+l'unité active de cette équipe, puis fait jouer l'adversaire (coups légaux au
+hasard, ou `GreedyController`) jusqu'au prochain tour de l'équipe. Les
+observations sont des plans NumPy (voir PLANES) et les actions un indice de
+ACTIONS ; le masque des actions autorisées est donné à chaque pas.
+
+`VectorGameEnv` fait avancer N parties au même rythme, dans le processus
+courant ou réparties entre plusieurs processus : les observations sont alors
+écrites par chaque processus dans des tableaux partagés (aucune copie ni
+sérialisation), seules les commandes passent par les tubes. Le débit (pas par
+seconde) se mesure avec :
+    python environment.py [--envs 16] [--workers 0] [--steps 20000] [--opponent random|greedy]
+                          [--max-turns 100] [--seed 0] [--map maps/default.map]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from ai import GreedyController
+from maps import DEFAULT_MAP, load_map
+from rules import (GameState, DIRECTIONS, VALIDATE_ACTION, HEAL_ACTION, SKIP_ACTION,
+                   move_action, attack_action, apply_action, legal_actions)
+from tournament import COMPOSITIONS
+
+# Actions de l'espace discret : indice -> action du moteur de règles
+ACTIONS = ([move_action(dx, dy) for dx, dy in DIRECTIONS]
+           + [VALIDATE_ACTION, attack_action(0), attack_action(1), HEAL_ACTION, SKIP_ACTION])
+ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+
+# Plans des observations, de forme (len(PLANES), hauteur, largeur)
+PLANES = ("terrain",   # Code du terrain de chaque case
+          "unit",      # 1 sur les cases occupées
+          "health",    # health / max_health de l'unité
+          "defense",   # Défense de l'unité
+          "team",      # 1 pour une unité de l'équipe entraînée, -1 pour une unité adverse
+          "active")    # 1 sur l'unité active
+TERRAIN_PLANE, UNIT_PLANE, HEALTH_PLANE, DEFENSE_PLANE, TEAM_PLANE, ACTIVE_PLANE = range(len(PLANES))
+
+OPPONENTS = ("random", "greedy")
+WIN_REWARD = 1.0
+ILLEGAL_ACTION_PENALTY = -0.01  # Une action non autorisée est ignorée
+
+_maps = {}  # Cartes déjà chargées par chaque processus
+
+
+def observation_shape(terrain):
+    """Retourne la forme des observations sur un terrain : (plans, hauteur, largeur)."""
+    return len(PLANES), terrain.height, terrain.width
+
+
+class GameEnv:
+    """
+    Classe pour entraîner une IA sur des parties jouées par le moteur de règles.
+
+    Les compositions des deux équipes sont tirées au hasard à chaque partie
+    parmi celles de la sélection des unités, sauf si elles sont imposées.
+
+    La récompense d'un pas est la santé retirée aux unités adverses moins la
+    santé perdue par les unités de l'équipe (soins compris), chacune rapportée
+    à la santé maximale de l'unité, plus WIN_REWARD en cas de victoire (moins en
+    cas de défaite). La partie est tronquée au-delà de `max_turns` tours.
+
+    ...
+    Attributs
+    ---------
+    team : str
+        L'équipe jouée par l'IA entraînée.
+    state : GameState
+        La partie en cours.
+    terrain : Terrain
+        Le terrain de la carte (partagé par toutes les parties du processus).
+    rng : random.Random
+        Le générateur aléatoire des compositions, des graines des parties et de l'adversaire.
+    """
+
+    def __init__(self, map_path=DEFAULT_MAP, team='enemy', opponent="random", max_turns=100,
+                 compositions=None, seed=None):
+        """
+        Paramètres
+        ----------
+        map_path : str
+            La carte des parties.
+        team : str
+            L'équipe jouée par l'IA entraînée ('player' joue en premier).
+        opponent : str
+            'random' (coups autorisés au hasard) ou 'greedy' (`GreedyController`).
+        max_turns : int
+            Le nombre de tours au-delà duquel la partie est tronquée.
+        compositions : dict[str, list[type]], optional
+            Les classes des unités de chaque équipe (tirées au hasard par défaut).
+        seed : int, optional
+            La graine de l'environnement.
+        """
+        if opponent not in OPPONENTS:
+            raise ValueError(f"Adversaire inconnu : {opponent} (attendu : {', '.join(OPPONENTS)})")
+        game_map = _maps.get(map_path)
+        if game_map is None:
+            game_map = _maps[map_path] = load_map(map_path)
+        self.game_map = game_map
+        self.terrain = game_map.terrain
+        self.team = team
+        self.opponent_team = 'player' if team == 'enemy' else 'enemy'
+        self.opponent = opponent
+        self.max_turns = max_turns
+        self.compositions = compositions
+        self.rng = random.Random(seed)
+        self.controller = None
+        self.state = None
+
+        # Plan du terrain calculé une seule fois : chaque observation n'écrit que les cases des unités
+        self.terrain_plane = np.frombuffer(bytes(self.terrain.codes), dtype=np.uint8).astype(np.float32)
+        self.terrain_plane = self.terrain_plane.reshape(self.terrain.height, self.terrain.width)
+        self.shape = observation_shape(self.terrain)
+
+    def reset(self, seed=None, out=None):
+        """
+        Commence une nouvelle partie et fait jouer l'adversaire s'il commence.
+
+        Paramètres
+        ----------
+        seed : int, optional
+            Nouvelle graine de l'environnement.
+        out : numpy.ndarray, optional
+            Le tableau où écrire l'observation (alloué sinon).
+
+        Retourne
+        -------
+        observation, info : numpy.ndarray, dict
+            L'observation et {"action_mask": actions autorisées}.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+        units = {}
+        for team in (self.team, self.opponent_team):
+            composition = (self.compositions[team] if self.compositions is not None
+                           else self.rng.choice(COMPOSITIONS))
+            units[team] = [unit_class(x, y, team, self.terrain)
+                           for unit_class, (x, y) in zip(composition, self.game_map.spawn_cells(team))]
+        self.state = GameState(self.terrain, units['player'], units['enemy'], seed=self.rng.getrandbits(32))
+        if self.opponent == "greedy":
+            self.controller = GreedyController(self.opponent_team, seed=self.rng.getrandbits(32))
+        self.play_opponent()
+        return self.observe(out), {"action_mask": self.action_mask()}
+
+    def step(self, action, out=None):
+        """
+        Applique une action de l'unité active, puis fait jouer l'adversaire jusqu'au prochain tour de l'équipe.
+
+        Paramètres
+        ----------
+        action : int
+            L'indice de l'action dans ACTIONS (une action non autorisée est ignorée et pénalisée).
+        out : numpy.ndarray, optional
+            Le tableau où écrire l'observation (alloué sinon).
+
+        Retourne
+        -------
+        observation, reward, terminated, truncated, info : numpy.ndarray, float, bool, bool, dict
+            L'observation, la récompense, la fin de la partie (victoire d'une
+            équipe), sa troncature (nombre maximal de tours) et
+            {"action_mask": actions autorisées, "winner": équipe gagnante ou None}.
+        """
+        state = self.state
+        events = apply_action(state, ACTIONS[action])
+        reward = self.reward(events) if events else ILLEGAL_ACTION_PENALTY
+        reward += self.play_opponent()
+
+        terminated = state.winner is not None
+        if terminated:
+            reward += WIN_REWARD if state.winner == self.team else -WIN_REWARD
+        truncated = not terminated and state.turn > self.max_turns
+        info = {"action_mask": self.action_mask(), "winner": state.winner}
+        return self.observe(out), reward, terminated, truncated, info
+
+    def play_opponent(self):
+        """Fait jouer l'adversaire tant que c'est son tour. Retourne la récompense de ses actions."""
+        state = self.state
+        reward = 0.0
+        while state.winner is None and state.team == self.opponent_team and state.turn <= self.max_turns:
+            if self.controller is not None:
+                actions = self.controller.choose_actions(state)
+            else:
+                actions = [self.rng.choice(legal_actions(state))]
+            for action in actions:
+                reward += self.reward(apply_action(state, action))
+        return reward
+
+    def reward(self, events):
+        """Retourne la récompense de l'équipe pour les événements d'une action (santé relative gagnée ou perdue)."""
+        reward = 0.0
+        for event in events:
+            if event[0] == "damage":
+                target = event[2]
+                change = -event[3] / target.max_health
+            elif event[0] == "heal":
+                target = event[1]
+                change = event[2] / target.max_health
+            else:
+                continue
+            reward += change if target.team == self.team else -change
+        return reward
+
+    def action_mask(self):
+        """Retourne le masque (booléens, forme (len(ACTIONS),)) des actions autorisées pour l'unité active."""
+        mask = np.zeros(len(ACTIONS), dtype=bool)
+        for action in legal_actions(self.state):
+            mask[ACTION_INDEX[action]] = True
+        return mask
+
+    def observe(self, out=None):
+        """
+        Retourne l'observation de la partie en cours.
+
+        Paramètres
+        ----------
+        out : numpy.ndarray, optional
+            Le tableau (float32, forme `self.shape`) où écrire l'observation.
+
+        Retourne
+        -------
+        observation : numpy.ndarray
+            Les plans de PLANES, indexés par [plan, y, x].
+        """
+        observation = np.empty(self.shape, dtype=np.float32) if out is None else out
+        observation[TERRAIN_PLANE] = self.terrain_plane
+        observation[UNIT_PLANE:] = 0.0
+        state = self.state
+        for unit in state.player_units + state.enemy_units:
+            x, y = unit.x, unit.y
+            observation[UNIT_PLANE, y, x] = 1.0
+            observation[HEALTH_PLANE, y, x] = unit.health / unit.max_health
+            observation[DEFENSE_PLANE, y, x] = unit.defense
+            observation[TEAM_PLANE, y, x] = 1.0 if unit.team == self.team else -1.0
+        unit = state.active_unit
+        if unit is not None:
+            observation[ACTIVE_PLANE, unit.y, unit.x] = 1.0
+        return observation
+
+
+class EnvBatch:
+    """
+    Classe pour faire avancer un groupe d'environnements en écrivant leurs résultats dans des tableaux communs.
+
+    Utilisée directement par `VectorGameEnv` dans le processus courant, ou par
+    chaque processus de travail sur sa part des tableaux partagés.
+
+    ...
+    Attributs
+    ---------
+    envs : list[GameEnv]
+        Les environnements du groupe.
+    buffers : dict[str, numpy.ndarray]
+        Les tableaux des résultats du groupe : "observations", "rewards",
+        "terminated", "truncated", "masks", et "actions" (lu à chaque pas).
+    """
+
+    def __init__(self, seeds, buffers, env_options):
+        self.envs = [GameEnv(seed=seed, **env_options) for seed in seeds]
+        self.buffers = buffers
+
+    def reset(self):
+        """Commence une nouvelle partie dans chaque environnement."""
+        observations, masks = self.buffers["observations"], self.buffers["masks"]
+        for index, env in enumerate(self.envs):
+            _, info = env.reset(out=observations[index])
+            masks[index] = info["action_mask"]
+        self.buffers["rewards"][:] = 0.0
+        self.buffers["terminated"][:] = False
+        self.buffers["truncated"][:] = False
+
+    def step(self):
+        """Applique l'action de chaque environnement ; une partie terminée est aussitôt remplacée par une nouvelle."""
+        buffers = self.buffers
+        observations, masks = buffers["observations"], buffers["masks"]
+        rewards, terminated, truncated = buffers["rewards"], buffers["terminated"], buffers["truncated"]
+        for index, (env, action) in enumerate(zip(self.envs, buffers["actions"].tolist())):
+            observation, rewards[index], terminated[index], truncated[index], info = env.step(
+                action, out=observations[index])
+            if terminated[index] or truncated[index]:
+                _, info = env.reset(out=observation)
+            masks[index] = info["action_mask"]
+
+
+def shared_buffer(shape, dtype):
+    """Retourne un tampon en mémoire partagée entre processus, décrit par (mémoire, type, forme)."""
+    dtype = np.dtype(dtype)
+    return multiprocessing.RawArray('b', int(np.prod(shape)) * dtype.itemsize), dtype.str, shape
+
+
+def buffer_array(buffer):
+    """Retourne le tableau NumPy qui lit et écrit directement un tampon de `shared_buffer`."""
+    memory, dtype, shape = buffer
+    return np.frombuffer(memory, dtype=dtype).reshape(shape)
+
+
+def run_worker(connection, seeds, start, stop, shared_buffers, env_options):
+    """Boucle d'un processus de travail : exécute les commandes reçues sur sa tranche des tableaux partagés."""
+    buffers = {name: buffer_array(buffer)[start:stop] for name, buffer in shared_buffers.items()}
+    batch = EnvBatch(seeds, buffers, env_options)
+    try:
+        while True:
+            command = connection.recv()
+            if command == "close":
+                break
+            getattr(batch, command)()
+            connection.send(None)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class VectorGameEnv:
+    """
+    Classe pour faire avancer N environnements au même rythme.
+
+    Les résultats sont des tableaux dont la première dimension est celle des
+    environnements. Une partie terminée ou tronquée est aussitôt remplacée :
+    l'observation retournée est alors celle de la nouvelle partie.
+
+    ...
+    Attributs
+    ---------
+    num_envs : int
+        Le nombre d'environnements.
+    observation_shape : tuple
+        La forme de l'observation d'un environnement.
+    workers : int
+        Le nombre de processus de travail (0 : environnements dans le processus courant).
+    """
+
+    def __init__(self, num_envs, workers=0, seed=None, **env_options):
+        """
+        Paramètres
+        ----------
+        num_envs : int
+            Le nombre d'environnements.
+        workers : int, optional
+            Le nombre de processus (0 pour le processus courant, None pour tous les coeurs).
+        seed : int, optional
+            La graine des environnements (chacun reçoit sa propre graine, dérivée de celle-ci).
+        env_options
+            Les options de chaque `GameEnv` (carte, équipe, adversaire, nombre maximal de tours).
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.num_envs = num_envs
+        self.workers = min(workers, num_envs)
+        rng = random.Random(seed)
+        seeds = [rng.getrandbits(32) for _ in range(num_envs)]
+
+        map_path = env_options.get("map_path", DEFAULT_MAP)
+        game_map = _maps.get(map_path)
+        if game_map is None:
+            game_map = _maps[map_path] = load_map(map_path)
+        self.observation_shape = observation_shape(game_map.terrain)
+
+        layouts = {
+            "observations": ((num_envs,) + self.observation_shape, np.float32),
+            "rewards": ((num_envs,), np.float32),
+            "terminated": ((num_envs,), bool),
+            "truncated": ((num_envs,), bool),
+            "masks": ((num_envs, len(ACTIONS)), bool),
+            "actions": ((num_envs,), np.int64),
+        }
+
+        self.batch = None
+        self.connections = []
+        self.processes = []
+        if self.workers == 0:
+            self.buffers = {name: np.zeros(shape, dtype=dtype) for name, (shape, dtype) in layouts.items()}
+            self.batch = EnvBatch(seeds, self.buffers, env_options)
+            return
+
+        shared_buffers = {name: shared_buffer(shape, dtype) for name, (shape, dtype) in layouts.items()}
+        self.buffers = {name: buffer_array(buffer) for name, buffer in shared_buffers.items()}
+        # Environnements répartis en parts contiguës : chaque processus écrit dans sa tranche des tableaux
+        bounds = [num_envs * index // self.workers for index in range(self.workers + 1)]
+        for start, stop in zip(bounds, bounds[1:]):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_worker, daemon=True,
+                                              args=(worker_connection, seeds[start:stop], start, stop,
+                                                    shared_buffers, env_options))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def run(self, command):
+        """Exécute une commande ("reset" ou "step") sur tous les environnements."""
+        if self.batch is not None:
+            getattr(self.batch, command)()
+            return
+        for connection in self.connections:
+            connection.send(command)
+        for connection in self.connections:
+            connection.recv()
+
+    def results(self):
+        """Retourne des copies des résultats du dernier pas (les tableaux sont réécrits au pas suivant)."""
+        buffers = self.buffers
+        return (buffers["observations"].copy(), buffers["rewards"].copy(), buffers["terminated"].copy(),
+                buffers["truncated"].copy(), {"action_mask": buffers["masks"].copy()})
+
+    def reset(self):
+        """
+        Commence une nouvelle partie dans chaque environnement.
+
+        Retourne
+        -------
+        observations, info : numpy.ndarray, dict
+            Les observations (forme (N,) + observation_shape) et {"action_mask": masques (N, len(ACTIONS))}.
+        """
+        self.run("reset")
+        observations, _, _, _, info = self.results()
+        return observations, info
+
+    def step(self, actions):
+        """
+        Applique une action dans chaque environnement.
+
+        Paramètres
+        ----------
+        actions : array_like[int]
+            L'indice (dans ACTIONS) de l'action de chaque environnement.
+
+        Retourne
+        -------
+        observations, rewards, terminated, truncated, info : numpy.ndarray, ..., dict
+            Les résultats de `GameEnv.step` de chaque environnement, empilés, et
+            {"action_mask": masques (N, len(ACTIONS))}.
+        """
+        self.buffers["actions"][:] = actions
+        self.run("step")
+        return self.results()
+
+    def close(self):
+        """Arrête les processus de travail."""
+        for connection in self.connections:
+            try:
+                connection.send("close")
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join(timeout=5)
+        self.connections, self.processes = [], []
+
+
+def random_actions(masks, rng):
+    """Retourne une action autorisée tirée au hasard pour chaque ligne de `masks` (N, len(ACTIONS))."""
+    return np.argmax(rng.random(masks.shape) * masks, axis=1)
+
+
+def main(args):
+    """Mesure le débit (pas par seconde) d'environnements vectorisés joués par des actions au hasard."""
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    num_envs = int(option("--envs", 16))
+    workers = option("--workers", "0")
+    steps = int(option("--steps", 20000))
+    seed = int(option("--seed", 0))
+    envs = VectorGameEnv(num_envs, workers=None if workers == "all" else int(workers), seed=seed,
+                         map_path=option("--map", DEFAULT_MAP), opponent=option("--opponent", "random"),
+                         max_turns=int(option("--max-turns", 100)))
+    rng = np.random.default_rng(seed)
+    try:
+        _, info = envs.reset()
+        episodes = 0
+        start = time.perf_counter()
+        for _ in range(max(1, steps // num_envs)):
+            _, _, terminated, truncated, info = envs.step(random_actions(info["action_mask"], rng))
+            episodes += int(np.count_nonzero(terminated | truncated))
+        elapsed = time.perf_counter() - start
+    finally:
+        envs.close()
+
+    total = max(1, steps // num_envs) * num_envs
+    print(f"{num_envs} environnements, {envs.workers} processus : {total} pas en {elapsed:.2f} s "
+          f"({total / elapsed:.0f} pas/s, {episodes} parties terminées)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
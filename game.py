@@ -1,39 +1,34 @@
+import os
 import pygame
 import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
  
 from unit import *
+from rules import *
+from maps import load_map, DEFAULT_MAP
+from renderer import Renderer, MOVE_HIGHLIGHT, ATTACK_HIGHLIGHTS, DANGER_HIGHLIGHTS
+from scheduler import FrameScheduler
+from assets import assets
+from text import text_cache
+from ai import MCTSController
+from replay import ActionRecorder
+from profiler import profiler
+from visibility import TeamFog
+from threat import ThreatMap
+from client import RemoteMatch
 
 # Définir les constantes
 TILE_SIZE = 45  # Taille d'une case (en pixels)
-GRID_WIDTH = 17 # Largeur de la grille en nombre de cases
-GRID_HEIGHT = 17 # Hauteur de la grille en nombre de cases
-SCREEN_WIDTH = GRID_WIDTH * TILE_SIZE # Largeur de la fenêtre du jeu en pixels
-SCREEN_HEIGHT = GRID_HEIGHT * TILE_SIZE # Hauteur de la fenêtre du jeu en pixels
-
-# Charger l'image de la grille et l'ajuster à la taille de l'écran
-grid_image = pygame.image.load(r"images\grille.png")
-grid_image = pygame.transform.scale(grid_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-
-# Grille logique (terrain)
-grid = [
-    ["passage_vert"] * 13 + ["arbre", "mur", "healing_zone", "passage_vert"],
-    ["passage_vert"] * 13 + ["arbre", "mur", "passage_vert", "passage_vert"],
-    ["passage_vert"] * 3 + ["mur", "arbre"] + ["passage_vert"] * 8 + ["arbre", "mur", "mur", "passage_vert"],
-    ["mur"] * 4 + ["arbre"] + ["passage_vert"] * 4 + ["mer"] + ["passage_vert"] * 3 + ["arbre"] * 3 + ["passage_vert"],
-    ["arbre"] * 5 + ["passage_vert"] * 4 + ["mer"] * 2 + ["passage_vert"] * 6,
-    ["passage_vert"] * 17,
-    ["passage_vert"] * 6 + ["arbre"] * 4 + ["passage_vert"] * 7,
-    ["passage_vert"] * 2 + ["arbre"] + ["passage_vert"] * 3 + ["arbre", "mer", "mer", "arbre"] + ["passage_vert"] * 6 + ["mer"],
-    ["passage_vert"] * 2 + ["arbre"] + ["passage_vert"] * 4 + ["mer", "mer", "arbre"] + ["passage_vert"] * 5 + ["mer"] + ["healing_zone"],
-    ["arbre"] * 3 + ["passage_vert"] * 3 + ["arbre", "mer", "arbre", "arbre"] + ["passage_vert"] * 4 + ["mer"] + ["passage_vert"] * 2,
-    ["passage_vert"] * 6 + ["arbre"] + ["passage_vert"] * 6 + ["mer"] + ["passage_vert"] * 3,
-    ["passage_vert"] * 17,
-    ["passage_vert"] * 2 + ["mur"] * 2 + ["passage_vert"] * 8 + ["arbre"] * 5,
-    ["arbre"] + ["passage_vert"] * 2 + ["mur"] + ["passage_vert"] * 8 + ["arbre"] + ["mur"] * 4,
-    ["arbre"] * 2 + ["passage_vert"] * 10 + ["arbre"] + ["mur"] + ["passage_vert"] * 3,
-    ["passage_vert"] * 3 + ["mur"] + ["passage_vert"] * 4 + ["mer"] + ["passage_vert"] * 8,
-    ["passage_vert"] * 2 + ["healing_zone"] + ["mur"] + ["passage_vert"] * 3 + ["mer"] * 3 + ["passage_vert"] * 7
-]
+VIEW_WIDTH = 17 # Largeur de la vue en nombre de cases (la carte peut être plus grande)
+VIEW_HEIGHT = 17 # Hauteur de la vue en nombre de cases
+SCREEN_WIDTH = VIEW_WIDTH * TILE_SIZE # Largeur de la fenêtre du jeu en pixels
+SCREEN_HEIGHT = VIEW_HEIGHT * TILE_SIZE # Hauteur de la fenêtre du jeu en pixels
+AI_STEP_DELAY = 250 # Délai entre deux actions de l'IA (en millisecondes)
+AI_PLAN_READY = pygame.event.custom_type()  # Posté quand l'IA a choisi les actions d'une unité
+MUSIC_PATH = r"sounds/sound_free_copyright.mp3"  # Remplacer par le chemin de votre fichier audio
+UNIT_CLASSES = [Archer, Swordsman, Wizard, Invincible, Bomber]  # Unités proposées à la sélection
 
 
 class Game:
@@ -43,7 +38,8 @@ class Game:
     """
 
 
-    def __init__(self, screen):
+    def __init__(self, screen, fps=FPS, controllers=None, map_path=DEFAULT_MAP, log_dir="logs", fog=True,
+                 server=None, spectate=False):
         """
         Construit le jeu avec la surface de la fenêtre.
 
@@ -51,14 +47,73 @@ class Game:
         ----------
         screen : pygame.Surface
             La surface de la fenêtre du jeu.
+        fps : int
+            Le nombre maximal d'images par seconde.
+        controllers : dict[str, MCTSController], optional
+            Les équipes jouées par l'IA (par exemple {'enemy': MCTSController('enemy')}).
+        map_path : str
+            Le fichier de la carte (voir maps.py).
+        log_dir : str or None
+            Le dossier des journaux de parties (voir replay.py), ou None pour ne pas enregistrer.
+        fog : bool
+            Afficher le brouillard de guerre : les cases et les unités adverses hors de vue sont masquées.
+        server : tuple, optional
+            (hôte, port, nom de la partie) pour jouer en ligne en client léger (voir server.py).
+        spectate : bool
+            Regarder la partie en ligne au lieu d'y jouer.
         """
         self.screen = screen
+        self.fps = fps
+        self.controllers = controllers or {}
+        self.ai_thread = None  # Thread de réflexion de l'IA (créé au premier tour de l'IA)
         self.player_units = [] # Liste des unités du joueur
         self.enemy_units = [] # Liste des unités de l'adversaire
        
-        # Charger l'image de fond et l'ajuster à la taille de l'écran
-        self.background_image = pygame.image.load(r"images/menu_background.png")  # Charger l'image de fond
-        self.background_image = pygame.transform.scale(self.background_image, (SCREEN_WIDTH + 16 * TILE_SIZE, SCREEN_HEIGHT))
+        # Image de fond ajustée à la taille de l'écran, décodée en arrière-plan (le menu s'affiche sans attendre)
+        self.background = assets.load_async("menu_background", (SCREEN_WIDTH + 16 * TILE_SIZE, SCREEN_HEIGHT))
+
+        # Carte : terrain, image de fond éventuelle et positions de départ
+        self.map_path = map_path
+        self.game_map = load_map(map_path)
+        self.terrain = self.game_map.terrain
+
+        # Affichage de la partie visible de la grille par cases modifiées et panneau d'information
+        grid_image = None
+        if self.game_map.image is not None:
+            grid_image = assets.load_async(self.game_map.image, (self.terrain.width * TILE_SIZE, self.terrain.height * TILE_SIZE))  # Image de la grille ajustée à la carte
+        self.renderer = Renderer(screen, self.terrain, TILE_SIZE, VIEW_WIDTH, VIEW_HEIGHT, grid_image)
+        self.panel_rect = pygame.Rect(SCREEN_WIDTH, 0, 16 * TILE_SIZE, SCREEN_HEIGHT)
+        self.panel_cache = {}  # Panneaux d'information pré-composés
+
+        # Journal des actions de la partie
+        self.log_dir = log_dir
+        self.recorder = None
+
+        # Partie en ligne : seule l'équipe locale est choisie, le serveur attribue l'équipe et les positions
+        self.server = server
+        self.spectate = spectate
+        self.composition = []
+
+        # Brouillard de guerre de chaque équipe (mis à jour quand ses unités se déplacent)
+        self.state = None
+        self.local_team = None  # Équipe jouée sur cet écran en ligne (attribuée par le serveur)
+        self.fog = {team: TeamFog(self.terrain, team) for team in ('player', 'enemy')} if fog else None
+
+        # Zones dangereuses (touche F4) : menaces des unités adverses visibles, mises à jour à chaque déplacement
+        self.show_danger = False
+        self.threats = {team: ThreatMap(self.terrain, team) for team in ('player', 'enemy')}
+        self.danger_key = None
+        self.danger_cells = {}
+
+        # Images des unités (sélection et grille), décodées en arrière-plan pendant le menu
+        for unit_class in UNIT_CLASSES:
+            assets.load_async(unit_class.sprite, (100, 100))
+            assets.load_async(unit_class.sprite, (CELL_SIZE - 3, CELL_SIZE - 3))
+
+    @property
+    def background_image(self):
+        """L'image de fond des menus (attend la fin de son chargement)."""
+        return self.background.result()
     
     def select_units(self, player_name):
         """
@@ -73,10 +128,10 @@ class Game:
         selected_units : list[Unit]
             La liste des unités sélectionnées par le joueur.
         """
-        font = pygame.font.Font(None, 30) # Police de taille 30 pour les textes standards
-        title_font = pygame.font.Font(None, 50) # Police de taille 50 pour les titres
-        small_font = pygame.font.Font(None, 24) # Police de taille 24 pour les petits textes
-        clock = pygame.time.Clock() # Horloge pour gérer le taux de rafraîchissement
+        font = text_cache.font(30) # Police de taille 30 pour les textes standards
+        title_font = text_cache.font(50) # Police de taille 50 pour les titres
+        small_font = text_cache.font(24) # Police de taille 24 pour les petits textes
+        scheduler = FrameScheduler(self.fps) # Gère le taux de rafraîchissement et l'attente des événements
 
         # Liste des unités disponibles avec leurs caractéristiques
         all_units = [
@@ -89,7 +144,7 @@ class Game:
                     "1. Arrow Shot : -2PV sur une portée de 3 cases",
                     "2. Power Arrow : -4PV sur une portée de 2 cases"
                 ],
-                "image": pygame.image.load(r"images/archer.png")
+                "sprite": "archer"
             },
             {
                 "class": Swordsman,
@@ -99,7 +154,7 @@ class Game:
                     "1. Sword Slash : -3PV sur une portée de 1 case",
                     "2. Heavy Strike : -6PV sur une portée de 1 case"
                 ],
-                "image": pygame.image.load(r"images/swordsman.png")
+                "sprite": "swordsman"
             },
             {
                 "class": Wizard,
@@ -110,7 +165,7 @@ class Game:
                     "2. Incendio : -8PV sur une portée de 2 cases",
                     "'L' pour se régénérer 4PV (valider la position avant d'utiliser ce pouvoir)"
                 ],
-                "image": pygame.image.load(r"images/wizard.png")
+                "sprite": "wizard"
             },
             {
                 "class": Invincible,
@@ -120,7 +175,7 @@ class Game:
                     "1. Big Slash : -4PV sur une portée de 1 case",
                     "2. Two Blade Style : -6PV sur une portée de 2 cases"
                 ],
-                "image": pygame.image.load(r"images/invincible.png")
+                "sprite": "invincible"
             },
             {
                 "class": Bomber,
@@ -130,7 +185,7 @@ class Game:
                     "1. Aqua bomb : -5PV sur une portée de 3 cases",
                     "2. Lava bomb : -7.5PV sur une portée de 6 cases"
                 ],
-                "image": pygame.image.load(r"images/bomber.png")
+                "sprite": "bomber"
             }
         ]
 
@@ -138,51 +193,54 @@ class Game:
 
         # Boucle principale de sélection des unités
         while len(selected_units) < 3:
-            self.screen.blit(self.background_image, (0, 0))  # Afficher l'image de fond
-
-            # Afficher le titre
-            title = title_font.render(f"Equipe : {player_name}, choisissez vos unités", True, (255, 255, 255))
-            self.screen.blit(title, (1485 // 2 - title.get_width() // 2, 20))
-
-            # Afficher les unités disponibles
-            for i, unit in enumerate(all_units):
-                x_pos = 100 + i * 270
-                y_pos = 100
-
-                # Afficher le nom de l'unité
-                name_text = font.render(f"{i + 1}. {unit['name']}", True, (255, 255, 255))
-                self.screen.blit(name_text, (x_pos, y_pos))
-
-                # Afficher l'image de l'unité
-                unit_image = pygame.transform.scale(unit['image'], (100, 100))
-                self.screen.blit(unit_image, (x_pos, y_pos + 30))
-
-                # Afficher les stats avec gestion du texte long
-                stats_lines = self.wrap_text(unit['stats'], small_font, 250)
-                for j, line in enumerate(stats_lines):
-                    stats_text = small_font.render(line, True, (0, 0, 0))
-                    self.screen.blit(stats_text, (x_pos, y_pos + 140 + j * 20))
-
-                # Afficher les attaques avec gestion du texte long
-                for k, attack in enumerate(unit['attacks']):
-                    attack_lines = self.wrap_text(attack, small_font, 250)
-                    for l, line in enumerate(attack_lines):
-                        attack_text = small_font.render(line, True, (0, 0, 0))
-                        self.screen.blit(attack_text, (x_pos, y_pos + 160 + len(stats_lines) * 20 + k * 40 + l * 20))
-
-            # Afficher le nombre d'unités déjà sélectionnées
-            selected_title = title_font.render(f"Unités sélectionnées : {len(selected_units)}/3", True, (255, 255, 255))
-            self.screen.blit(selected_title, (1485 // 2 - selected_title.get_width() // 2, 600))
-
-            pygame.display.flip()  # Mettre à jour l'affichage
+            # Redessiner seulement après une entrée de l'utilisateur
+            if scheduler.should_render():
+                self.screen.blit(self.background_image, (0, 0))  # Afficher l'image de fond
+
+                # Afficher le titre
+                title = text_cache.render(f"Equipe : {player_name}, choisissez vos unités", title_font, (255, 255, 255))
+                self.screen.blit(title, (1485 // 2 - title.get_width() // 2, 20))
+
+                # Afficher les unités disponibles
+                for i, unit in enumerate(all_units):
+                    x_pos = 100 + i * 270
+                    y_pos = 100
+
+                    # Afficher le nom de l'unité
+                    name_text = text_cache.render(f"{i + 1}. {unit['name']}", font, (255, 255, 255))
+                    self.screen.blit(name_text, (x_pos, y_pos))
+
+                    # Afficher l'image de l'unité
+                    unit_image = assets.get(unit['sprite'], (100, 100))
+                    self.screen.blit(unit_image, (x_pos, y_pos + 30))
+
+                    # Afficher les stats avec gestion du texte long
+                    stats_lines = self.wrap_text(unit['stats'], small_font, 250)
+                    for j, line in enumerate(stats_lines):
+                        stats_text = text_cache.render(line, small_font, (0, 0, 0))
+                        self.screen.blit(stats_text, (x_pos, y_pos + 140 + j * 20))
+
+                    # Afficher les attaques avec gestion du texte long
+                    for k, attack in enumerate(unit['attacks']):
+                        attack_lines = self.wrap_text(attack, small_font, 250)
+                        for l, line in enumerate(attack_lines):
+                            attack_text = text_cache.render(line, small_font, (0, 0, 0))
+                            self.screen.blit(attack_text, (x_pos, y_pos + 160 + len(stats_lines) * 20 + k * 40 + l * 20))
+
+                # Afficher le nombre d'unités déjà sélectionnées
+                selected_title = text_cache.render(f"Unités sélectionnées : {len(selected_units)}/3", title_font, (255, 255, 255))
+                self.screen.blit(selected_title, (1485 // 2 - selected_title.get_width() // 2, 600))
+
+                pygame.display.flip()  # Mettre à jour l'affichage
 
             # Gestion des événements utilisateur
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     exit()
 
                 if event.type == pygame.KEYDOWN:
+                    scheduler.request_redraw()
                     # Vérifier si l'utilisateur appuie sur une touche correspondante à une unité
                     if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5]:
                         index = event.key - pygame.K_1 # Calculer l'index de l'unité sélectionnée
@@ -190,9 +248,9 @@ class Game:
                         if index < len(all_units) and all_units[index]['class'] not in [unit.__class__ for unit in selected_units]:
                             unit_class = all_units[index]['class']
                             # Ajouter l'unité sélectionnée à la liste
-                            selected_units.append(unit_class(0, 0, player_name, grid))
+                            selected_units.append(unit_class(0, 0, player_name, self.terrain))
 
-            clock.tick(30) # 30 FPS
+            scheduler.tick() # 30 FPS au maximum
 
         return selected_units # Retourner la liste des unités sélectionnées
     
@@ -213,26 +271,7 @@ class Game:
         lines : list[str]
             Liste des lignes découpées.
         """
-        if not text:  # Vérifiez si le texte est vide ou None
-            return []
-
-        words = text.split(' ')  # Diviser le texte en mots
-        lines = []               # Initialisation 
-        current_line = ""        # Initialisation 
-
-        for word in words:
-            test_line = current_line + word + " "
-            # Vérifier si la ligne testée dépasse la largeur maximale
-            if font.size(test_line)[0] <= max_width:
-                current_line = test_line
-            else:
-                lines.append(current_line.strip()) # Ajouter la ligne actuelle à la liste
-                current_line = word + " "  # Commencer une nouvelle ligne avec le mot actuel
-
-        if current_line:
-            lines.append(current_line.strip())  # Ajouter la dernière ligne restante
-
-        return lines
+        return text_cache.wrap(text, font, max_width)  # Découpage mémorisé par texte, police et largeur
 
     def main_menu(self):
         """
@@ -241,34 +280,40 @@ class Game:
         Retourne
         -------
         menu_choice : str
-            Le choix de l'utilisateur dans le menu ("start", "instructions", "quit").
+            Le choix de l'utilisateur dans le menu ("start", "online", "instructions", "quit").
         """
         pygame.init()
-        font = pygame.font.Font(None, 74) # Police de grande taille pour les options du menu
-        clock = pygame.time.Clock()
+        font = text_cache.font(74) # Police de grande taille pour les options du menu
+        scheduler = FrameScheduler(self.fps)
 
         menu_options = ["Start", "Instructions", "Quit"]  # Options disponibles dans le menu
         selected_option = 0 # Initialisation de l'option sélectionnée
 
         while True:
-            self.screen.blit(self.background_image, (0, 0))  # Afficher l'image de fond
-
-            # Afficher les options du menu 
-            for i, option in enumerate(menu_options):
-                # Mettre en évidence l'option sélectionnée
-                color = (255, 255, 255) if i == selected_option else (100, 100, 100)
-                text = font.render(option, True, color)
-                text_rect = text.get_rect(center=(1485 // 2, 765 // 3 + i * 80))
-                self.screen.blit(text, text_rect.topleft)
-
-            pygame.display.flip() # Mettre à jour l'affichage
+            if scheduler.should_render():
+                # Afficher l'image de fond dès qu'elle est chargée (le menu est redessiné à ce moment-là)
+                if self.background.done():
+                    self.screen.blit(self.background_image, (0, 0))
+                else:
+                    self.screen.fill((0, 0, 0))
+
+                # Afficher les options du menu 
+                for i, option in enumerate(menu_options):
+                    # Mettre en évidence l'option sélectionnée
+                    color = (255, 255, 255) if i == selected_option else (100, 100, 100)
+                    text = text_cache.render(option, font, color)
+                    text_rect = text.get_rect(center=(1485 // 2, 765 // 3 + i * 80))
+                    self.screen.blit(text, text_rect.topleft)
+
+                pygame.display.flip() # Mettre à jour l'affichage
             
             # Gestion des événements utilisateur
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     exit()
                 elif event.type == pygame.KEYDOWN:
+                    scheduler.request_redraw()
                     if event.key == pygame.K_UP:
                         # Déplacer la sélection vers le haut
                         selected_option = (selected_option - 1) % len(menu_options)
@@ -277,19 +322,18 @@ class Game:
                         selected_option = (selected_option + 1) % len(menu_options)
                     elif event.key == pygame.K_RETURN:
                         # Sélectionner l'option choisie
-                        if selected_option == 0:  # Start
+                        if selected_option == 0 and self.server is not None:  # Start, en ligne
+                            if not self.spectate:
+                                self.composition = [unit.__class__ for unit in self.select_units('player')]
+                            return "online"
+                        elif selected_option == 0:  # Start
                             # Sélection des unités (le joueur et l'ennemi)
                             self.player_units = self.select_units('player')
                             self.enemy_units = self.select_units('enemy')
 
-                            # Positionner les unités sélectionnées sur la grille (le joueur et l'ennemi)
-                            self.player_units[0].x, self.player_units[0].y = 0, 0
-                            self.player_units[1].x, self.player_units[1].y = 1, 0
-                            self.player_units[2].x, self.player_units[2].y = 0, 1
-
-                            self.enemy_units[0].x, self.enemy_units[0].y = 16, 16
-                            self.enemy_units[1].x, self.enemy_units[1].y = 16, 15
-                            self.enemy_units[2].x, self.enemy_units[2].y = 15, 16
+                            # Positionner les unités sélectionnées sur la grille (positions de départ de la carte)
+                            self.place_units(self.player_units, 'player')
+                            self.place_units(self.enemy_units, 'enemy')
 
                             return "start" # Retourner "start" pour lancer le jeu
                         elif selected_option == 1:  # Instructions
@@ -298,14 +342,19 @@ class Game:
                             pygame.quit()
                             exit()
 
-            clock.tick(30)
+            scheduler.tick()
+
+    def place_units(self, units, team):
+        """Place les unités d'une équipe sur les positions de départ de la carte."""
+        for unit, (x, y) in zip(units, self.game_map.spawn_cells(team)):
+            unit.x, unit.y = x, y
 
     def show_instructions(self):
         """
         Affiche les instructions du jeu et attend que l'utilisateur appuie sur ESC pour revenir au menu.
         """
-        font = pygame.font.Font(None, 30) # Police de taille 30 
-        clock = pygame.time.Clock()
+        font = text_cache.font(30) # Police de taille 30 
+        scheduler = FrameScheduler(self.fps)
         instructions = [
             "Bienvenue dans notre jeu!",
             " ",
@@ -323,34 +372,45 @@ class Game:
         ]
 
         while True:
-            self.screen.blit(self.background_image, (0, 0))  # Afficher l'image de fond
+            if scheduler.should_render():
+                self.screen.blit(self.background_image, (0, 0))  # Afficher l'image de fond
 
-            # Calculer le point de départ vertical pour centrer toutes les lignes
-            total_text_height = len(instructions) * 40  # Hauteur totale du texte (40 pixels par ligne)
-            start_y = (765 - total_text_height) // 2  # Centrer verticalement dans l'écran de hauteur 765
+                # Calculer le point de départ vertical pour centrer toutes les lignes
+                total_text_height = len(instructions) * 40  # Hauteur totale du texte (40 pixels par ligne)
+                start_y = (765 - total_text_height) // 2  # Centrer verticalement dans l'écran de hauteur 765
 
-            # Afficher chaque ligne d'instruction
-            for i, line in enumerate(instructions):
-                text = font.render(line, True, (255, 255, 255))
-                text_rect = text.get_rect(center=(1485 // 2, start_y + i * 40))  # Centrer horizontalement et ajuster verticalement
-                self.screen.blit(text, text_rect.topleft)
+                # Afficher chaque ligne d'instruction
+                for i, line in enumerate(instructions):
+                    text = text_cache.render(line, font, (255, 255, 255))
+                    text_rect = text.get_rect(center=(1485 // 2, start_y + i * 40))  # Centrer horizontalement et ajuster verticalement
+                    self.screen.blit(text, text_rect.topleft)
 
-            pygame.display.flip() # Mettre à jour l'affichage
+                pygame.display.flip() # Mettre à jour l'affichage
 
             # Gestion des événements utilisateur
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     exit()
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     return # Retourner au menu principal
 
-            clock.tick(30)
+            scheduler.tick()
 
     def start_game(self):
         """
         Démarre la boucle principale du jeu où les tours sont gérés.
         """
+        self.state = GameState(self.terrain, self.player_units, self.enemy_units,
+                               seed=random.randrange(2 ** 32))  # Etat de la partie (règles), avec un générateur aléatoire reproductible
+        self.renderer.invalidate()  # L'écran contient encore le menu : tout redessiner
+
+        # Enregistrer toutes les actions pour pouvoir rejouer la partie (replay.py)
+        if self.log_dir is not None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            log_path = os.path.join(self.log_dir, time.strftime("partie_%Y%m%d_%H%M%S.glog"))
+            self.recorder = ActionRecorder(log_path, self.state, self.map_path)
+
         while True:
             # Vérifier les conditions de victoire
             if not self.player_units:
@@ -368,240 +428,324 @@ class Game:
             self.handle_player_turn() # Gérer le tour du joueur
             self.handle_enemy_turn() # Gérer le tour de l'ennemi
 
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.ai_thread is not None:
+            self.ai_thread.shutdown()
+
     def handle_player_turn(self):
         """Tour du joueur"""
-        for selected_unit in self.player_units:
-
-            # Tant que l'unité n'a pas terminé son tour
-            selected_unit.is_selected = True
-            self.flip_display()
-                
-            selected_attack_type = None # Variable qui mémorise le type d'attaque choisi
-            has_validated_position = False
-            has_attacked = False
-            remaining_moves = selected_unit.movement_speed # Nombre de déplacements restants
-            movable_cells = selected_unit.get_movable_cells()  # Cases où l'unité peut se déplacer
+        self.handle_turn('player')
 
-            # Boucle pour gérer les déplacements de l'unité
-            while remaining_moves > 0:
+    def handle_enemy_turn(self):
+        """Tour de l'ennemi, géré de manière similaire au tour du joueur."""
+        self.handle_turn('enemy')
 
-                
-                self.flip_display(movable_cells=movable_cells)  # Affiche les cases atteignables
+    def handle_turn(self, team):
+        """
+        Gère le tour d'une équipe : traduit les touches du clavier en actions
+        appliquées par le moteur de règles, unité par unité. Si l'équipe est
+        jouée par l'IA, ses actions sont choisies en arrière-plan (la fenêtre
+        reste réactive pendant la recherche) puis appliquées une à une, avec un
+        délai pour que le joueur puisse les suivre.
 
-                for event in pygame.event.get():
+        Paramètres
+        ----------
+        team : str
+            L'équipe qui joue ('player' ou 'enemy').
+        """
+        state = self.state
+        scheduler = FrameScheduler(self.fps)  # N'affiche que si l'état a changé
+        controller = self.controllers.get(team)
+        current_unit = None
+        followed = None  # Dernière position suivie par la caméra
+        plan = []  # Actions choisies par l'IA pour l'unité courante
+        thinking = None  # Choix de l'IA en cours (Future), vérifié à chaque image
+
+        while state.winner is None and state.team == team:
+            selected_unit = state.active_unit
+
+            # Nouvelle unité : calculer les cases où elle peut se déplacer
+            if selected_unit is not current_unit:
+                current_unit = selected_unit
+                selected_unit.is_selected = True
+                movable_cells = state.reach.reachable_cells()  # Champ de distances calculé au début du tour
+                scheduler.request_redraw()
+                if controller is not None:
+                    plan = []
+                    thinking = self.plan_async(controller, state)  # L'IA choisit tout le tour de l'unité
+
+            # La caméra suit l'unité sélectionnée quand elle change ou se déplace
+            if (selected_unit.x, selected_unit.y) != followed:
+                followed = (selected_unit.x, selected_unit.y)
+                self.renderer.camera.follow(*followed)
+
+            if scheduler.should_render():
+                if state.phase == MOVE_PHASE:
+                    self.flip_display(movable_cells=movable_cells)  # Affiche les cases atteignables
+                else:
+                    # Obtenir les cases attaquables pour les attaques normales et spéciales
+                    normal_cells = selected_unit.get_attackable_cells(attack_type=0)
+                    special_cells = selected_unit.get_attackable_cells(attack_type=1)
+                    self.flip_display(normal_cells, special_cells, unit_team=team)  # Afficher les portées des attaques
+
+            # Tour de l'IA : récupérer le plan une fois choisi, puis jouer l'action suivante une fois le délai écoulé
+            if thinking is not None:
+                if thinking.done():
+                    plan = thinking.result()
+                    thinking = None
+                    scheduler.animate(AI_STEP_DELAY)
+            elif controller is not None and not scheduler.is_animating():
+                action = plan.pop(0) if plan else None
+                events = apply_action(state, action) if action is not None else []
+                self.record_action(action, events)
+                self.report_events(events)
+                if events:
+                    scheduler.animate(AI_STEP_DELAY)
+                else:
+                    thinking = self.plan_async(controller, state)  # Plan invalide : choisir à nouveau
+                if state.active_unit is not selected_unit:
+                    selected_unit.is_selected = False  # Désélectionner l'unité
+
+            events = scheduler.wait_events()  # Attente hors mesure
+            with profiler.span("input"):
+                for event in events:
+                    if self.handle_view_event(event, scheduler):
+                        continue
 
-                    # Gestion de la fermeture de la fenêtre
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        exit()
-                    
                     # Gestion des touches du clavier
                     if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_e:  # Touche 'E' pour quitter le jeu
+                        if event.key == pygame.K_e and state.phase == MOVE_PHASE:  # Touche 'E' pour quitter le jeu
                             pygame.quit()
                             exit()
-                                                        
-                        # Déplacement avec les touches fléchées
-                        dx, dy = 0, 0
-                        if event.key == pygame.K_LEFT:
-                            dx = -1
-                        elif event.key == pygame.K_RIGHT:
-                            dx = 1
-                        elif event.key == pygame.K_UP:
-                            dy = -1
-                        elif event.key == pygame.K_DOWN:
-                            dy = 1
-
-                        # Déplacer l'unité si une direction est pressée    
-                        if dx != 0 or dy != 0:
-                            selected_unit.move(dx, dy)
-                            remaining_moves -= 1
-                            print(f"Déplacements restants : {remaining_moves}")
-
-                        if event.key == pygame.K_SPACE:
-                            remaining_moves = 0    # Valider la position actuelle
-                        
-                      
-                        self.flip_display()
-                        
-                        # Valider la position avec "Espace"
-                        if event.key == pygame.K_SPACE:
-                            has_validated_position = True
-                            break # Sortir de la boucle de déplacement
-
-            # Une fois la position validée, afficher les cases attaquables
-            attackable_cells = selected_unit.get_attackable_cells()
-            while not has_attacked:
-                self.flip_display()
-
-               # Obtenir les cases attaquables pour les attaques normales et spécialess
-                normal_cells = selected_unit.get_attackable_cells(attack_type=0)
-                special_cells = selected_unit.get_attackable_cells(attack_type=1)
-                 
-                # Afficher les portées des attaques
-                self.flip_display(normal_cells, special_cells, unit_team='player')
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        exit()
-                        
-                    if event.type == pygame.KEYDOWN:
-                   
-                        if event.key == pygame.K_1:  # Attaque normale
-                            self.execute_attack(selected_unit, normal_cells,self.enemy_units, attack_type=0)
-                            has_attacked = True
-                        elif event.key == pygame.K_2:  # Attaque spéciale
-                            self.execute_attack(selected_unit, special_cells,self.enemy_units, attack_type=1)
-                            has_attacked = True
-
-                        if event.key == pygame.K_SPACE and selected_attack_type is not None:
-                            for enemy in self.enemy_units:
-                                if (enemy.x, enemy.y) in attackable_cells:  # Attaquer seulement si l'ennemi est sur une case attaquable
-                                    selected_unit.attack(enemy, selected_attack_type)
-                                    if enemy.health <= 0:
-                                        self.enemy_units.remove(enemy)
-                                    has_attacked = True
-                                    break
-
-                            if not has_attacked:
-                                print("Aucun ennemi n'est sur une case attaquable.")
-
-                        if event.key == pygame.K_s:  # Passer le tour
-                            has_attacked = True
-                            selected_unit.is_selected = False
-                            print("Tour du joueur passé.")
-                            break
-                            selected_unit.is_selected = False
-                            
-                            
-                        if event.key == pygame.K_l:  # Touche 'L' pour se soigner
-                            if isinstance(selected_unit, Wizard):  # Vérifie si l'unité est un Wizard
-                                if selected_unit.health < selected_unit.max_health:  # Vérifie que la santé n'est pas déjà au maximum
-                                    selected_unit.heal()  # Appelle la méthode de soin
-                                    print(f"{selected_unit.__class__.__name__} régénère 4 PV. Santé actuelle : {selected_unit.health}")
-                                    has_attacked = True  # Terminer le tour après guérison
-                                    selected_unit.is_selected = False
-            
-            selected_unit.is_selected = False  # Désélectionner l'unité
-                                            
-    def handle_enemy_turn(self):
-         #Gère le tour de l'ennemi de manière similaire au tour du joueur.
-         
-        for selected_unit in self.enemy_units:
 
-            # Tant que l'unité n'a pas terminé son tour
-            selected_unit.is_selected = True
-            self.flip_display()
-            
-            selected_attack_type = None # Variable qui mémorise le type d'attaque choisi
-            has_validated_position = False
-            has_attacked = False
-            remaining_moves = selected_unit.movement_speed
-            movable_cells = selected_unit.get_movable_cells()
-            
-            #while not has_validated_position:
-            while remaining_moves > 0:   
-                
-                self.flip_display(movable_cells=movable_cells)  # Affiche les cases atteignables
+                        action = self.action_for_key(event.key, state.phase)
+                        if action is None or controller is not None:  # Pas de touches pendant le tour de l'IA
+                            continue
 
+                        events = apply_action(state, action)
+                        self.record_action(action, events)
+                        self.report_events(events)
+                        if events:
+                            scheduler.request_redraw()
 
-                for event in pygame.event.get():
-                    # Gestion de la fermeture de la fenêtre
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        exit()
-                        
-                    # Gestion des touches du clavier
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_e:  # Touche 'E' pour quitter le jeu
-                            pygame.quit()
-                            exit()
-                    
-                        # Déplacement (touches fléchées)
-                        dx, dy = 0, 0
-                        if event.key == pygame.K_LEFT:
-                            dx = -1
-                        elif event.key == pygame.K_RIGHT:
-                            dx = 1
-                        elif event.key == pygame.K_UP:
-                            dy = -1
-                        elif event.key == pygame.K_DOWN:
-                            dy = 1
-                        
-                        # Déplace l'unité et réduit le nombre de déplacements restants
-                        if dx != 0 or dy != 0:
-                            selected_unit.move(dx, dy)
-                            remaining_moves -= 1
-                            print(f"Déplacements restants : {remaining_moves}")
-                        
-                        if event.key == pygame.K_SPACE:
-                            remaining_moves = 0    
-                        
-                        #selected_unit.move(dx, dy)
-                        self.flip_display()
-                        
-                        # Valider la position avec "Espace"
-                        if event.key == pygame.K_SPACE:
-                            has_validated_position = True
+                        # Fin du tour de l'unité : passer à la suivante
+                        if state.active_unit is not selected_unit:
+                            selected_unit.is_selected = False  # Désélectionner l'unité
                             break
 
-            # Une fois la position validée, afficher les cases attaquables
-            attackable_cells = selected_unit.get_attackable_cells()
-            
-            while not has_attacked:
-                self.flip_display()
-                
-                # Obtenez les cases attaquables
-                normal_cells = selected_unit.get_attackable_cells(attack_type=0)
-                special_cells = selected_unit.get_attackable_cells(attack_type=1)
-                 
-                # Affichez les portées
-                self.flip_display(normal_cells, special_cells, unit_team='enemy')
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()
-                        exit()
-                                            
-                    if event.type == pygame.KEYDOWN:
-            
-                        if event.key == pygame.K_1:  # Attaque normale
-                            self.execute_attack(selected_unit, normal_cells,self.player_units, attack_type=0)
-                            has_attacked = True
-                        elif event.key == pygame.K_2:  # Attaque spéciale
-                            self.execute_attack(selected_unit, special_cells,self.player_units, attack_type=1)
-                            has_attacked = True
-
-                        if event.key == pygame.K_SPACE and selected_attack_type is not None:
-                            for player in self.player_units:
-                                if (player.x, player.y) in attackable_cells:  # Attaquer seulement si player_1 est sur une case attaquable
-                                    selected_unit.attack(player, selected_attack_type)
-                                    if player.health <= 0:
-                                        self.player_units.remove(player)
-                                    has_attacked = True
-                                    break
-
-                            if not has_attacked:
-                                print("Aucun ennemi n'est sur une case attaquable.")
-
-                        if event.key == pygame.K_s:  # Passer le tour
-                            has_attacked = True
-                            selected_unit.is_selected = False
-                            print("Tour du joueur passé.")
-                            break
-                            selected_unit.is_selected = False
-                            
-                            
-                        if event.key == pygame.K_l:  # Touche 'L' pour se soigner
-                            if isinstance(selected_unit, Wizard):  # Vérifie si l'unité est un Wizard
-                                if selected_unit.health < selected_unit.max_health:  # Vérifie que la santé n'est pas déjà au maximum
-                                    selected_unit.heal()  # Appelle la méthode de soin
-                                    print(f"{selected_unit.__class__.__name__} régénère 4 PV. Santé actuelle : {selected_unit.health}")
-                                    has_attacked = True  # Terminer le tour après guérison
-                                    selected_unit.is_selected = False
-                                                         
-            selected_unit.is_selected = False
+            scheduler.tick()
+
+    def plan_async(self, controller, state):
+        """
+        Lance le choix des actions de l'unité active par l'IA sur le thread de réflexion.
+
+        La recherche porte sur une copie de l'état : la boucle d'affichage
+        continue de traiter les événements pendant ce temps, et AI_PLAN_READY
+        la réveille quand le plan est prêt.
+
+        Retourne
+        -------
+        future : concurrent.futures.Future
+            Les actions choisies (`done()` sans attendre, `result()` une fois terminé).
+        """
+        if self.ai_thread is None:
+            self.ai_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
+        future = self.ai_thread.submit(controller.choose_actions, state.clone())
+        future.add_done_callback(notify_plan_ready)
+        return future
+
+    def handle_view_event(self, event, scheduler):
+        """
+        Gère les événements communs aux boucles de partie : fermeture de la fenêtre,
+        réaffichage, défilement de la carte et touches F3 (mesures) et F4 (zones dangereuses).
+
+        Retourne
+        -------
+        handled : bool
+            True si l'événement a été traité (il ne correspond alors à aucune action).
+        """
+        # Gestion de la fermeture de la fenêtre
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            exit()
+
+        # La fenêtre a été recouverte : tout redessiner
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            self.renderer.invalidate()
+
+        # Molette de la souris : faire défiler la carte
+        if event.type == pygame.MOUSEWHEEL:
+            if self.renderer.camera.scroll(event.x, -event.y):
+                scheduler.request_redraw()
+            return True
+
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F3:  # Touche 'F3' pour afficher ou masquer les mesures
+                profiler.toggle()
+                self.renderer.invalidate()
+                scheduler.request_redraw()
+                return True
+
+            if event.key == pygame.K_F4:  # Touche 'F4' pour afficher ou masquer les zones dangereuses
+                self.show_danger = not self.show_danger
+                scheduler.request_redraw()
+                return True
+        return False
+
+    def start_online(self):
+        """
+        Joue une partie en ligne en client léger.
+
+        Le serveur (server.py) applique les règles : les touches de l'équipe
+        locale sont envoyées comme actions pendant son tour, et l'écran affiche
+        l'état reçu après chaque action des deux joueurs. Un spectateur voit
+        toute la carte et n'envoie aucune action.
+        """
+        host, port, match_name = self.server
+        try:
+            remote = RemoteMatch(host, port, match_name, None if self.spectate else self.composition, self.terrain)
+        except OSError as error:
+            print(f"Impossible de se connecter à {host}:{port} : {error}")
+            return
+        scheduler = FrameScheduler(self.fps)
+        followed = None  # Dernière position suivie par la caméra
+        if self.spectate:
+            self.fog = None
+            print(f"Connecté à {host}:{port}, partie '{match_name}' : en attente de la partie")
+        else:
+            print(f"Connecté à {host}:{port}, partie '{match_name}' : en attente d'un adversaire")
+
+        while True:
+            events = scheduler.wait_events()  # Attente hors mesure
+            with profiler.span("input"):
+                state = remote.state
+                for event in events:
+                    if self.handle_view_event(event, scheduler):
+                        continue
+
+                    # Touches de l'équipe locale, seulement pendant son tour
+                    if event.type == pygame.KEYDOWN and state is not None and state.winner is None \
+                            and state.team == remote.team:
+                        action = self.action_for_key(event.key, state.phase)
+                        if action is not None and is_legal(state, action):  # Vérifiée aussi par le serveur
+                            remote.send_action(action)
+
+                # Messages du serveur (le thread de lecture poste NETWORK_MESSAGE pour réveiller la boucle)
+                for message in remote.poll():
+                    if message[0] == "welcome":
+                        if message[1] is None:
+                            print("Partie commencée : vous êtes spectateur")
+                        else:
+                            print(f"Partie commencée : vous jouez l'équipe '{message[1]}'")
+                        self.local_team = message[1]
+                        self.state = remote.state
+                        self.player_units = remote.state.player_units  # Listes mises à jour par le client
+                        self.enemy_units = remote.state.enemy_units
+                        self.renderer.invalidate()
+                    elif message[0] == "rejected":
+                        print(f"Refusé par le serveur : {message[1]}")
+                    elif message[0] == "closed":
+                        print("Connexion au serveur perdue")
+                        remote.close()
+                        return
+                    scheduler.request_redraw()
+
+            state = remote.state
+            if state is None:
+                if scheduler.should_render():
+                    self.draw_waiting_screen(match_name)
+                scheduler.tick()
+                continue
+
+            # Unité active sélectionnée, suivie par la caméra
+            selected_unit = state.active_unit
+            for unit in state.player_units + state.enemy_units:
+                unit.is_selected = unit is selected_unit
+            if selected_unit is not None and (selected_unit.x, selected_unit.y) != followed:
+                followed = (selected_unit.x, selected_unit.y)
+                self.renderer.camera.follow(*followed)
+
+            if scheduler.should_render():
+                if selected_unit is None or state.team != remote.team:
+                    self.flip_display()  # Tour de l'adversaire ou fin de partie
+                elif state.phase == MOVE_PHASE:
+                    self.flip_display(movable_cells=state.reach.reachable_cells())
+                else:
+                    normal_cells = selected_unit.get_attackable_cells(attack_type=0)
+                    special_cells = selected_unit.get_attackable_cells(attack_type=1)
+                    self.flip_display(normal_cells, special_cells, unit_team=state.team)
+
+            if state.winner is not None:
+                if remote.team is None:
+                    print(f"L'équipe '{state.winner}' a gagné !")
+                else:
+                    print("Vous avez gagné !" if state.winner == remote.team else "Vous avez perdu.")
+                remote.close()
+                return
+            scheduler.tick()
+
+    def draw_waiting_screen(self, match_name):
+        """Affiche l'attente d'un adversaire avant le début d'une partie en ligne."""
+        self.screen.fill((0, 0, 0))
+        text = text_cache.render(f"Partie '{match_name}' : en attente d'un adversaire...", text_cache.font(50), WHITE)
+        self.screen.blit(text, text.get_rect(center=self.screen.get_rect().center).topleft)
+        pygame.display.flip()
+
+    def record_action(self, action, events):
+        """Ajoute une action appliquée au journal de la partie (les actions refusées sont ignorées)."""
+        if self.recorder is not None:
+            self.recorder.record(action, events)
+
+    def action_for_key(self, key, phase):
+        """
+        Traduit une touche du clavier en action pour le moteur de règles.
+
+        Paramètres
+        ----------
+        key : int
+            La touche pressée.
+        phase : str
+            La phase du tour de l'unité active (MOVE_PHASE ou ACTION_PHASE).
+
+        Retourne
+        -------
+        action : tuple or None
+            L'action correspondante, ou None si la touche n'a pas d'effet.
+        """
+        if phase == MOVE_PHASE:
+            # Déplacement avec les touches fléchées, validation avec "Espace"
+            if key == pygame.K_LEFT:
+                return move_action(-1, 0)
+            elif key == pygame.K_RIGHT:
+                return move_action(1, 0)
+            elif key == pygame.K_UP:
+                return move_action(0, -1)
+            elif key == pygame.K_DOWN:
+                return move_action(0, 1)
+            elif key == pygame.K_SPACE:
+                return VALIDATE_ACTION
+        else:
+            if key == pygame.K_1:  # Attaque normale
+                return attack_action(0)
+            elif key == pygame.K_2:  # Attaque spéciale
+                return attack_action(1)
+            elif key == pygame.K_s:  # Passer le tour
+                return SKIP_ACTION
+            elif key == pygame.K_l:  # Touche 'L' pour se soigner
+                return HEAL_ACTION
+        return None
+
+    def report_events(self, events):
+        """Affiche dans la console les messages associés aux événements de jeu."""
+        for event in events:
+            if event[0] == "move":
+                print(f"Déplacements restants : {self.state.remaining_moves}")
+            elif event[0] == "skip":
+                print("Tour du joueur passé.")
+            elif event[0] == "heal":
+                unit = event[1]
+                print(f"{unit.__class__.__name__} régénère 4 PV. Santé actuelle : {unit.health}")
 
     def execute_attack(self, unit, attackable_cells, target_units, attack_type):
         """
@@ -618,11 +762,7 @@ class Game:
         attack_type : int
             Type d'attaque (0 pour normale, 1 pour spéciale).
         """
-        for target in target_units:
-            if (target.x, target.y) in attackable_cells:
-                unit.attack(target, attack_type) # Effectuer l'attaque
-                if target.health <= 0:
-                    target_units.remove(target)  # Retirer l'unité si sa santé est épuisée
+        resolve_attack(unit, attackable_cells, target_units, attack_type)
     
     def flip_display(self, normal_cells=None, special_cells=None, movable_cells=None, unit_team=None):
         """
@@ -640,138 +780,293 @@ class Game:
             Équipe de l'unité ('player' ou 'enemy') pour déterminer les couleurs des attaques.
         """
 
-        # Affiche la grille
-        self.screen.fill(BLACK)
-        for x in range(0, WIDTH, CELL_SIZE):
-            for y in range(0, HEIGHT, CELL_SIZE):
-                rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(self.screen, WHITE, rect, 1)
-
-        # Affiche les unités
-        self.screen.blit(grid_image, (0, 0))  # Afficher l'image de la grille
-        for unit in self.player_units + self.enemy_units:
-            unit.draw(self.screen)
-                    
-        # Définir les couleurs en fonction de l'équipe
-        normal_color = (0, 0, 255, 120) if unit_team == 'player' else (255, 0, 0, 120)  # Bleu ou Rouge
-        special_color = (0, 0, 255, 130) if unit_team == 'player' else (255, 0, 0, 130)  # Teintes plus sombres
-
-        # Affiche les cases atteignables pour les déplacements
-        if movable_cells:
-            for x, y in movable_cells:
-                overlay = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                overlay.fill((0, 255, 0, 100))  # Vert pour les déplacements
-                self.screen.blit(overlay, (x * TILE_SIZE, y * TILE_SIZE))
-            
-        # Affiche les cases attaquables pour attaque normale
-        if normal_cells:
-            for x, y in normal_cells:
-                overlay = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                overlay.fill(normal_color)  # Claire pour attaque normale 
-                self.screen.blit(overlay, (x * TILE_SIZE, y * TILE_SIZE))
-
-        # Affiche les cases attaquables pour attaque spéciale
-        if special_cells:
-            for x, y in special_cells:
-                overlay = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                overlay.fill(special_color)  # Foncée pour attaque spéciale
-                self.screen.blit(overlay, (x * TILE_SIZE, y * TILE_SIZE))
-               
-        # Affiche le panneau d'information (partie noire à droite)
-        panel_rect = pygame.Rect(SCREEN_WIDTH, 0, 16 * TILE_SIZE, SCREEN_HEIGHT)
-        pygame.draw.rect(self.screen, (30, 30, 30), panel_rect)  # Fond du panneau en gris foncé
-   
+        # Définir les couleurs en fonction de l'équipe (bleu ou rouge)
+        normal_color, special_color = ATTACK_HIGHLIGHTS['player' if unit_team == 'player' else 'enemy']
+
+        # Couleurs à superposer sur chaque case en surbrillance, dans l'ordre d'affichage
+        overlays = {}
+        for cells, color in ((movable_cells, MOVE_HIGHLIGHT),  # Vert pour les déplacements
+                             (normal_cells, normal_color),     # Claire pour attaque normale
+                             (special_cells, special_color)):  # Foncée pour attaque spéciale
+            for cell in cells or ():
+                overlays[cell] = overlays.get(cell, ()) + (color,)
+
+        with profiler.span("frame"):
+            # Redessine uniquement les cases modifiées (unités et surbrillances)
+            units = self.player_units + self.enemy_units
+            fog = None
+            if self.fog is not None:
+                fog = self.fog[self.viewer_team()]
+                units = self.apply_fog(fog, units)
+            selected = next((unit for unit in units if unit.is_selected), None)
+            if self.show_danger:
+                self.add_danger(overlays, units, selected)
+            rects = self.renderer.draw_board(units, overlays, fog)
+
+            # Affiche le panneau d'information (partie noire à droite) s'il a changé
+            panel_key = self.info_panel_key(selected)
+            rects += self.renderer.draw_panel(panel_key, self.panel_rect, lambda: self.draw_info_panel(selected))
+
+            # Mesures du profileur (touche F3)
+            if profiler.enabled:
+                rects.append(self.draw_hud())
+
+            self.renderer.present(rects) # Rafraîchit uniquement les zones modifiées de l'écran
+        profiler.frame()
+
+    def viewer_team(self):
+        """L'équipe dont le brouillard est affiché : la seule équipe jouée au clavier, sinon l'équipe qui joue."""
+        if self.local_team is not None:
+            return self.local_team
+        humans = [team for team in ('player', 'enemy') if team not in self.controllers]
+        if len(humans) == 1 or self.state is None:
+            return humans[0] if humans else 'player'
+        return self.state.team
+
+    def apply_fog(self, fog, units):
+        """
+        Met à jour le brouillard d'une équipe (seules ses unités déplacées sont recalculées).
+
+        Paramètres
+        ----------
+        fog : TeamFog
+            Le brouillard de l'équipe qui regarde l'écran.
+        units : list[Unit]
+            Les unités des deux équipes.
+
+        Retourne
+        -------
+        units : list[Unit]
+            Les unités à afficher : celles de l'équipe et les unités adverses en vue.
+        """
+        team = fog.team
+        fog.update([unit for unit in units if unit.team == team])
+        return [unit for unit in units if unit.team == team or fog.is_visible(unit.x, unit.y)]
+
+    def add_danger(self, overlays, units, selected):
+        """
+        Ajoute les zones dangereuses de l'équipe qui regarde l'écran sous les surbrillances.
+
+        Les dégâts sont ceux que subirait l'unité sélectionnée (sinon l'unité de
+        l'équipe la moins défendue) si toutes les unités adverses affichées
+        attaquaient depuis leur position actuelle.
+
+        Paramètres
+        ----------
+        overlays : dict[tuple, tuple]
+            Les couleurs à superposer sur chaque case (modifié en place).
+        units : list[Unit]
+            Les unités affichées (unités adverses hors de vue exclues).
+        selected : Unit or None
+            L'unité sélectionnée.
+        """
+        team = self.viewer_team()
+        other = 'enemy' if team == 'player' else 'player'
+        own = [unit for unit in units if unit.team == team]
+        if not own:
+            return
+        target = selected if selected in own else min(own, key=lambda unit: unit.defense)
+        threats = self.threats[other]
+        threats.update([unit for unit in units if unit.team == other])
+
+        # Couleur de chaque case menacée, recalculée seulement si les menaces ou la cible changent
+        key = (other, threats.version, target.defense, target.health)
+        if key != self.danger_key:
+            self.danger_cells = {}
+            for cell, damage in threats.threatened_cells(target.defense).items():
+                level = 2 if damage >= target.health else 1 if 3 * damage >= target.health else 0
+                self.danger_cells[cell] = DANGER_HIGHLIGHTS[level]
+            self.danger_key = key
+        for cell, color in self.danger_cells.items():
+            overlays[cell] = (color,) + overlays.get(cell, ())
+
+    def draw_hud(self):
+        """
+        Affiche les images par seconde et la durée de chaque étape en bas du panneau d'information.
+
+        Retourne
+        -------
+        rect : pygame.Rect
+            Le rectangle de l'écran qui a été modifié.
+        """
+        font = text_cache.font(20)
+        lines = profiler.hud_lines()
+        height = 20 * len(lines) + 10
+        rect = pygame.Rect(self.panel_rect.x, self.panel_rect.bottom - height, self.panel_rect.width, height)
+        self.screen.fill((30, 30, 30), rect)  # Même fond que le panneau
+        for i, line in enumerate(lines):
+            # Rendu direct : les valeurs changent à chaque image, inutile de les mettre en cache
+            self.screen.blit(font.render(line, True, GREEN), (rect.x + 10, rect.y + 5 + i * 20))
+        return rect
+
+    def info_panel_key(self, unit):
+        """
+        Retourne ce dont dépend le panneau d'information : la classe de l'unité
+        et ses valeurs dynamiques (attaques et défense).
+        """
+        if unit is None:
+            return (None,)
+        attacks = tuple((attack.name, attack.power, attack.range) for attack in unit.attack_types)
+        return (unit.__class__, unit.defense, attacks)
+
+    def draw_info_panel(self, unit):
+        """
+        Dessine le panneau d'information de l'unité sélectionnée.
+
+        Le panneau est composé une seule fois par classe d'unité, puis recomposé
+        seulement si ses valeurs dynamiques (attaques, défense) changent.
+
+        Paramètres
+        ----------
+        unit : Unit or None
+            L'unité sélectionnée (panneau vide si None).
+        """
+        key = self.info_panel_key(unit)
+        panel = self.panel_cache.get(key)
+        if panel is None:
+            panel = self.compose_info_panel(unit)
+            self.panel_cache[key] = panel
+        self.screen.blit(panel, self.panel_rect)
+
+    def compose_info_panel(self, unit):
+        """
+        Compose le panneau d'information d'une unité sur une surface.
+
+        Paramètres
+        ----------
+        unit : Unit or None
+            L'unité sélectionnée (panneau vide si None).
+
+        Retourne
+        -------
+        panel : pygame.Surface
+            Le panneau composé.
+        """
+        panel = pygame.Surface(self.panel_rect.size)
+        panel.fill((30, 30, 30))  # Fond du panneau en gris foncé
+        if unit is None:
+            return panel
+
+        font = text_cache.font(24)
+        y_offset = 20  # Distance verticale de départ dans le panneau
+        title_text = text_cache.render(f"Unit: {unit.__class__.__name__}", font, YELLOW)
+        panel.blit(title_text, (10, y_offset))
+        y_offset += 40
         
-        # Si une unité est sélectionnée, affiche ses types d'attaques
-        for unit in self.player_units + self.enemy_units:
-            if unit.is_selected:
-                font = pygame.font.Font(None, 24)
-                y_offset = 20  # Distance verticale de départ dans le panneau
-                title_text = font.render(f"Unit: {unit.__class__.__name__}", True, YELLOW)
-                self.screen.blit(title_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 40
-                
-                # Affiche les instructions de chaque unité
-                directive_text = font.render("Instructions -> Valider sa position avec 'ESPACE' pour voir la portée des attaques de l'unité", True, WHITE)
-                self.screen.blit(directive_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 30
-                
-                directive2_text = font.render("Instructions -> Pensez à valider avec 'ESPACE' avant de faire quoique ce soit !", True, WHITE)
-                self.screen.blit(directive2_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 30 
-                
-                if isinstance (unit, Archer):
-                   instruction_text = font.render("Attaque normale et spéciale en direction cardinale sur 3 et 2 cases respectivement", True, WHITE)
-                   self.screen.blit(instruction_text, (SCREEN_WIDTH + 10, y_offset))
-                   y_offset += 40 
-                   
-                if isinstance (unit, Swordsman):
-                    instruction_text = font.render("Attaque normale et spéciale en direction cardinale sur 1 case", True, WHITE)
-                    self.screen.blit(instruction_text, (SCREEN_WIDTH + 10, y_offset))
-                    y_offset += 40  
-                    
-                if isinstance (unit, Wizard):
-                    instruction_text = font.render("Attaques normale et spéciale en direction dispersée", True, WHITE)
-                    self.screen.blit(instruction_text, (SCREEN_WIDTH + 10, y_offset))
-                    y_offset += 40 
-                    power_text = font.render("Pouvoir spécial -> 'L' pour regénérer +4 PV", True, GREEN)
-                    self.screen.blit(power_text, (SCREEN_WIDTH + 10, y_offset))
-                    y_offset += 40
-                    
-                if isinstance (unit, Invincible):
-                    instruction_text = font.render("Attaque normale et spéciale en direction circulaire sur 1 case", True, WHITE)
-                    self.screen.blit(instruction_text, (SCREEN_WIDTH + 10, y_offset))
-                    y_offset += 40
-                    
-                if isinstance (unit, Bomber):
-                    instruction_text = font.render("Attaque normale et spéciale sur une zone dispersée", True, WHITE)
-                    self.screen.blit(instruction_text, (SCREEN_WIDTH + 10, y_offset))
-                    y_offset += 40                
-                   
-                # Affiche les types d'attaques
-                for i, attack in enumerate(unit.attack_types):
-                    text = font.render(f"{i + 1}. {attack['name']} (Power: {attack['power']}, Range: {attack['range']})",True,WHITE)
-                    self.screen.blit(text, (SCREEN_WIDTH + 10, y_offset))
-                    y_offset += 30 
-
-                defense_text=font.render(f"Défense:  {unit.defense}",True,WHITE)
-                self.screen.blit(defense_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset+=30
-
-
-                y_offset += 10
-                directive_text = font.render("Si aucun ennemi n'est sur une case attaquable, passer son tour 'S' ", True, YELLOW)
-                self.screen.blit(directive_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 40  
-                
-                option_text = font.render("'S' pour sauter son tour et 'E' pour quitter le jeu", True, RED)
-                self.screen.blit(option_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 50
-                
-                remarque_text = font.render("Il est possible de quitter le jeu avant d'avoir valider sa position", True, RED)
-                remarque2_text = font.render("En revanche après validation de sa position, il faudra sauter son tour avant de quitter",True, RED)
-                self.screen.blit(remarque_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 30
-                self.screen.blit(remarque2_text, (SCREEN_WIDTH + 10, y_offset))
-                y_offset += 40
+        # Affiche les instructions de chaque unité
+        directive_text = text_cache.render("Instructions -> Valider sa position avec 'ESPACE' pour voir la portée des attaques de l'unité", font, WHITE)
+        panel.blit(directive_text, (10, y_offset))
+        y_offset += 30
+        
+        directive2_text = text_cache.render("Instructions -> Pensez à valider avec 'ESPACE' avant de faire quoique ce soit !", font, WHITE)
+        panel.blit(directive2_text, (10, y_offset))
+        y_offset += 30 
+        
+        if isinstance (unit, Archer):
+           instruction_text = text_cache.render("Attaque normale et spéciale en direction cardinale sur 3 et 2 cases respectivement", font, WHITE)
+           panel.blit(instruction_text, (10, y_offset))
+           y_offset += 40 
+           
+        if isinstance (unit, Swordsman):
+            instruction_text = text_cache.render("Attaque normale et spéciale en direction cardinale sur 1 case", font, WHITE)
+            panel.blit(instruction_text, (10, y_offset))
+            y_offset += 40  
+            
+        if isinstance (unit, Wizard):
+            instruction_text = text_cache.render("Attaques normale et spéciale en direction dispersée", font, WHITE)
+            panel.blit(instruction_text, (10, y_offset))
+            y_offset += 40 
+            power_text = text_cache.render("Pouvoir spécial -> 'L' pour regénérer +4 PV", font, GREEN)
+            panel.blit(power_text, (10, y_offset))
+            y_offset += 40
+            
+        if isinstance (unit, Invincible):
+            instruction_text = text_cache.render("Attaque normale et spéciale en direction circulaire sur 1 case", font, WHITE)
+            panel.blit(instruction_text, (10, y_offset))
+            y_offset += 40
+            
+        if isinstance (unit, Bomber):
+            instruction_text = text_cache.render("Attaque normale et spéciale sur une zone dispersée", font, WHITE)
+            panel.blit(instruction_text, (10, y_offset))
+            y_offset += 40                
            
+        # Affiche les types d'attaques
+        for i, attack in enumerate(unit.attack_types):
+            text = text_cache.render(f"{i + 1}. {attack.name} (Power: {attack.power}, Range: {attack.range})", font, WHITE)
+            panel.blit(text, (10, y_offset))
+            y_offset += 30 
+
+        defense_text=text_cache.render(f"Défense:  {unit.defense}", font, WHITE)
+        panel.blit(defense_text, (10, y_offset))
+        y_offset+=30
+
+
+        y_offset += 10
+        directive_text = text_cache.render("Si aucun ennemi n'est sur une case attaquable, passer son tour 'S' ", font, YELLOW)
+        panel.blit(directive_text, (10, y_offset))
+        y_offset += 40  
         
-        pygame.display.flip() # Rafraîchit l'écran
-    
+        option_text = text_cache.render("'S' pour sauter son tour et 'E' pour quitter le jeu", font, RED)
+        panel.blit(option_text, (10, y_offset))
+        y_offset += 50
+        
+        remarque_text = text_cache.render("Il est possible de quitter le jeu avant d'avoir valider sa position", font, RED)
+        remarque2_text = text_cache.render("En revanche après validation de sa position, il faudra sauter son tour avant de quitter", font, RED)
+        panel.blit(remarque_text, (10, y_offset))
+        y_offset += 30
+        panel.blit(remarque2_text, (10, y_offset))
+        y_offset += 40
+
+        return panel
+
+def notify_plan_ready(future):
+    """Poste AI_PLAN_READY pour réveiller la boucle d'affichage (appelée par le thread de réflexion)."""
+    if pygame.display.get_init():
+        try:
+            pygame.event.post(pygame.event.Event(AI_PLAN_READY))
+        except pygame.error:
+            pass  # File d'événements pleine : le plan sera lu à la prochaine image
+
+
+def play_music(path):
+    """Charge et joue la musique de fond en boucle (sur le thread de chargement)."""
+    try:
+        pygame.mixer.init()
+        pygame.mixer.music.load(path)
+        pygame.mixer.music.play(-1)  # Lecture en boucle infinie
+    except pygame.error as error:
+        print(f"Musique indisponible : {error}")
+
+
 def main():
     pygame.init()
 
-    # Charger et jouer la musique de fond
-    pygame.mixer.init()
-    pygame.mixer.music.load(r"sounds/sound_free_copyright.mp3")  # Remplacer par le chemin de votre fichier audio
-    pygame.mixer.music.play(-1)  # Lecture en boucle infinie
-
     # Instanciation de la fenêtre
     screen = pygame.display.set_mode((SCREEN_WIDTH + 16 * TILE_SIZE, SCREEN_HEIGHT))
     pygame.display.set_caption("Mon jeu avec grille PNG") # Titre de la fenêtre
 
-    # Création de l'instance du jeu
-    game = Game(screen)
+    # Charger et jouer la musique de fond en arrière-plan, pendant le menu
+    assets.submit(play_music, MUSIC_PATH)
+
+    # Création de l'instance du jeu ("--ai" : l'ennemi est joué par l'IA)
+    controllers = {'enemy': MCTSController('enemy')} if "--ai" in sys.argv else {}
+    map_path = sys.argv[sys.argv.index("--map") + 1] if "--map" in sys.argv else DEFAULT_MAP  # "--map fichier.map"
+    log_dir = None if "--no-log" in sys.argv else "logs"  # "--no-log" : ne pas enregistrer la partie
+    fog = "--no-fog" not in sys.argv  # "--no-fog" : toute la carte est visible
+
+    # "--connect hôte:port [--match nom] [--spectate]" : partie en ligne sur un serveur (server.py), ou la regarder
+    server = None
+    if "--connect" in sys.argv:
+        host, port = sys.argv[sys.argv.index("--connect") + 1].rsplit(":", 1)
+        match_name = sys.argv[sys.argv.index("--match") + 1] if "--match" in sys.argv else "partie"
+        server = (host, int(port), match_name)
+
+    # "--profile" : mesures affichées dès le départ ; "--trace fichier.json" : export des mesures à la fin
+    trace_path = sys.argv[sys.argv.index("--trace") + 1] if "--trace" in sys.argv else None
+    if "--profile" in sys.argv or trace_path is not None:
+        profiler.enabled = True
+    game = Game(screen, controllers=controllers, map_path=map_path, log_dir=log_dir, fog=fog, server=server,
+                spectate="--spectate" in sys.argv)
 
     # Affichage du menu principal
     menu_choice = game.main_menu()
@@ -779,6 +1074,14 @@ def main():
     # Lancer le jeu si l'utilisateur choisit "Start"
     if menu_choice == "start":
         game.start_game()
+    elif menu_choice == "online":
+        game.start_online()
+
+    for controller in controllers.values():
+        controller.close()
+
+    if trace_path is not None:
+        profiler.export_chrome_trace(trace_path)
 
 # Point d'entrée principal du programme
 if __name__ == "__main__":
@@ -0,0 +1,252 @@
+"""
+Fichiers de carte.
+
+Une carte est un fichier binaire (extension .map) :
+    - un en-tête : signature b"GMAP", version du format, largeur, hauteur et
+      taille des métadonnées ;
+    - les métadonnées en JSON (nom, image de fond, positions de départ) ;
+    - la section terrain : un octet par case (codes de terrain.py), ligne par
+      ligne, alignée sur 8 octets.
+
+La section terrain est projetée en mémoire (mmap) au lieu d'être lue et
+convertie. Les couches dérivées (masques de passage, cases de soin) sont
+enregistrées à côté de la carte (fichier .map.layers) et réutilisées tant que
+la carte n'a pas changé (même taille et même date de modification).
+
+Une carte peut être créée à partir d'un fichier texte, un caractère par case :
+    python maps.py carte.txt carte.map [--image grille] [--name "Ma carte"]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+from terrain import Terrain, TERRAIN_NAMES, BLOCKING_TERRAIN, PASSAGE_VERT, MUR, ARBRE, MER, HEALING_ZONE
+
+MAP_MAGIC = b"GMAP"
+MAP_VERSION = 1
+MAP_HEADER = struct.Struct("<4sHHIII")  # Signature, version, réservé, largeur, hauteur, taille des métadonnées
+
+LAYERS_MAGIC = b"GLYR"
+LAYERS_VERSION = 1
+LAYERS_HEADER = struct.Struct("<4sHHqqI")  # Signature, version, nombre de masques, taille et date de la carte, nombre de cases de soin
+
+DEFAULT_MAP = "maps/default.map"
+
+# Caractères des cartes texte
+TEXT_CODES = {".": PASSAGE_VERT, "#": MUR, "T": ARBRE, "~": MER, "+": HEALING_ZONE}
+
+
+class GameMap:
+    """
+    Classe pour représenter une carte chargée depuis un fichier.
+
+    ...
+    Attributs
+    ---------
+    path : str
+        Le chemin du fichier de la carte.
+    name : str
+        Le nom de la carte.
+    terrain : Terrain
+        Le terrain de la carte.
+    image : str or None
+        Le nom de l'image de fond dans le gestionnaire d'images (couleurs par terrain si None).
+    spawns : dict[str, list[tuple]]
+        Les positions de départ des unités de chaque équipe.
+    """
+
+    def __init__(self, path, name, terrain, image=None, spawns=None):
+        self.path = path
+        self.name = name
+        self.terrain = terrain
+        self.image = image
+        self.spawns = spawns or {}
+
+    def spawn_cells(self, team):
+        """
+        Retourne les positions de départ d'une équipe.
+
+        Sans positions de départ dans la carte, le joueur commence en haut à
+        gauche et l'ennemi en bas à droite.
+        """
+        spawns = self.spawns.get(team)
+        if spawns:
+            return spawns
+        right, bottom = self.terrain.width - 1, self.terrain.height - 1
+        if team == 'player':
+            return [(0, 0), (1, 0), (0, 1)]
+        return [(right, bottom), (right, bottom - 1), (right - 1, bottom)]
+
+
+def align(offset):
+    """Arrondit un décalage au multiple de 8 supérieur."""
+    return (offset + 7) & ~7
+
+
+def save_map(path, terrain, name=None, image=None, spawns=None):
+    """
+    Enregistre une carte.
+
+    Paramètres
+    ----------
+    path : str
+        Le chemin du fichier à écrire.
+    terrain : Terrain
+        Le terrain de la carte.
+    name : str, optional
+        Le nom de la carte (nom du fichier par défaut).
+    image : str, optional
+        Le nom de l'image de fond dans le gestionnaire d'images.
+    spawns : dict[str, list[tuple]], optional
+        Les positions de départ des unités de chaque équipe.
+    """
+    meta = {
+        "name": name or os.path.splitext(os.path.basename(path))[0],
+        "image": image,
+        "spawns": {team: [list(cell) for cell in cells] for team, cells in (spawns or {}).items()},
+    }
+    meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    header = MAP_HEADER.pack(MAP_MAGIC, MAP_VERSION, 0, terrain.width, terrain.height, len(meta_bytes))
+    offset = MAP_HEADER.size + len(meta_bytes)
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(meta_bytes)
+        file.write(b"\0" * (align(offset) - offset))
+        file.write(bytes(terrain.codes))
+
+
+def load_map(path=DEFAULT_MAP, use_cache=True):
+    """
+    Charge une carte en projetant sa section terrain en mémoire.
+
+    Les codes sont projetés en copie privée : modifier le terrain en jeu
+    (`Terrain.set_code`) ne modifie pas le fichier.
+
+    Paramètres
+    ----------
+    path : str
+        Le chemin du fichier de la carte.
+    use_cache : bool
+        Réutiliser (et créer si besoin) le fichier des couches dérivées.
+
+    Retourne
+    -------
+    game_map : GameMap
+        La carte chargée.
+    """
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        source = os.fstat(file.fileno())
+
+    magic, version, _, width, height, meta_size = MAP_HEADER.unpack_from(data, 0)
+    if magic != MAP_MAGIC or version != MAP_VERSION:
+        raise ValueError(f"{path} n'est pas une carte valide (version {MAP_VERSION} attendue)")
+    meta = json.loads(bytes(data[MAP_HEADER.size:MAP_HEADER.size + meta_size]).decode("utf-8"))
+    offset = align(MAP_HEADER.size + meta_size)
+    if len(data) < offset + width * height:
+        raise ValueError(f"{path} est incomplet")
+    codes = memoryview(data)[offset:offset + width * height]
+    if width * height and max(codes) >= len(TERRAIN_NAMES):
+        raise ValueError(f"{path} contient un code de terrain inconnu ({max(codes)})")
+
+    layers = load_layers(path + ".layers", source, width * height) if use_cache else None
+    if layers is None:
+        terrain = Terrain.from_codes(width, height, codes)
+        if use_cache:
+            save_layers(path + ".layers", source, terrain)
+    else:
+        passable, healing_zones = layers
+        terrain = Terrain.from_codes(width, height, codes, passable, healing_zones)
+
+    spawns = {team: [tuple(cell) for cell in cells] for team, cells in meta.get("spawns", {}).items()}
+    return GameMap(path, meta.get("name", ""), terrain, meta.get("image"), spawns)
+
+
+def load_layers(path, source, cells):
+    """
+    Lit les couches dérivées enregistrées, si elles correspondent à la carte.
+
+    Paramètres
+    ----------
+    path : str
+        Le chemin du fichier des couches.
+    source : os.stat_result
+        L'état du fichier de la carte (taille et date de modification).
+    cells : int
+        Le nombre de cases de la carte.
+
+    Retourne
+    -------
+    layers : tuple or None
+        Les masques de passage et les cases de soin, ou None si le fichier est absent ou périmé.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) < LAYERS_HEADER.size:
+        return None
+    magic, version, masks, size, mtime, healing_count = LAYERS_HEADER.unpack_from(data, 0)
+    if (magic != LAYERS_MAGIC or version != LAYERS_VERSION or masks != len(BLOCKING_TERRAIN)
+            or size != source.st_size or mtime != source.st_mtime_ns
+            or len(data) != LAYERS_HEADER.size + masks * cells + healing_count * 8):
+        return None
+
+    view = memoryview(data)
+    offset = LAYERS_HEADER.size
+    passable = {}
+    for movement_class in sorted(BLOCKING_TERRAIN):
+        passable[movement_class] = view[offset:offset + cells]
+        offset += cells
+    healing = struct.unpack_from(f"<{2 * healing_count}I", data, offset)
+    healing_zones = list(zip(healing[0::2], healing[1::2]))
+    return passable, healing_zones
+
+
+def save_layers(path, source, terrain):
+    """Enregistre les couches dérivées du terrain à côté de la carte (ignoré si le dossier est en lecture seule)."""
+    healing = [value for cell in terrain.healing_zones for value in cell]
+    try:
+        with open(path, "wb") as file:
+            file.write(LAYERS_HEADER.pack(LAYERS_MAGIC, LAYERS_VERSION, len(BLOCKING_TERRAIN),
+                                          source.st_size, source.st_mtime_ns, len(terrain.healing_zones)))
+            for movement_class in sorted(BLOCKING_TERRAIN):
+                file.write(bytes(terrain.passable[movement_class]))
+            file.write(struct.pack(f"<{len(healing)}I", *healing))
+    except OSError:
+        pass
+
+
+def terrain_from_text(lines):
+    """
+    Construit un terrain à partir de lignes de texte, un caractère par case.
+
+    '.' passage, '#' mur, 'T' arbre, '~' mer, '+' zone de soin.
+    """
+    rows = [line.rstrip("\r\n") for line in lines if line.strip()]
+    width = len(rows[0])
+    if any(len(row) != width for row in rows):
+        raise ValueError("Toutes les lignes de la carte doivent avoir la même longueur")
+    codes = bytearray(TEXT_CODES[char] for row in rows for char in row)
+    return Terrain.from_codes(width, len(rows), codes)
+
+
+def main(args):
+    """Convertit une carte texte en fichier .map."""
+    if len(args) < 2:
+        print("Usage : python maps.py carte.txt carte.map [--image nom] [--name nom]")
+        return
+    options = dict(zip(args[2::2], args[3::2]))
+    with open(args[0], encoding="utf-8") as file:
+        terrain = terrain_from_text(file)
+    save_map(args[1], terrain, name=options.get("--name"), image=options.get("--image"))
+    print(f"{args[1]} : {terrain.width} x {terrain.height} cases")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+"""
+Index d'occupation des cases.
+
+Associe chaque case occupée à l'unité qui s'y trouve. L'index est mis à jour
+quand une unité apparaît, se déplace ou meurt : savoir si une case est libre,
+ou quelle unité se trouve sur une case attaquée, se fait en O(1).
+"""
+
+
+class OccupancyIndex:
+    """
+    Classe pour représenter l'occupation des cases de la grille.
+
+    ...
+    Attributs
+    ---------
+    cells : dict[tuple, Unit]
+        L'unité présente sur chaque case occupée.
+    version : int
+        Incrémenté à chaque modification (invalide les caches qui en dépendent).
+    """
+
+    def __init__(self, units=()):
+        """
+        Construit l'index et y place les unités données.
+
+        Paramètres
+        ----------
+        units : iterable[Unit]
+            Les unités présentes sur la grille.
+        """
+        self.cells = {}
+        self.version = 0
+        for unit in units:
+            self.add(unit)
+
+    def add(self, unit):
+        """Place une unité sur sa case (apparition). Deux unités ne peuvent pas partager une case."""
+        cell = (unit.x, unit.y)
+        if cell in self.cells:
+            raise ValueError(f"La case {cell} est déjà occupée par {self.cells[cell].__class__.__name__}")
+        self.cells[cell] = unit
+        unit.occupancy = self
+        self.version += 1
+
+    def remove(self, unit):
+        """Retire une unité de l'index (mort)."""
+        if self.cells.get((unit.x, unit.y)) is unit:
+            del self.cells[(unit.x, unit.y)]
+        unit.occupancy = None
+        self.version += 1
+
+    def moved(self, unit, old_cell):
+        """Met à jour l'index après le déplacement d'une unité depuis `old_cell`."""
+        if self.cells.get(old_cell) is unit:
+            del self.cells[old_cell]
+        self.cells[(unit.x, unit.y)] = unit
+        self.version += 1
+
+    def unit_at(self, x, y):
+        """Retourne l'unité présente en (x, y), ou None si la case est libre."""
+        return self.cells.get((x, y))
+
+    def is_free(self, x, y):
+        """Vérifie si la case (x, y) est libre."""
+        return (x, y) not in self.cells
+
+    def occupied_except(self, unit):
+        """Retourne l'ensemble des cases occupées par les autres unités que `unit`."""
+        occupied = set(self.cells)
+        occupied.discard((unit.x, unit.y))
+        return occupied
@@ -0,0 +1,172 @@
+"""
+Calcul des cases atteignables par parcours en largeur (BFS).
+
+Un déplacement correspond à une pression de touche : selon sa classe, une unité
+avance d'une case, ou de deux cases en s'arrêtant à la première si la seconde
+est bloquée (Archer, Invincible). Le champ de distances donne, pour chaque case
+atteignable, le coût minimal pour l'atteindre depuis la position de départ ; il
+est calculé une fois par tour d'unité et sert à la fois à la surbrillance et à
+la validation des déplacements.
+"""
+
+from terrain import GROUND
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+def landing_cell(terrain, x, y, dx, dy, movement_class=GROUND, step=1, occupied=()):
+    """
+    Retourne la case d'arrivée d'une pression de touche, ou None si l'unité ne peut pas bouger.
+
+    Paramètres
+    ----------
+    terrain : Terrain
+        Le terrain de la grille.
+    x, y : int
+        La position de départ.
+    dx, dy : int
+        La direction du déplacement.
+    movement_class : int
+        La classe de déplacement de l'unité (masque de passage).
+    step : int
+        Le nombre de cases parcourues par pression (1 ou 2).
+    occupied : container[tuple]
+        Les cases occupées, où l'unité ne peut pas aller.
+
+    Retourne
+    -------
+    cell : tuple or None
+        La case d'arrivée.
+    """
+    width, height = terrain.width, terrain.height
+    mask = terrain.passable[movement_class]
+    landing = None
+    for _ in range(step):
+        new_x, new_y = x + dx, y + dy
+        if not (0 <= new_x < width and 0 <= new_y < height) or not mask[new_y * width + new_x] \
+                or (new_x, new_y) in occupied:
+            break  # S'arrête avant l'obstacle
+        x, y = new_x, new_y
+        landing = (x, y)
+    return landing
+
+
+class DistanceField:
+    """
+    Classe pour représenter le champ de distances d'une unité depuis sa position.
+
+    ...
+    Attributs
+    ---------
+    origin : tuple
+        La position de départ.
+    max_cost : int
+        Le coût maximal exploré (par exemple la vitesse de déplacement).
+    distances : dict[tuple, int]
+        Le coût minimal de chaque case atteignable.
+    parents : dict[tuple, tuple]
+        Pour chaque case, la case précédente et la direction utilisée pour l'atteindre.
+    """
+
+    def __init__(self, terrain, origin, max_cost, movement_class=GROUND, step=1, occupied=(), costs=None):
+        """
+        Calcule le champ de distances.
+
+        Paramètres
+        ----------
+        terrain : Terrain
+            Le terrain de la grille.
+        origin : tuple
+            La position de départ.
+        max_cost : int
+            Le coût maximal exploré.
+        movement_class : int
+            La classe de déplacement de l'unité (masque de passage).
+        step : int
+            Le nombre de cases parcourues par pression (1 ou 2).
+        occupied : container[tuple]
+            Les cases occupées par d'autres unités.
+        costs : list[int], optional
+            Le coût d'arrivée sur chaque code de terrain (1 par pression si None).
+        """
+        self.origin = origin
+        self.max_cost = max_cost
+
+        # File par coût (algorithme de Dial) : un simple BFS quand tous les coûts valent 1.
+        # Les cases sont manipulées par indice (y * width + x) dans la boucle interne.
+        width, height = terrain.width, terrain.height
+        mask = terrain.passable[movement_class]
+        codes = terrain.codes
+        blocked = {y * width + x for x, y in occupied}
+        start = origin[1] * width + origin[0]
+        distances = {start: 0}
+        parents = {start: None}
+        buckets = [[] for _ in range(max_cost + 1)]
+        buckets[0].append(start)
+
+        for cost in range(max_cost + 1):
+            for index in buckets[cost]:
+                if distances[index] != cost:
+                    continue  # Case déjà atteinte à moindre coût
+                x, y = index % width, index // width
+                for dx, dy in DIRECTIONS:
+                    # Case d'arrivée : avance de `step` cases au plus, s'arrête avant un obstacle
+                    landing = -1
+                    new_x, new_y = x, y
+                    for _ in range(step):
+                        new_x += dx
+                        new_y += dy
+                        new_index = new_y * width + new_x
+                        if not (0 <= new_x < width and 0 <= new_y < height) or not mask[new_index] \
+                                or new_index in blocked:
+                            break
+                        landing = new_index
+                    if landing < 0:
+                        continue
+                    new_cost = cost + (1 if costs is None else costs[codes[landing]])
+                    if new_cost <= max_cost and new_cost < distances.get(landing, max_cost + 1):
+                        distances[landing] = new_cost
+                        parents[landing] = (index, (dx, dy))
+                        buckets[new_cost].append(landing)
+
+        # Résultats indexés par case (x, y)
+        self.distances = {(index % width, index // width): cost for index, cost in distances.items()}
+        self.parents = {
+            (index % width, index // width):
+                None if parent is None else ((parent[0] % width, parent[0] // width), parent[1])
+            for index, parent in parents.items()
+        }
+
+    def distance(self, x, y):
+        """Retourne le coût pour atteindre (x, y), ou None si la case n'est pas atteignable."""
+        return self.distances.get((x, y))
+
+    def can_reach(self, x, y, budget=None):
+        """Vérifie si (x, y) est atteignable avec le budget donné (max_cost par défaut)."""
+        cost = self.distances.get((x, y))
+        return cost is not None and cost <= (self.max_cost if budget is None else budget)
+
+    def reachable_cells(self, budget=None):
+        """Retourne les cases atteignables avec le budget donné (max_cost par défaut)."""
+        if budget is None or budget >= self.max_cost:
+            return list(self.distances)
+        return [cell for cell, cost in self.distances.items() if cost <= budget]
+
+    def path_to(self, x, y):
+        """
+        Retourne la suite de directions (dx, dy) qui mène de l'origine à (x, y).
+
+        Retourne
+        -------
+        path : list[tuple] or None
+            Les directions à jouer, ou None si la case n'est pas atteignable.
+        """
+        if (x, y) not in self.parents:
+            return None
+        path = []
+        cell = (x, y)
+        while self.parents[cell] is not None:
+            cell, direction = self.parents[cell]
+            path.append(direction)
+        path.reverse()
+        return path
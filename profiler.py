@@ -0,0 +1,145 @@
+"""
+Mesure du temps passé dans chaque étape d'une image.
+
+Les étapes de l'affichage (fond de la grille, unités, surbrillances, panneau,
+envoi à l'écran) et la gestion des entrées sont entourées de mesures :
+    with profiler.span("units"):
+        ...
+Les durées alimentent un affichage optionnel à l'écran (images par seconde et
+millisecondes par étape, touche F3) et peuvent être exportées au format
+« trace event » de Chrome (chrome://tracing ou https://ui.perfetto.dev).
+
+Désactivé (par défaut), `span` retourne toujours le même objet vide : aucune
+horloge n'est lue et rien n'est alloué.
+"""
+
+import json
+import time
+from collections import deque
+
+
+class NullSpan:
+    """Mesure vide, utilisée quand le profileur est désactivé."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """Mesure de la durée d'une étape (gestionnaire de contexte)."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    """
+    Classe pour mesurer les étapes de chaque image.
+
+    ...
+    Attributs
+    ---------
+    enabled : bool
+        Si les mesures sont actives.
+    events : deque[tuple]
+        Les dernières mesures (nom, début, durée), en secondes, pour l'export.
+    stage_ms : dict[str, float]
+        La durée moyenne récente de chaque étape, en millisecondes.
+    frame_times : deque[float]
+        Les instants des dernières images affichées.
+    """
+
+    def __init__(self, max_events=200000, smoothing=0.1):
+        """
+        Construit le profileur (désactivé).
+
+        Paramètres
+        ----------
+        max_events : int
+            Le nombre maximal de mesures gardées pour l'export.
+        smoothing : float
+            Le poids de la dernière mesure dans la moyenne affichée.
+        """
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.stage_ms = {}
+        self.frame_times = deque(maxlen=60)
+        self.smoothing = smoothing
+        self.origin = time.perf_counter()
+
+    def span(self, name):
+        """Retourne une mesure de l'étape `name` (à utiliser avec `with`)."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, start, end):
+        """Enregistre la durée d'une étape."""
+        duration = end - start
+        self.events.append((name, start, duration))
+        previous = self.stage_ms.get(name)
+        milliseconds = duration * 1000
+        self.stage_ms[name] = milliseconds if previous is None else previous + self.smoothing * (milliseconds - previous)
+
+    def frame(self):
+        """Signale la fin de l'affichage d'une image."""
+        if self.enabled:
+            self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        """Retourne le nombre d'images par seconde récent."""
+        if len(self.frame_times) < 2:
+            return 0.0
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+    def toggle(self):
+        """Active ou désactive les mesures."""
+        self.enabled = not self.enabled
+        self.frame_times.clear()
+        return self.enabled
+
+    def hud_lines(self):
+        """Retourne les lignes à afficher : images par seconde, puis durée de chaque étape."""
+        lines = [f"FPS {self.fps():5.1f}"]
+        lines.extend(f"{name:10} {milliseconds:6.2f} ms" for name, milliseconds in sorted(self.stage_ms.items()))
+        return lines
+
+    def export_chrome_trace(self, path):
+        """
+        Exporte les mesures au format « trace event » de Chrome.
+
+        Paramètres
+        ----------
+        path : str
+            Le fichier JSON à écrire.
+        """
+        trace = [
+            {"name": name, "ph": "X", "pid": 0, "tid": 0,
+             "ts": (start - self.origin) * 1e6, "dur": duration * 1e6}
+            for name, start, duration in self.events
+        ]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
+
+
+# Profileur partagé par tout le jeu
+profiler = Profiler()
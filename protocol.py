@@ -0,0 +1,353 @@
+"""
+Format des messages échangés entre le serveur de parties (server.py) et les clients.
+
+Chaque message est une trame binaire : un octet de type, la taille du contenu
+sur 2 octets, puis le contenu. Les actions, la composition des équipes et
+l'état des unités reprennent les formats du journal des parties (replay.py).
+
+Messages du client :
+    JOIN : nom de la partie et classes des unités choisies ;
+    ACTION_MESSAGE : une action du moteur de règles (3 octets) ;
+    SPECTATE : nom de la partie à regarder.
+Messages du serveur :
+    WELCOME : équipe attribuée (aucune pour un spectateur), graine, carte et composition initiale ;
+    STATE : état de la partie après chaque action acceptée (environ 100 octets) ;
+    REJECTED : raison du refus d'un message ;
+    KEYFRAME : numéro de séquence et état complet (spectateur qui arrive ou qui a pris du retard) ;
+    DELTA : numéro de séquence, en-tête de l'état et seulement les unités modifiées
+            depuis l'état précédent (environ 25 octets pour un déplacement).
+"""
+
+import struct
+
+from occupancy import OccupancyIndex
+from pathfinding import DistanceField
+from replay import (ACTION, ROSTER_ENTRY, UNIT_STATE, UNIT_CLASSES, TEAMS,
+                    decode_action, terrain_checksum)
+from rules import MOVE_PHASE, ACTION_PHASE
+
+FRAME_HEADER = struct.Struct("<BH")  # Type du message, taille du contenu
+MAX_PAYLOAD = 0xFFFF
+
+# Types des messages
+JOIN = 1
+ACTION_MESSAGE = 2
+SPECTATE = 3
+WELCOME = 16
+STATE = 17
+REJECTED = 18
+KEYFRAME = 19
+DELTA = 20
+
+JOIN_HEADER = struct.Struct("<B")        # Nombre d'unités, suivi des classes puis du nom de la partie
+WELCOME_HEADER = struct.Struct("<BQIH")  # Équipe, graine, somme de contrôle du terrain, taille du chemin de la carte
+STATE_HEADER = struct.Struct("<IBHBBBHH")  # Tour, équipe, unité active, phase, déplacements restants,
+                                           # vainqueur (0 : aucun), case de départ de l'unité active
+PHASES = [MOVE_PHASE, ACTION_PHASE]
+SPECTATOR = len(TEAMS)  # « Équipe » d'un spectateur dans WELCOME
+
+SEQUENCE = struct.Struct("<I")       # Numéro de l'état, en tête de KEYFRAME et DELTA
+DELTA_ENTRY = struct.Struct("<BB")   # Indice de l'unité dans la composition, changements
+POSITION = struct.Struct("<HH")
+HEALTH = struct.Struct("<f")         # Exact pour les santés entières et demi-entières du jeu
+MOVED, HEALTH_CHANGED, REMOVED = 1, 2, 4
+
+TEAM_SIZE = 3  # Nombre d'unités (de classes différentes) par équipe, comme dans `Game.select_units`
+MAX_MATCH_NAME = 64
+
+
+def encode_frame(kind, payload=b""):
+    """Retourne la trame d'un message."""
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Message trop long ({len(payload)} octets)")
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+async def read_frame(reader):
+    """
+    Lit une trame sur une connexion asyncio.
+
+    Retourne
+    -------
+    kind, payload : int, bytes
+        Le type et le contenu du message.
+
+    Lève `asyncio.IncompleteReadError` si la connexion est fermée.
+    """
+    kind, size = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return kind, await reader.readexactly(size)
+
+
+def read_frame_from(file):
+    """Lit une trame sur un fichier de socket bloquant. Retourne (None, b"") si la connexion est fermée."""
+    header = file.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None, b""
+    kind, size = FRAME_HEADER.unpack(header)
+    payload = file.read(size)
+    if len(payload) < size:
+        return None, b""
+    return kind, payload
+
+
+def encode_join(match_name, composition):
+    """Encode une demande de participation : nom de la partie et classes des unités choisies."""
+    classes = bytes(UNIT_CLASSES.index(unit_class) for unit_class in composition)
+    return JOIN_HEADER.pack(len(classes)) + classes + match_name.encode("utf-8")
+
+
+def decode_join(payload):
+    """
+    Décode une demande de participation et vérifie la composition.
+
+    Retourne
+    -------
+    match_name, composition : str, list[type]
+        Le nom de la partie et les classes des unités.
+
+    Lève ValueError si la demande est invalide.
+    """
+    if len(payload) < JOIN_HEADER.size:
+        raise ValueError("Demande de participation incomplète")
+    count, = JOIN_HEADER.unpack_from(payload, 0)
+    indices = payload[JOIN_HEADER.size:JOIN_HEADER.size + count]
+    if count != TEAM_SIZE or len(indices) != count or len(set(indices)) != count \
+            or max(indices) >= len(UNIT_CLASSES):
+        raise ValueError(f"Composition invalide : {TEAM_SIZE} classes d'unités différentes attendues")
+    return decode_match_name(payload[JOIN_HEADER.size + count:]), [UNIT_CLASSES[index] for index in indices]
+
+
+def decode_match_name(payload):
+    """Décode le nom de la partie d'un message SPECTATE (ValueError s'il est trop long)."""
+    if len(payload) > MAX_MATCH_NAME:
+        raise ValueError("Nom de partie trop long")
+    return payload.decode("utf-8", errors="replace")
+
+
+def decode_action_message(payload):
+    """Décode une action envoyée par un client (ValueError si le message est invalide)."""
+    if len(payload) != ACTION.size:
+        raise ValueError("Action invalide")
+    try:
+        return decode_action(*ACTION.unpack(payload))
+    except KeyError:
+        raise ValueError("Type d'action inconnu") from None
+
+
+def encode_welcome(team, state, map_path, roster):
+    """
+    Encode le début de la partie pour un joueur.
+
+    Paramètres
+    ----------
+    team : str or None
+        L'équipe attribuée au joueur (None pour un spectateur).
+    state : GameState
+        L'état de la partie, au début de la partie.
+    map_path : str
+        Le fichier de la carte jouée.
+    roster : list[Unit]
+        Les unités de la partie, dans l'ordre des états envoyés ensuite.
+    """
+    map_bytes = map_path.encode("utf-8")
+    team_code = SPECTATOR if team is None else TEAMS.index(team)
+    parts = [WELCOME_HEADER.pack(team_code, state.seed, terrain_checksum(state.grid), len(map_bytes)),
+             map_bytes, struct.pack("<H", len(roster))]
+    parts.extend(ROSTER_ENTRY.pack(UNIT_CLASSES.index(unit.__class__), TEAMS.index(unit.team), unit.x, unit.y)
+                 for unit in roster)
+    return b"".join(parts)
+
+
+def decode_welcome(payload):
+    """
+    Décode le début de la partie.
+
+    Retourne
+    -------
+    team, seed, checksum, map_path, roster : str, int, int, str, list[tuple]
+        L'équipe du joueur (None pour un spectateur), la graine, la somme de contrôle du terrain, la carte
+        et la composition initiale : (classe, équipe, x, y) de chaque unité.
+    """
+    team, seed, checksum, map_size = WELCOME_HEADER.unpack_from(payload, 0)
+    offset = WELCOME_HEADER.size
+    map_path = payload[offset:offset + map_size].decode("utf-8")
+    offset += map_size
+    count, = struct.unpack_from("<H", payload, offset)
+    offset += 2
+    roster = []
+    for _ in range(count):
+        class_index, unit_team, x, y = ROSTER_ENTRY.unpack_from(payload, offset)
+        roster.append((UNIT_CLASSES[class_index], TEAMS[unit_team], x, y))
+        offset += ROSTER_ENTRY.size
+    return (TEAMS[team] if team < len(TEAMS) else None), seed, checksum, map_path, roster
+
+
+def unit_states(state, roster):
+    """Retourne (vivante, x, y, santé) de chaque unité de la composition initiale."""
+    alive = {id(unit) for unit in state.player_units + state.enemy_units}
+    return [(1, unit.x, unit.y, unit.health) if id(unit) in alive else (0, 0, 0, 0.0) for unit in roster]
+
+
+def encode_state_header(state):
+    """Encode le tour, l'unité active, sa phase, ses déplacements restants, le vainqueur et la case de départ de l'unité."""
+    origin = state.reach.origin if state.reach is not None else (0, 0)
+    winner = 0 if state.winner is None else TEAMS.index(state.winner) + 1
+    return STATE_HEADER.pack(state.turn, TEAMS.index(state.team), state.unit_index, PHASES.index(state.phase),
+                             state.remaining_moves, winner, *origin)
+
+
+def encode_state(state, roster):
+    """
+    Encode l'état de la partie : tour, unité active, phase et position et santé de chaque unité.
+
+    Paramètres
+    ----------
+    state : GameState
+        L'état de la partie.
+    roster : list[Unit]
+        Les unités de la partie (vivantes ou non), dans l'ordre de la composition initiale.
+    """
+    parts = [encode_state_header(state)]
+    parts.extend(UNIT_STATE.pack(*unit_state) for unit_state in unit_states(state, roster))
+    return b"".join(parts)
+
+
+def encode_keyframe(sequence, state, roster):
+    """Encode l'état complet numéro `sequence` (point de départ des deltas suivants)."""
+    return SEQUENCE.pack(sequence) + encode_state(state, roster)
+
+
+def encode_delta(sequence, state, previous, current):
+    """
+    Encode l'état numéro `sequence` par différence avec l'état précédent.
+
+    Paramètres
+    ----------
+    sequence : int
+        Le numéro de l'état.
+    state : GameState
+        L'état de la partie (pour l'en-tête).
+    previous, current : list[tuple]
+        L'état des unités (voir `unit_states`) avant et après l'action.
+
+    Retourne
+    -------
+    payload : bytes
+        Le numéro, l'en-tête de l'état, le nombre d'unités modifiées puis, pour
+        chacune : son indice, ses changements, sa position si elle s'est déplacée
+        et sa santé si elle a changé (rien de plus pour une unité morte).
+    """
+    entries = []
+    changed = 0
+    for index, (before, after) in enumerate(zip(previous, current)):
+        if before == after:
+            continue
+        changed += 1
+        if not after[0]:
+            entries.append(DELTA_ENTRY.pack(index, REMOVED))
+            continue
+        flags = (MOVED if before[1:3] != after[1:3] else 0) | (HEALTH_CHANGED if before[3] != after[3] else 0)
+        entries.append(DELTA_ENTRY.pack(index, flags))
+        if flags & MOVED:
+            entries.append(POSITION.pack(after[1], after[2]))
+        if flags & HEALTH_CHANGED:
+            entries.append(HEALTH.pack(after[3]))
+    return b"".join([SEQUENCE.pack(sequence), encode_state_header(state), bytes([changed])] + entries)
+
+
+def apply_state(payload, state, roster):
+    """
+    Applique un état reçu à la copie locale de la partie (client léger).
+
+    Les unités mortes sont retirées de leur équipe, l'index d'occupation est
+    reconstruit et le champ de distances de l'unité active est recalculé depuis
+    sa case de départ, comme au début de son tour (`GameState.begin_unit_turn`).
+
+    Paramètres
+    ----------
+    payload : bytes
+        Le contenu du message STATE.
+    state : GameState
+        La copie locale de la partie (modifiée en place).
+    roster : list[Unit]
+        Les unités de la partie, dans l'ordre de la composition initiale.
+    """
+    header = STATE_HEADER.unpack_from(payload, 0)
+    offset = STATE_HEADER.size
+    alive = []
+    for unit in roster:
+        flag, x, y, health = UNIT_STATE.unpack_from(payload, offset)
+        offset += UNIT_STATE.size
+        if flag:
+            unit.x, unit.y = x, y
+            unit.health = int(health) if health.is_integer() else health
+            alive.append(unit)
+        else:
+            unit.occupancy = None
+    update_state(state, header, alive)
+
+
+def apply_keyframe(payload, state, roster):
+    """Applique un état complet reçu par un spectateur. Retourne son numéro de séquence."""
+    sequence, = SEQUENCE.unpack_from(payload, 0)
+    apply_state(payload[SEQUENCE.size:], state, roster)
+    return sequence
+
+
+def apply_delta(payload, state, roster):
+    """
+    Applique un delta reçu par un spectateur à la copie locale de la partie.
+
+    Le delta doit suivre l'état déjà appliqué (numéro de séquence suivant) :
+    le serveur envoie un état complet (KEYFRAME) à un spectateur qui a manqué des deltas.
+
+    Retourne
+    -------
+    sequence : int
+        Le numéro de l'état appliqué.
+    """
+    sequence, = SEQUENCE.unpack_from(payload, 0)
+    offset = SEQUENCE.size
+    header = STATE_HEADER.unpack_from(payload, offset)
+    offset += STATE_HEADER.size
+    count = payload[offset]
+    offset += 1
+    removed = set()
+    for _ in range(count):
+        index, flags = DELTA_ENTRY.unpack_from(payload, offset)
+        offset += DELTA_ENTRY.size
+        unit = roster[index]
+        if flags & REMOVED:
+            unit.occupancy = None
+            removed.add(index)
+        if flags & MOVED:
+            unit.x, unit.y = POSITION.unpack_from(payload, offset)
+            offset += POSITION.size
+        if flags & HEALTH_CHANGED:
+            health, = HEALTH.unpack_from(payload, offset)
+            unit.health = int(health) if health.is_integer() else health
+            offset += HEALTH.size
+
+    alive = set(map(id, state.player_units + state.enemy_units))
+    update_state(state, header, [unit for index, unit in enumerate(roster)
+                                 if id(unit) in alive and index not in removed])
+    return sequence
+
+
+def update_state(state, header, alive):
+    """Met à jour la copie locale de la partie avec un en-tête d'état décodé et les unités vivantes."""
+    turn, team, unit_index, phase, remaining_moves, winner, origin_x, origin_y = header
+    state.player_units[:] = [unit for unit in alive if unit.team == 'player']
+    state.enemy_units[:] = [unit for unit in alive if unit.team == 'enemy']
+    state.occupancy = OccupancyIndex(alive)
+    state.turn = turn
+    state.team = TEAMS[team]
+    state.unit_index = unit_index
+    state.phase = PHASES[phase]
+    state.remaining_moves = remaining_moves
+    state.winner = None if winner == 0 else TEAMS[winner - 1]
+
+    unit = state.active_unit
+    if unit is not None:
+        state.reach = DistanceField(unit.grid, (origin_x, origin_y), unit.movement_speed, unit.movement_class,
+                                    unit.move_step, state.occupancy.occupied_except(unit))
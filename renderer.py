@@ -0,0 +1,298 @@
+"""
+Affichage de la grille par rectangles modifiés (dirty rectangles).
+
+Seule la partie de la carte visible par la caméra est affichée. Son fond
+(terrain, lignes et brouillard de guerre) est pré-composé à chaque déplacement
+de la caméra ; quand le brouillard change, seules les cases dont la visibilité
+a changé sont repeintes dans le fond et redessinées à l'écran.
+A chaque image, seules les cases dont le contenu a changé (unité déplacée,
+santé modifiée, surbrillance ajoutée ou retirée) sont redessinées, puis
+envoyées à l'écran avec `pygame.display.update(rects)`.
+
+Les surbrillances sont des cases translucides pré-construites, une par
+couleur, réutilisées à chaque image et dessinées en un seul appel à
+`Surface.blits`. Une case en surbrillance qui ne change pas n'est pas
+redessinée : la couche de surbrillance ne coûte rien tant que l'ensemble des
+cases en surbrillance reste le même.
+"""
+
+from concurrent.futures import Future
+
+import pygame
+
+from camera import Camera
+from profiler import profiler
+from terrain import PASSAGE_VERT, MUR, ARBRE, MER, HEALING_ZONE
+from unit import BLACK, WHITE
+
+# Couleur de chaque terrain, pour les cartes sans image dessinée
+TERRAIN_COLORS = {
+    PASSAGE_VERT: (76, 153, 0),
+    MUR: (110, 110, 110),
+    ARBRE: (0, 90, 30),
+    MER: (30, 90, 200),
+    HEALING_ZONE: (230, 200, 60),
+}
+
+# Couleurs RGBA des surbrillances : déplacements, puis attaques normale et spéciale de chaque équipe
+MOVE_HIGHLIGHT = (0, 255, 0, 100)  # Vert pour les déplacements
+ATTACK_HIGHLIGHTS = {
+    'player': ((0, 0, 255, 120), (0, 0, 255, 130)),  # Bleu, plus foncé pour l'attaque spéciale
+    'enemy': ((255, 0, 0, 120), (255, 0, 0, 130)),   # Rouge, plus foncé pour l'attaque spéciale
+}
+FOG_HIGHLIGHT = (0, 0, 0, 150)  # Assombrit les cases hors de vue (brouillard de guerre)
+# Zones dangereuses : dégâts faibles (moins d'un tiers de la santé), importants, puis mortels
+DANGER_HIGHLIGHTS = ((255, 160, 0, 60), (255, 100, 0, 100), (200, 0, 120, 140))
+
+
+class Renderer:
+    """
+    Classe pour afficher la grille en ne redessinant que les cases modifiées.
+
+    ...
+    Attributs
+    ---------
+    screen : pygame.Surface
+        La surface de la fenêtre du jeu.
+    camera : Camera
+        La partie visible de la carte.
+    static_layer : pygame.Surface
+        Le fond pré-composé de la vue (terrain, lignes et brouillard).
+    cell_states : dict[tuple, tuple]
+        Pour chaque case visible non vide, ce qui y a été dessiné à l'image précédente.
+    overlay_tiles : dict[tuple, pygame.Surface]
+        La case translucide de chaque couleur de surbrillance, réutilisée à chaque image.
+    """
+
+    def __init__(self, screen, terrain, tile_size, view_width, view_height, terrain_image=None):
+        """
+        Construit le renderer et sa caméra.
+
+        Paramètres
+        ----------
+        screen : pygame.Surface
+            La surface de la fenêtre du jeu.
+        terrain : Terrain
+            Le terrain de la carte.
+        tile_size : int
+            La taille d'une case en pixels.
+        view_width : int
+            La largeur de la vue en nombre de cases.
+        view_height : int
+            La hauteur de la vue en nombre de cases.
+        terrain_image : pygame.Surface or Future, optional
+            L'image de toute la carte, ou son chargement en arrière-plan (attendu au premier
+            affichage de la grille) ; sinon chaque case est dessinée avec la couleur de son terrain.
+        """
+        self.screen = screen
+        self.terrain = terrain
+        self.terrain_image = terrain_image
+        self.tile_size = tile_size
+        self.camera = Camera(terrain.width, terrain.height, view_width, view_height)
+        self.board_rect = pygame.Rect(0, 0, self.camera.width * tile_size, self.camera.height * tile_size)
+        self.static_layer = pygame.Surface(self.board_rect.size)
+        self.layer_key = None  # Position de la caméra, version du terrain et présence du brouillard du fond composé
+        self.layer_visible = 0  # Cases visibles (ensemble de bits du brouillard) quand le fond a été peint
+
+        # Une case de chaque terrain (avec le contour de la grille), pour les cartes sans image
+        self.tiles = {}
+        for code, color in TERRAIN_COLORS.items():
+            tile = pygame.Surface((tile_size, tile_size))
+            tile.fill(color)
+            pygame.draw.rect(tile, WHITE, tile.get_rect(), 1)
+            self.tiles[code] = tile
+        # Contour seul (case transparente), dessiné par-dessus l'image de la carte qui n'a pas de lignes
+        self.grid_tile = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+        pygame.draw.rect(self.grid_tile, WHITE, self.grid_tile.get_rect(), 1)
+
+        # Cases de surbrillance pré-construites pour chaque type et chaque équipe, pour le brouillard et les zones dangereuses
+        self.overlay_tiles = {}
+        for color in ((MOVE_HIGHLIGHT, FOG_HIGHLIGHT) + DANGER_HIGHLIGHTS
+                      + tuple(color for colors in ATTACK_HIGHLIGHTS.values() for color in colors)):
+            self.overlay_tile(color)
+
+        self.invalidate()
+
+    def invalidate(self):
+        """Force un affichage complet à la prochaine image (par exemple après un menu)."""
+        self.cell_states = {}
+        self.panel_key = None
+        self.full_redraw = True
+
+    def compose_background(self, fog=None):
+        """Compose le fond de la vue : terrain, lignes puis brouillard, seulement pour les cases visibles."""
+        camera, size = self.camera, self.tile_size
+        if isinstance(self.terrain_image, Future):
+            self.terrain_image = self.terrain_image.result()  # Attendre la fin du chargement de l'image
+        self.static_layer.fill(BLACK)
+        if self.terrain_image is not None:
+            area = pygame.Rect(camera.x * size, camera.y * size, self.board_rect.width, self.board_rect.height)
+            self.static_layer.blit(self.terrain_image, (0, 0), area)
+            self.static_layer.blits([(self.grid_tile, ((x - camera.x) * size, (y - camera.y) * size))
+                                     for x, y in camera.visible_cells()], doreturn=False)
+        else:
+            codes, width = self.terrain.codes, self.terrain.width
+            self.static_layer.blits([
+                (self.tiles[codes[y * width + x]], ((x - camera.x) * size, (y - camera.y) * size))
+                for x, y in camera.visible_cells()
+            ], doreturn=False)
+        if fog is not None:
+            # Cases hors de vue de l'équipe assombries
+            tile = self.overlay_tile(FOG_HIGHLIGHT)
+            self.static_layer.blits([(tile, ((x - camera.x) * size, (y - camera.y) * size))
+                                     for x, y in fog.hidden_cells(camera.visible_cells())], doreturn=False)
+            self.layer_visible = fog.visible
+        self.layer_key = self.background_key(fog)
+
+    def background_key(self, fog):
+        """Ce dont dépend tout le fond composé : position de la caméra, version du terrain et présence du brouillard."""
+        return (self.camera.x, self.camera.y, self.terrain.version, fog is not None)
+
+    def update_fog(self, fog):
+        """
+        Repeint dans le fond les cases de la vue dont la visibilité a changé depuis sa composition.
+
+        Les cases à repeindre sont les bits de la différence (XOR) entre les
+        cases visibles du fond et celles du brouillard : un déplacement
+        d'unité, ou le changement d'équipe qui regarde l'écran, ne repeint
+        pas toute la vue.
+
+        Retourne
+        -------
+        cells : list[tuple]
+            Les cases repeintes, à redessiner à l'écran.
+        """
+        camera, size = self.camera, self.tile_size
+        cells = fog.changed_cells(self.layer_visible, camera.visible_cells())
+        positions = [((x - camera.x) * size, (y - camera.y) * size) for x, y in cells]
+        if self.terrain_image is not None:
+            self.static_layer.blits([(self.terrain_image, position, pygame.Rect(x * size, y * size, size, size))
+                                     for (x, y), position in zip(cells, positions)], doreturn=False)
+            self.static_layer.blits([(self.grid_tile, position) for position in positions], doreturn=False)
+        else:
+            codes, width = self.terrain.codes, self.terrain.width
+            self.static_layer.blits([(self.tiles[codes[y * width + x]], position)
+                                     for (x, y), position in zip(cells, positions)], doreturn=False)
+        tile = self.overlay_tile(FOG_HIGHLIGHT)
+        self.static_layer.blits([(tile, position) for (x, y), position in zip(cells, positions)
+                                 if not fog.is_visible(x, y)], doreturn=False)
+        self.layer_visible = fog.visible
+        return cells
+
+    def overlay_tile(self, color):
+        """Retourne la case translucide de la couleur RGBA donnée (construite une seule fois)."""
+        tile = self.overlay_tiles.get(color)
+        if tile is None:
+            tile = pygame.Surface((self.tile_size, self.tile_size), pygame.SRCALPHA)
+            tile.fill(color)
+            self.overlay_tiles[color] = tile
+        return tile
+
+    def cell_rect(self, x, y):
+        """Retourne le rectangle à l'écran de la case (x, y) de la carte."""
+        return pygame.Rect((x - self.camera.x) * self.tile_size, (y - self.camera.y) * self.tile_size,
+                           self.tile_size, self.tile_size)
+
+    def draw_board(self, units, overlays, fog=None):
+        """
+        Redessine les cases de la grille qui ont changé depuis l'image précédente.
+
+        Paramètres
+        ----------
+        units : list[Unit]
+            Les unités à afficher (seules celles dans la vue sont dessinées).
+        overlays : dict[tuple, tuple]
+            Pour chaque case en surbrillance, les couleurs RGBA à superposer (dans l'ordre).
+        fog : TeamFog, optional
+            Le brouillard de l'équipe qui regarde l'écran (intégré au fond).
+
+        Retourne
+        -------
+        rects : list[pygame.Rect]
+            Les rectangles de l'écran qui ont été modifiés.
+        """
+        camera = self.camera
+        fog_cells = []
+        if self.layer_key != self.background_key(fog):
+            with profiler.span("background"):
+                self.compose_background(fog)  # La caméra a changé : tout redessiner
+            self.full_redraw = True
+        elif fog is not None and fog.visible != self.layer_visible:
+            with profiler.span("background"):
+                fog_cells = self.update_fog(fog)  # Seules les cases dont la visibilité a changé
+        origin = (-camera.x * self.tile_size, -camera.y * self.tile_size)  # Position de la case (0, 0) à l'écran
+
+        units_by_cell = {}
+        new_states = {}
+        for unit in units:
+            if camera.contains(unit.x, unit.y):
+                units_by_cell[(unit.x, unit.y)] = unit
+                new_states[(unit.x, unit.y)] = (id(unit), unit.team, unit.health, unit.max_health, None)
+        for cell, colors in overlays.items():
+            if camera.contains(*cell):
+                unit_state = new_states.get(cell, (None,) * 4 + (None,))
+                new_states[cell] = unit_state[:4] + (colors,)
+
+        # Chaque case reste dans son rectangle : les cases modifiées sont dessinées
+        # en trois passes (fond, unités, surbrillances), mesurées séparément
+        with profiler.span("grid"):
+            if self.full_redraw:
+                self.screen.blit(self.static_layer, self.board_rect)
+                dirty_cells = list(new_states.keys())
+            else:
+                dirty_cells = [cell for cell in self.cell_states.keys() | new_states.keys()
+                               if self.cell_states.get(cell) != new_states.get(cell)]
+                dirty_cells += set(fog_cells).difference(dirty_cells)  # Fond repeint sous le brouillard
+
+            rects = [self.cell_rect(x, y) for x, y in dirty_cells]
+            if not self.full_redraw:
+                self.screen.blits([(self.static_layer, rect, rect) for rect in rects], doreturn=False)  # Restaure le fond des cases
+
+        with profiler.span("units"):
+            for cell in dirty_cells:
+                unit = units_by_cell.get(cell)
+                if unit is not None:
+                    unit.draw(self.screen, origin)
+
+        with profiler.span("overlays"):
+            overlay_tile = self.overlay_tile
+            self.screen.blits([(overlay_tile(color), rect)
+                               for cell, rect in zip(dirty_cells, rects)
+                               for color in overlays.get(cell, ())], doreturn=False)
+
+        if self.full_redraw:
+            rects = [self.board_rect.copy()]
+            self.full_redraw = False
+        self.cell_states = new_states
+        return rects
+
+    def draw_panel(self, panel_key, panel_rect, draw):
+        """
+        Redessine le panneau d'information seulement si son contenu a changé.
+
+        Paramètres
+        ----------
+        panel_key : hashable
+            Résumé de ce qui est affiché dans le panneau (unité, statistiques).
+        panel_rect : pygame.Rect
+            Le rectangle du panneau à l'écran.
+        draw : callable
+            Fonction qui dessine le panneau sur l'écran.
+
+        Retourne
+        -------
+        rects : list[pygame.Rect]
+            Le rectangle du panneau s'il a été redessiné, sinon une liste vide.
+        """
+        if panel_key == self.panel_key:
+            return []
+        self.panel_key = panel_key
+        with profiler.span("panel"):
+            draw()
+        return [panel_rect]
+
+    def present(self, rects):
+        """Envoie à l'écran uniquement les rectangles modifiés."""
+        if rects:
+            with profiler.span("present"):
+                pygame.display.update(rects)
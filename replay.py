@@ -0,0 +1,326 @@
+"""
+Journal binaire des actions d'une partie et rejeu sans affichage.
+
+Un journal (extension .glog) contient :
+    - un en-tête : signature b"GLOG", version, graine du générateur aléatoire,
+      carte (chemin et somme de contrôle du terrain) et composition initiale
+      des équipes (classe, équipe et position de chaque unité) ;
+    - les actions, 3 octets chacune (type, puis deux paramètres signés) ;
+    - des instantanés de l'état, au début du tour d'une unité, tous les
+      `snapshot_interval` tours.
+
+Le rejeu applique les actions avec le moteur de règles, sans pygame, aussi vite
+que possible. Pour aller à un tour donné, il repart de l'instantané le plus
+proche au lieu de rejouer toute la partie :
+    python replay.py logs/partie.glog [--turn N]
+"""
+
+import struct
+import sys
+import time
+import zlib
+
+from maps import load_map
+from rules import GameState, MOVE, VALIDATE, ATTACK, HEAL, SKIP, apply_action
+from unit import Archer, Swordsman, Wizard, Invincible, Bomber
+
+LOG_MAGIC = b"GLOG"
+LOG_VERSION = 3  # 2 : attaques arrêtées par les obstacles (ligne de vue) ; 3 : générateur des instantanés sans pickle
+LOG_HEADER = struct.Struct("<4sHQIH")  # Signature, version, graine, somme de contrôle du terrain, taille du chemin de la carte
+ROSTER_ENTRY = struct.Struct("<BBHH")   # Classe, équipe, x, y
+ACTION = struct.Struct("<Bbb")          # Type, paramètres
+SNAPSHOT_HEADER = struct.Struct("<IBH")  # Tour, équipe, indice de l'unité active
+UNIT_STATE = struct.Struct("<BHHd")     # Vivante, x, y, santé
+RNG_STATE = struct.Struct("<B625I?d")  # Générateur (Mersenne Twister) : version, 624 mots et position, valeur gaussienne en attente
+
+UNIT_CLASSES = [Archer, Swordsman, Wizard, Invincible, Bomber]
+TEAMS = ['player', 'enemy']
+
+# Codes des actions dans le journal (0 est réservé, 255 marque un instantané)
+ACTION_CODES = {MOVE: 1, VALIDATE: 2, ATTACK: 3, HEAL: 4, SKIP: 5}
+ACTION_KINDS = {code: kind for kind, code in ACTION_CODES.items()}
+SNAPSHOT_CODE = 255
+
+
+def encode_action(action):
+    """Encode une action du moteur de règles sur 3 octets."""
+    params = tuple(action[1:]) + (0,) * (3 - len(action))
+    return ACTION.pack(ACTION_CODES[action[0]], *params)
+
+
+def decode_action(code, first, second):
+    """Retourne l'action du moteur de règles correspondant à un enregistrement."""
+    kind = ACTION_KINDS[code]
+    if kind == MOVE:
+        return (MOVE, first, second)
+    if kind == ATTACK:
+        return (ATTACK, first)
+    return (kind,)
+
+
+def encode_rng_state(rng):
+    """Encode l'état d'un générateur `random.Random` (sans pickle : un journal peut venir d'un autre joueur)."""
+    version, words, gauss = rng.getstate()
+    return RNG_STATE.pack(version, *words, gauss is not None, gauss or 0.0)
+
+
+def decode_rng_state(data, offset):
+    """Retourne l'état d'un générateur encodé par `encode_rng_state`, pour `random.Random.setstate`."""
+    version, *words, has_gauss, gauss = RNG_STATE.unpack_from(data, offset)
+    if version != 3 or words[-1] > 624:
+        raise ValueError("État du générateur aléatoire invalide dans le journal")
+    return version, tuple(words), gauss if has_gauss else None
+
+
+def terrain_checksum(terrain):
+    """Somme de contrôle du terrain, pour vérifier qu'un journal est rejoué sur la bonne carte."""
+    return zlib.crc32(terrain.codes)
+
+
+class ActionRecorder:
+    """
+    Classe pour enregistrer les actions d'une partie dans un journal binaire.
+
+    ...
+    Attributs
+    ---------
+    state : GameState
+        L'état de la partie enregistrée.
+    roster : dict[int, int]
+        L'indice de chaque unité (par son id) dans la composition initiale.
+    snapshot_interval : int
+        Le nombre de tours entre deux instantanés.
+    """
+
+    def __init__(self, path, state, map_path, snapshot_interval=10):
+        """
+        Ouvre le journal et écrit son en-tête.
+
+        Paramètres
+        ----------
+        path : str
+            Le fichier du journal.
+        state : GameState
+            L'état de la partie, au début de la partie.
+        map_path : str
+            Le fichier de la carte jouée.
+        snapshot_interval : int
+            Le nombre de tours entre deux instantanés.
+        """
+        self.state = state
+        self.snapshot_interval = snapshot_interval
+        self.last_snapshot_turn = state.turn
+        units = state.player_units + state.enemy_units
+        self.roster = {id(unit): index for index, unit in enumerate(units)}
+        self.size = len(units)
+
+        map_bytes = map_path.encode("utf-8")
+        self.file = open(path, "wb")
+        self.file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, state.seed, terrain_checksum(state.grid), len(map_bytes)))
+        self.file.write(map_bytes)
+        self.file.write(struct.pack("<H", len(units)))
+        for unit in units:
+            self.file.write(ROSTER_ENTRY.pack(UNIT_CLASSES.index(unit.__class__), TEAMS.index(unit.team), unit.x, unit.y))
+
+    def record(self, action, events):
+        """
+        Ajoute une action au journal.
+
+        Paramètres
+        ----------
+        action : tuple
+            L'action, déjà appliquée à l'état.
+        events : list[tuple]
+            Les événements produits par l'action (une action refusée n'est pas enregistrée).
+        """
+        if not events:
+            return
+        self.file.write(encode_action(action))
+        if events[-1][0] == "end_turn":
+            # Début du tour de l'unité suivante : instantané si besoin, et écriture sur le disque
+            state = self.state
+            if state.winner is None and state.turn - self.last_snapshot_turn >= self.snapshot_interval:
+                self.write_snapshot()
+            self.file.flush()
+
+    def write_snapshot(self):
+        """Écrit un instantané de l'état courant (début du tour d'une unité)."""
+        state = self.state
+        alive = {id(unit): unit for unit in state.player_units + state.enemy_units}
+        units = [None] * self.size
+        for unit_id, index in self.roster.items():
+            units[index] = alive.get(unit_id)
+
+        self.file.write(bytes([SNAPSHOT_CODE]))
+        self.file.write(SNAPSHOT_HEADER.pack(state.turn, TEAMS.index(state.team), state.unit_index))
+        for unit in units:
+            if unit is None:
+                self.file.write(UNIT_STATE.pack(0, 0, 0, 0.0))
+            else:
+                self.file.write(UNIT_STATE.pack(1, unit.x, unit.y, unit.health))
+        self.file.write(encode_rng_state(state.rng))
+        self.last_snapshot_turn = state.turn
+
+    def close(self):
+        """Ferme le journal."""
+        self.file.close()
+
+
+class ActionLog:
+    """
+    Classe pour lire un journal et rejouer la partie.
+
+    ...
+    Attributs
+    ---------
+    seed : int
+        La graine du générateur aléatoire de la partie.
+    map_path : str
+        Le fichier de la carte jouée.
+    roster : list[tuple]
+        La composition initiale : (classe, équipe, x, y) de chaque unité.
+    actions : list[tuple]
+        Les actions de la partie, dans l'ordre.
+    snapshots : list[tuple]
+        Pour chaque instantané : (tour, nombre d'actions déjà jouées, décalage dans le fichier).
+    """
+
+    def __init__(self, path):
+        """Lit l'en-tête et indexe les actions et les instantanés du journal."""
+        with open(path, "rb") as file:
+            self.data = file.read()
+        data = self.data
+
+        magic, version, self.seed, self.checksum, map_size = LOG_HEADER.unpack_from(data, 0)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(f"{path} n'est pas un journal valide (version {LOG_VERSION} attendue)")
+        offset = LOG_HEADER.size
+        self.map_path = data[offset:offset + map_size].decode("utf-8")
+        offset += map_size
+        count, = struct.unpack_from("<H", data, offset)
+        offset += 2
+        self.roster = []
+        for _ in range(count):
+            class_index, team, x, y = ROSTER_ENTRY.unpack_from(data, offset)
+            self.roster.append((UNIT_CLASSES[class_index], TEAMS[team], x, y))
+            offset += ROSTER_ENTRY.size
+
+        self.actions = []
+        self.snapshots = []
+        # Un journal interrompu (jeu fermé brutalement) s'arrête au dernier enregistrement complet
+        while offset < len(data):
+            if data[offset] == SNAPSHOT_CODE:
+                if offset + 1 + SNAPSHOT_HEADER.size > len(data):
+                    break
+                turn, _, _ = SNAPSHOT_HEADER.unpack_from(data, offset + 1)
+                end = offset + 1 + SNAPSHOT_HEADER.size + count * UNIT_STATE.size + RNG_STATE.size
+                if end > len(data):
+                    break
+                self.snapshots.append((turn, len(self.actions), offset + 1))
+                offset = end
+            else:
+                if offset + ACTION.size > len(data):
+                    break
+                self.actions.append(decode_action(*ACTION.unpack_from(data, offset)))
+                offset += ACTION.size
+
+    def initial_state(self, terrain=None):
+        """Retourne l'état au début de la partie."""
+        terrain = terrain or self.load_terrain()
+        units = [unit_class(x, y, team, terrain) for unit_class, team, x, y in self.roster]
+        return GameState(terrain,
+                         [unit for unit in units if unit.team == 'player'],
+                         [unit for unit in units if unit.team == 'enemy'],
+                         seed=self.seed)
+
+    def load_terrain(self):
+        """Charge la carte de la partie et vérifie qu'elle n'a pas changé."""
+        terrain = load_map(self.map_path).terrain
+        if terrain_checksum(terrain) != self.checksum:
+            raise ValueError(f"La carte {self.map_path} ne correspond pas au journal")
+        return terrain
+
+    def snapshot_state(self, offset, terrain):
+        """Reconstruit l'état enregistré dans l'instantané au décalage donné."""
+        turn, team, unit_index = SNAPSHOT_HEADER.unpack_from(self.data, offset)
+        offset += SNAPSHOT_HEADER.size
+        units = []
+        for unit_class, unit_team, _, _ in self.roster:
+            alive, x, y, health = UNIT_STATE.unpack_from(self.data, offset)
+            offset += UNIT_STATE.size
+            if alive:
+                unit = unit_class(x, y, unit_team, terrain)
+                unit.health = int(health) if health.is_integer() else health
+                units.append(unit)
+
+        state = GameState(terrain,
+                          [unit for unit in units if unit.team == 'player'],
+                          [unit for unit in units if unit.team == 'enemy'],
+                          seed=self.seed)
+        state.rng.setstate(decode_rng_state(self.data, offset))
+        state.turn = turn
+        state.team = TEAMS[team]
+        state.unit_index = unit_index
+        state.begin_unit_turn()
+        return state
+
+    def replay(self, turn=None, terrain=None):
+        """
+        Rejoue la partie jusqu'au début du tour donné (jusqu'à la fin par défaut).
+
+        Repart de l'instantané le plus proche avant ce tour, puis applique les
+        actions suivantes avec le moteur de règles.
+
+        Paramètres
+        ----------
+        turn : int, optional
+            Le tour à atteindre.
+        terrain : Terrain, optional
+            Le terrain de la carte (chargé depuis le journal si None).
+
+        Retourne
+        -------
+        state : GameState
+            L'état de la partie.
+        """
+        terrain = terrain or self.load_terrain()
+        start = None
+        for snapshot in self.snapshots:
+            if turn is not None and snapshot[0] > turn:
+                break
+            start = snapshot
+
+        if start is None:
+            state, first_action = self.initial_state(terrain), 0
+        else:
+            state, first_action = self.snapshot_state(start[2], terrain), start[1]
+
+        for action in self.actions[first_action:]:
+            if turn is not None and state.turn >= turn:
+                break
+            if not apply_action(state, action):
+                raise ValueError(f"Journal désynchronisé : action {action} refusée au tour {state.turn}")
+        return state
+
+
+def main(args):
+    """Rejoue un journal et affiche le résultat."""
+    if not args:
+        print("Usage : python replay.py partie.glog [--turn N]")
+        return
+    turn = int(args[args.index("--turn") + 1]) if "--turn" in args else None
+    log = ActionLog(args[0])
+    terrain = log.load_terrain()
+
+    start = time.perf_counter()
+    state = log.replay(turn, terrain)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(log.actions)} actions, {len(log.snapshots)} instantanés, rejoué en {elapsed * 1000:.1f} ms")
+    print(f"Tour {state.turn}, équipe '{state.team}', vainqueur : {state.winner}")
+    for unit in state.player_units + state.enemy_units:
+        print(f"  {unit.team:6} {unit.__class__.__name__:10} ({unit.x}, {unit.y})  santé {unit.health}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,310 @@
+"""
+Moteur de règles du jeu, indépendant de pygame.
+
+Toutes les règles d'un tour (déplacements, validation de la position, attaques,
+soin du magicien, passer son tour) sont appliquées ici sur un `GameState`.
+La classe `Game` ne fait que traduire les touches du clavier en actions et
+afficher l'état, ce qui permet de jouer des parties entières sans affichage.
+
+Une action est un tuple dont le premier élément est le type d'action :
+    (MOVE, dx, dy), (VALIDATE,), (ATTACK, attack_type), (HEAL,), (SKIP,)
+"""
+
+import copy
+import random
+
+from occupancy import OccupancyIndex
+from pathfinding import landing_cell
+from threat import ThreatMap
+from unit import Wizard
+
+# Types d'actions
+MOVE = "move"
+VALIDATE = "validate"
+ATTACK = "attack"
+HEAL = "heal"
+SKIP = "skip"
+
+# Phases du tour d'une unité
+MOVE_PHASE = "move"      # L'unité se déplace jusqu'à validation de sa position
+ACTION_PHASE = "action"  # L'unité attaque, se soigne ou passe son tour
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+VALIDATE_ACTION = (VALIDATE,)
+HEAL_ACTION = (HEAL,)
+SKIP_ACTION = (SKIP,)
+
+
+def move_action(dx, dy):
+    """Retourne l'action de déplacement d'une case dans la direction (dx, dy)."""
+    return (MOVE, dx, dy)
+
+
+def attack_action(attack_type):
+    """Retourne l'action d'attaque (0 pour normale, 1 pour spéciale)."""
+    return (ATTACK, attack_type)
+
+
+class GameState:
+    """
+    Classe pour représenter l'état d'une partie, sans aucun affichage.
+
+    ...
+    Attributs
+    ---------
+    grid : Terrain
+        Le terrain de la grille.
+    player_units : list[Unit]
+        Les unités de l'équipe 'player'.
+    enemy_units : list[Unit]
+        Les unités de l'équipe 'enemy'.
+    team : str
+        L'équipe dont c'est le tour ('player' ou 'enemy').
+    unit_index : int
+        L'indice de l'unité active dans son équipe.
+    phase : str
+        La phase du tour de l'unité active (MOVE_PHASE ou ACTION_PHASE).
+    remaining_moves : int
+        Le nombre de déplacements restants de l'unité active.
+    reach : DistanceField
+        Le champ de distances de l'unité active, calculé au début de son tour.
+    occupancy : OccupancyIndex
+        L'unité présente sur chaque case occupée.
+    threats : dict[str, ThreatMap]
+        Les menaces de chaque équipe, tenues à jour à la demande (voir `threat_map`).
+    turn : int
+        Le numéro du tour (un tour = les deux équipes ont joué).
+    winner : str or None
+        L'équipe gagnante une fois la partie terminée.
+    seed : int
+        La graine du générateur aléatoire de la partie.
+    rng : random.Random
+        Le générateur aléatoire de la partie : toute règle aléatoire doit
+        l'utiliser pour que la partie puisse être rejouée à l'identique.
+    """
+
+    def __init__(self, grid, player_units, enemy_units, seed=None):
+        self.grid = grid
+        self.seed = random.randrange(2 ** 63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.player_units = player_units
+        self.enemy_units = enemy_units
+        self.occupancy = OccupancyIndex(player_units + enemy_units)  # Apparition des unités
+        self.threats = {}
+        self.team = 'player'
+        self.unit_index = 0
+        self.turn = 1
+        self.winner = None
+        self.phase = MOVE_PHASE
+        self.remaining_moves = 0
+        self.reach = None
+        self.check_winner()
+        if self.winner is None:
+            self.begin_unit_turn()
+
+    def clone(self):
+        """
+        Retourne une copie indépendante de l'état (unités copiées, terrain partagé).
+
+        Utilisée par la recherche de l'IA pour simuler des coups sans modifier la partie.
+        """
+        state = copy.copy(self)
+        state.rng = copy.copy(self.rng)
+        state.player_units = [copy.copy(unit) for unit in self.player_units]
+        state.enemy_units = [copy.copy(unit) for unit in self.enemy_units]
+        state.occupancy = OccupancyIndex(state.player_units + state.enemy_units)
+        state.threats = {team: threats.copy() for team, threats in self.threats.items()}
+        return state
+
+    def units_of(self, team):
+        """Retourne la liste des unités de l'équipe donnée."""
+        return self.player_units if team == 'player' else self.enemy_units
+
+    def opponents_of(self, team):
+        """Retourne la liste des unités adverses de l'équipe donnée."""
+        return self.enemy_units if team == 'player' else self.player_units
+
+    def threat_map(self, team):
+        """Retourne la carte des menaces des unités de l'équipe donnée, mise à jour (seules les unités déplacées ou mortes sont recalculées)."""
+        threats = self.threats.get(team)
+        if threats is None:
+            threats = self.threats[team] = ThreatMap(self.grid, team)
+        threats.update(self.units_of(team))
+        return threats
+
+    @property
+    def active_unit(self):
+        """L'unité dont c'est le tour, ou None si la partie est terminée."""
+        if self.winner is not None:
+            return None
+        return self.units_of(self.team)[self.unit_index]
+
+    def begin_unit_turn(self):
+        """Prépare le tour de l'unité active (phase de déplacement)."""
+        unit = self.active_unit
+        self.phase = MOVE_PHASE
+        self.remaining_moves = unit.movement_speed
+        self.reach = unit.distance_field()  # Cases atteignables pendant ce tour
+
+    def end_unit_turn(self):
+        """Passe à l'unité suivante, puis à l'équipe suivante."""
+        self.check_winner()
+        if self.winner is not None:
+            return
+        self.unit_index += 1
+        if self.unit_index >= len(self.units_of(self.team)):
+            self.unit_index = 0
+            self.team = 'enemy' if self.team == 'player' else 'player'
+            if self.team == 'player':
+                self.turn += 1
+        self.begin_unit_turn()
+
+    def check_winner(self):
+        """Met à jour `winner` si une équipe n'a plus d'unités."""
+        if not self.player_units:
+            self.winner = 'enemy'
+        elif not self.enemy_units:
+            self.winner = 'player'
+
+
+def legal_actions(state):
+    """
+    Retourne la liste des actions autorisées pour l'unité active.
+
+    Paramètres
+    ----------
+    state : GameState
+        L'état de la partie.
+
+    Retourne
+    -------
+    actions : list[tuple]
+        Les actions légales (vide si la partie est terminée).
+    """
+    unit = state.active_unit
+    if unit is None:
+        return []
+    if state.phase == MOVE_PHASE:
+        # Un déplacement n'est autorisé que s'il mène à une case du champ de distances du tour
+        actions = []
+        for dx, dy in DIRECTIONS:
+            landing = landing_cell(unit.grid, unit.x, unit.y, dx, dy, unit.movement_class, unit.move_step,
+                                   state.occupancy.cells)
+            if landing is not None and state.reach.can_reach(*landing):
+                actions.append(move_action(dx, dy))
+        actions.append(VALIDATE_ACTION)
+        return actions
+
+    actions = [attack_action(i) for i in range(len(unit.attack_types))]
+    if isinstance(unit, Wizard) and unit.health < unit.max_health:
+        actions.append(HEAL_ACTION)
+    actions.append(SKIP_ACTION)
+    return actions
+
+
+def is_legal(state, action):
+    """Vérifie si une action est autorisée dans l'état courant."""
+    return action in legal_actions(state)
+
+
+def resolve_attack(unit, attackable_cells, target_units, attack_type):
+    """
+    Attaque toutes les unités cibles présentes sur les cases attaquables.
+
+    Les unités attaquées sont trouvées directement par l'index d'occupation
+    des cases, s'il existe.
+
+    Paramètres
+    ----------
+    unit : Unit
+        L'unité qui attaque.
+    attackable_cells : list[tuple]
+        Liste des coordonnées des cases attaquables.
+    target_units : list[Unit]
+        Liste des unités cibles possibles (les unités mortes en sont retirées).
+    attack_type : int
+        Type d'attaque (0 pour normale, 1 pour spéciale).
+
+    Retourne
+    -------
+    events : list[tuple]
+        Les événements ("damage", attaquant, cible, dégâts) et ("death", cible).
+    """
+    occupancy = unit.occupancy
+    if occupancy is not None:
+        targets = [occupancy.cells[cell] for cell in attackable_cells if cell in occupancy.cells]
+        targets = [target for target in targets if target.team != unit.team]
+    else:
+        targets = [target for target in target_units if (target.x, target.y) in attackable_cells]
+
+    events = []
+    for target in targets:
+        health_before = target.health
+        unit.attack(target, attack_type)  # Effectuer l'attaque
+        events.append(("damage", unit, target, health_before - target.health))
+        if target.health <= 0:
+            target_units.remove(target)  # Retirer l'unité si sa santé est épuisée
+            if occupancy is not None:
+                occupancy.remove(target)
+            events.append(("death", target))
+    return events
+
+
+def apply_action(state, action):
+    """
+    Applique une action de l'unité active à l'état de la partie.
+
+    Une action non autorisée est ignorée et l'état n'est pas modifié.
+
+    Paramètres
+    ----------
+    state : GameState
+        L'état de la partie (modifié en place).
+    action : tuple
+        L'action à appliquer.
+
+    Retourne
+    -------
+    events : list[tuple]
+        Les événements produits par l'action (liste vide si l'action est refusée) :
+        ("move", unité, ancienne position, nouvelle position), ("validate", unité),
+        ("damage", attaquant, cible, dégâts), ("death", cible),
+        ("heal", unité, soin), ("skip", unité), ("end_turn", unité).
+    """
+    if not is_legal(state, action):
+        return []
+
+    unit = state.active_unit
+    kind = action[0]
+    events = []
+
+    if kind == MOVE:
+        old_position = (unit.x, unit.y)
+        unit.move(action[1], action[2])
+        state.remaining_moves -= 1
+        events.append(("move", unit, old_position, (unit.x, unit.y)))
+        if state.remaining_moves <= 0:
+            state.phase = ACTION_PHASE
+        return events
+
+    if kind == VALIDATE:
+        state.remaining_moves = 0
+        state.phase = ACTION_PHASE
+        events.append(("validate", unit))
+        return events
+
+    if kind == ATTACK:
+        attack_type = action[1]
+        cells = unit.get_attackable_cells(attack_type=attack_type)
+        events.extend(resolve_attack(unit, cells, state.opponents_of(state.team), attack_type))
+    elif kind == HEAL:
+        health_before = unit.health
+        unit.heal()
+        events.append(("heal", unit, unit.health - health_before))
+    elif kind == SKIP:
+        events.append(("skip", unit))
+
+    events.append(("end_turn", unit))
+    state.end_unit_turn()
+    return events
@@ -0,0 +1,91 @@
+"""
+Ordonnanceur de la boucle de jeu.
+
+Les boucles du jeu (menus et tours) ne redessinent l'écran que lorsqu'une
+entrée ou une animation a modifié l'état, sont limitées à un nombre d'images
+par seconde, et attendent les événements de façon bloquante lorsque rien
+n'est à afficher : une partie inactive ne consomme presque pas de CPU.
+"""
+
+import pygame
+
+from assets import ASSET_LOADED
+from unit import FPS
+
+
+class FrameScheduler:
+    """
+    Classe pour cadencer une boucle de jeu pilotée par les événements.
+
+    ...
+    Attributs
+    ---------
+    fps : int
+        Le nombre maximal d'images par seconde.
+    needs_redraw : bool
+        Si l'écran doit être redessiné à la prochaine image.
+    animating_until : int
+        Instant (en ms, `pygame.time.get_ticks`) jusqu'auquel une animation est en cours.
+    """
+
+    def __init__(self, fps=FPS):
+        """
+        Construit l'ordonnanceur.
+
+        Paramètres
+        ----------
+        fps : int
+            Le nombre maximal d'images par seconde.
+        """
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.needs_redraw = True
+        self.animating_until = 0
+
+    def request_redraw(self):
+        """Demande un nouvel affichage à la prochaine image."""
+        self.needs_redraw = True
+
+    def animate(self, duration):
+        """Garde la boucle active (sans attente bloquante) pendant `duration` millisecondes."""
+        self.animating_until = max(self.animating_until, pygame.time.get_ticks() + duration)
+        self.needs_redraw = True
+
+    def is_animating(self):
+        """Vérifie si une animation est en cours."""
+        return pygame.time.get_ticks() < self.animating_until
+
+    def should_render(self):
+        """Vérifie si l'écran doit être redessiné, et consomme la demande d'affichage."""
+        if self.needs_redraw or self.is_animating():
+            self.needs_redraw = False
+            return True
+        return False
+
+    def wait_events(self):
+        """
+        Retourne les événements utilisateur.
+
+        Si aucun affichage n'est en attente, attend le prochain événement sans
+        consommer de CPU. Un réaffichage est demandé si la fenêtre a été recouverte
+        ou si une image chargée en arrière-plan est disponible.
+
+        Retourne
+        -------
+        events : list[pygame.event.Event]
+            Les événements reçus.
+        """
+        if self.needs_redraw or self.is_animating():
+            events = pygame.event.get()
+        else:
+            events = [pygame.event.wait()]  # Attente bloquante du prochain événement
+            events.extend(pygame.event.get())
+
+        # La fenêtre a été recouverte puis réaffichée, ou une image est prête : il faut redessiner
+        if any(event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, ASSET_LOADED) for event in events):
+            self.needs_redraw = True
+        return events
+
+    def tick(self):
+        """Limite la boucle au nombre d'images par seconde configuré."""
+        self.clock.tick(self.fps)
@@ -0,0 +1,260 @@
+"""
+Serveur de parties en réseau (asyncio).
+
+Un seul processus héberge de nombreuses parties indépendantes : chaque
+connexion est une coroutine qui attend les messages de son client, sans
+thread ni attente bloquante. Une partie inactive ne coûte que deux connexions
+en attente de lecture et son état (quelques unités sur un terrain partagé).
+
+Le serveur fait autorité : il vérifie que le message vient de l'équipe dont
+c'est le tour, applique l'action avec le moteur de règles (une action non
+autorisée est refusée) et envoie l'état obtenu aux deux joueurs (voir
+protocol.py) ; les spectateurs reçoivent des deltas (voir broadcast.py). Le jeu
+se connecte en client léger avec `game.py --connect` (`--spectate` pour regarder) :
+    python server.py [--host 127.0.0.1] [--port 8765] [--map maps/default.map]
+"""
+
+import asyncio
+import random
+import sys
+
+from broadcast import SpectatorFeed
+from maps import DEFAULT_MAP, load_map
+from protocol import (JOIN, ACTION_MESSAGE, SPECTATE, WELCOME, STATE, REJECTED, encode_frame, read_frame,
+                      decode_join, decode_match_name, decode_action_message, encode_welcome, encode_state)
+from replay import TEAMS
+from rules import GameState, apply_action
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BUFFER = 64 * 1024  # Données en attente d'envoi au-delà desquelles un client trop lent est déconnecté
+
+
+class Match:
+    """
+    Classe pour représenter une partie hébergée par le serveur.
+
+    ...
+    Attributs
+    ---------
+    name : str
+        Le nom de la partie, choisi par les joueurs.
+    compositions : dict[str, list[type]]
+        Les classes des unités de chaque équipe qui a rejoint la partie.
+    writers : dict[str, asyncio.StreamWriter]
+        La connexion de chaque joueur.
+    state : GameState or None
+        L'état de la partie, une fois les deux joueurs arrivés.
+    roster : list[Unit]
+        Les unités de la partie, dans l'ordre des états envoyés.
+    feed : SpectatorFeed
+        La diffusion de la partie à ses spectateurs.
+    """
+
+    def __init__(self, name, game_map, map_path):
+        self.name = name
+        self.game_map = game_map
+        self.map_path = map_path
+        self.compositions = {}
+        self.writers = {}
+        self.state = None
+        self.roster = []
+        self.feed = SpectatorFeed()
+
+    def join(self, composition, writer):
+        """Ajoute un joueur à la première équipe libre. Retourne son équipe, ou None si la partie est complète."""
+        for team in TEAMS:
+            if team not in self.writers:
+                self.compositions[team] = composition
+                self.writers[team] = writer
+                return team
+        return None
+
+    def start(self, seed):
+        """Place les unités des deux équipes et crée l'état de la partie."""
+        terrain = self.game_map.terrain  # Partagé par toutes les parties sur la même carte
+        units = {team: [unit_class(x, y, team, terrain)
+                        for unit_class, (x, y) in zip(self.compositions[team], self.game_map.spawn_cells(team))]
+                 for team in TEAMS}
+        self.state = GameState(terrain, units['player'], units['enemy'], seed=seed)
+        self.roster = units['player'] + units['enemy']
+
+        for team in TEAMS:
+            self.send(team, encode_frame(WELCOME, encode_welcome(team, self.state, self.map_path, self.roster)))
+        self.send_state()
+        self.feed.start(self.state, self.roster,
+                        encode_frame(WELCOME, encode_welcome(None, self.state, self.map_path, self.roster)))
+
+    def send(self, team, frame):
+        """Envoie une trame à un joueur ; un joueur qui ne lit plus ses messages est déconnecté."""
+        writer = self.writers.get(team)
+        if writer is None or writer.is_closing():
+            return
+        writer.write(frame)
+        if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            writer.close()
+
+    def send_state(self):
+        """Envoie l'état de la partie aux deux joueurs (encodé une seule fois)."""
+        frame = encode_frame(STATE, encode_state(self.state, self.roster))
+        for team in TEAMS:
+            self.send(team, frame)
+
+    def broadcast_state(self):
+        """Envoie l'état de la partie aux joueurs, et son delta aux spectateurs."""
+        self.send_state()
+        self.feed.publish()
+
+    def is_abandoned(self):
+        """Vérifie si plus personne (joueur ou spectateur) n'est connecté à la partie."""
+        return not self.writers and not self.feed.spectators
+
+
+class MatchServer:
+    """
+    Classe pour héberger les parties et gérer les connexions des joueurs.
+
+    ...
+    Attributs
+    ---------
+    matches : dict[str, Match]
+        Les parties en attente d'un joueur ou en cours, par nom.
+    game_map : GameMap
+        La carte des parties (chargée une seule fois).
+    """
+
+    def __init__(self, map_path=DEFAULT_MAP, seed=None):
+        self.map_path = map_path
+        self.game_map = load_map(map_path)
+        self.matches = {}
+        self.rng = random.Random(seed)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Ouvre le serveur TCP (à fermer par l'appelant, ou `serve_forever`)."""
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def handle_client(self, reader, writer):
+        """Gère la connexion d'un joueur : participation à une partie, puis ses actions jusqu'à la déconnexion."""
+        match, team = None, None
+        try:
+            kind, payload = await read_frame(reader)
+            if kind == SPECTATE:
+                await self.handle_spectator(decode_match_name(payload), reader, writer)
+                return
+            if kind != JOIN:
+                raise ValueError("Le premier message doit être JOIN ou SPECTATE")
+            name, composition = decode_join(payload)
+            match, team = self.join(name, composition, writer)
+
+            while True:
+                kind, payload = await read_frame(reader)
+                if kind != ACTION_MESSAGE:
+                    writer.write(encode_frame(REJECTED, f"Message inattendu ({kind})".encode("utf-8")))
+                else:
+                    try:
+                        action = decode_action_message(payload)
+                    except ValueError as error:
+                        # Refusée comme une action interdite : un message invalide ne fait pas perdre la partie
+                        writer.write(encode_frame(REJECTED, str(error).encode("utf-8")))
+                    else:
+                        self.handle_action(match, team, action)
+                await writer.drain()
+        except ValueError as error:
+            writer.write(encode_frame(REJECTED, str(error).encode("utf-8")))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Le client s'est déconnecté
+        finally:
+            if match is not None:
+                self.leave(match, team)
+            writer.close()
+
+    async def handle_spectator(self, name, reader, writer):
+        """Ajoute un spectateur à la partie `name` (créée en attente si besoin) jusqu'à sa déconnexion."""
+        match = self.matches.get(name)
+        if match is None:
+            match = self.matches[name] = Match(name, self.game_map, self.map_path)
+        match.feed.add(writer)
+        try:
+            while True:
+                kind, _ = await read_frame(reader)  # Un spectateur n'envoie rien : attente de la déconnexion
+                writer.write(encode_frame(REJECTED, f"Message inattendu d'un spectateur ({kind})".encode("utf-8")))
+        finally:
+            match.feed.remove(writer)
+            if match.state is None and match.is_abandoned() and self.matches.get(name) is match:
+                del self.matches[name]
+
+    def join(self, name, composition, writer):
+        """
+        Ajoute un joueur à la partie `name` (créée si besoin) et la démarre quand les deux joueurs sont là.
+
+        Retourne
+        -------
+        match, team : Match, str
+            La partie et l'équipe attribuée.
+
+        Lève ValueError si la partie est complète.
+        """
+        match = self.matches.get(name)
+        if match is None:
+            match = self.matches[name] = Match(name, self.game_map, self.map_path)
+        team = match.join(composition, writer)
+        if team is None:
+            raise ValueError(f"La partie {name} est complète")
+
+        if len(match.writers) == len(TEAMS):
+            match.start(self.rng.randrange(2 ** 32))
+        return match, team
+
+    def handle_action(self, match, team, action):
+        """Applique l'action d'un joueur si c'est son tour et qu'elle est autorisée, puis envoie le nouvel état."""
+        state = match.state
+        if state is None:
+            reason = "La partie n'a pas commencé"
+        elif state.winner is not None:
+            reason = "La partie est terminée"
+        elif state.team != team:
+            reason = "Ce n'est pas le tour de votre équipe"
+        elif not apply_action(state, action):
+            reason = f"Action {action} refusée"
+        else:
+            match.broadcast_state()
+            if state.winner is not None:
+                self.matches.pop(match.name, None)  # Le nom peut resservir
+            return
+        match.send(team, encode_frame(REJECTED, reason.encode("utf-8")))
+
+    def leave(self, match, team):
+        """Retire un joueur : son adversaire gagne par abandon si la partie était en cours."""
+        match.writers.pop(team, None)
+        state = match.state
+        if state is not None and state.winner is None:
+            state.winner = TEAMS[1 - TEAMS.index(team)]
+            match.broadcast_state()
+        if state is not None or match.is_abandoned():
+            if self.matches.get(match.name) is match:
+                del self.matches[match.name]
+
+
+async def run_server(host, port, map_path):
+    """Lance le serveur jusqu'à son interruption."""
+    server = MatchServer(map_path)
+    tcp_server = await server.serve(host, port)
+    print(f"Serveur de parties sur {host}:{port} (carte {map_path})")
+    async with tcp_server:
+        await tcp_server.serve_forever()
+
+
+def main(args):
+    """Lance le serveur avec les options de la ligne de commande."""
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    try:
+        asyncio.run(run_server(option("--host", DEFAULT_HOST), int(option("--port", DEFAULT_PORT)),
+                               option("--map", DEFAULT_MAP)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
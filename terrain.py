@@ -0,0 +1,147 @@
+"""
+Grille de terrain compacte.
+
+Le terrain est stocké sous forme de codes entiers dans un `bytearray` (une case
+par octet, ligne par ligne). Les masques de passage sont calculés une seule fois
+par classe de déplacement, ce qui réduit chaque test de case à une lecture
+d'entier. Les codes et les masques peuvent aussi venir directement d'un fichier
+de carte projeté en mémoire (voir `maps.py`).
+"""
+
+# Codes de terrain
+PASSAGE_VERT = 0
+MUR = 1
+ARBRE = 2
+MER = 3
+HEALING_ZONE = 4
+
+TERRAIN_NAMES = ["passage_vert", "mur", "arbre", "mer", "healing_zone"]
+TERRAIN_CODES = {name: code for code, name in enumerate(TERRAIN_NAMES)}
+
+# Classes de déplacement
+GROUND = 0        # Unités terrestres : bloquées par "mur", "arbre" et "mer"
+WATER_WALKER = 1  # Magicien : peut traverser "mer"
+
+BLOCKING_TERRAIN = {
+    GROUND: (MUR, ARBRE, MER),
+    WATER_WALKER: (MUR, ARBRE),
+}
+
+
+def passability_masks(codes):
+    """Calcule le masque de passage (1 si praticable, 0 sinon) de chaque classe de déplacement."""
+    codes = bytes(codes)
+    return {
+        movement_class: bytearray(codes.translate(bytes(0 if code in blocking else 1 for code in range(256))))
+        for movement_class, blocking in BLOCKING_TERRAIN.items()
+    }
+
+
+def find_cells(codes, code, width):
+    """Retourne les cases (x, y) dont le terrain a le code donné, ligne par ligne."""
+    codes = bytes(codes)
+    cells = []
+    index = codes.find(code)
+    while index >= 0:
+        cells.append((index % width, index // width))
+        index = codes.find(code, index + 1)
+    return cells
+
+
+class Terrain:
+    """
+    Classe pour représenter le terrain de la grille.
+
+    ...
+    Attributs
+    ---------
+    width : int
+        La largeur de la grille en nombre de cases.
+    height : int
+        La hauteur de la grille en nombre de cases.
+    codes : bytearray
+        Les codes de terrain, indexés par y * width + x.
+    passable : dict[int, bytearray]
+        Pour chaque classe de déplacement, 1 si la case est praticable, 0 sinon.
+    healing_zones : list[tuple]
+        Les cases de soin ("healing_zone").
+    version : int
+        Incrémenté à chaque modification du terrain (invalide les caches qui en dépendent).
+    """
+
+    def __init__(self, grid):
+        """
+        Construit le terrain à partir d'une grille de noms de terrain.
+
+        Paramètres
+        ----------
+        grid : list[list[str]]
+            La grille logique (par exemple "passage_vert", "mur", "mer").
+        """
+        codes = bytearray(TERRAIN_CODES[name] for row in grid for name in row)
+        self.load_codes(len(grid[0]), len(grid), codes)
+
+    @classmethod
+    def from_codes(cls, width, height, codes, passable=None, healing_zones=None):
+        """
+        Construit le terrain à partir de ses codes (et de ses couches dérivées si elles sont connues).
+
+        Paramètres
+        ----------
+        width, height : int
+            La taille de la grille en nombre de cases.
+        codes : bytearray or memoryview
+            Les codes de terrain, indexés par y * width + x.
+        passable : dict[int, bytearray or memoryview], optional
+            Les masques de passage déjà calculés (par exemple lus dans un cache).
+        healing_zones : list[tuple], optional
+            Les cases de soin déjà calculées.
+        """
+        terrain = cls.__new__(cls)
+        terrain.load_codes(width, height, codes, passable, healing_zones)
+        return terrain
+
+    def load_codes(self, width, height, codes, passable=None, healing_zones=None):
+        """Initialise le terrain et calcule les couches dérivées qui ne sont pas fournies."""
+        self.width = width
+        self.height = height
+        self.codes = codes
+        self.passable = passability_masks(codes) if passable is None else passable
+        self.healing_zones = find_cells(codes, HEALING_ZONE, width) if healing_zones is None else healing_zones
+        self.version = 0
+
+    def __getstate__(self):
+        """Copie les codes et les masques (éventuellement projetés en mémoire) pour la sérialisation."""
+        state = self.__dict__.copy()
+        state["codes"] = bytearray(self.codes)
+        state["passable"] = {movement_class: bytearray(mask) for movement_class, mask in self.passable.items()}
+        return state
+
+    def in_bounds(self, x, y):
+        """Vérifie si la case (x, y) est dans la grille."""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def code(self, x, y):
+        """Retourne le code de terrain de la case (x, y)."""
+        return self.codes[y * self.width + x]
+
+    def name(self, x, y):
+        """Retourne le nom du terrain de la case (x, y)."""
+        return TERRAIN_NAMES[self.codes[y * self.width + x]]
+
+    def is_passable(self, x, y, movement_class=GROUND):
+        """Vérifie si une unité de la classe de déplacement donnée peut aller en (x, y)."""
+        return (0 <= x < self.width and 0 <= y < self.height
+                and self.passable[movement_class][y * self.width + x] == 1)
+
+    def set_code(self, x, y, code):
+        """Modifie le terrain de la case (x, y) et met à jour les masques de passage."""
+        index = y * self.width + x
+        if self.codes[index] == HEALING_ZONE:
+            self.healing_zones.remove((x, y))
+        self.codes[index] = code
+        for movement_class, blocking in BLOCKING_TERRAIN.items():
+            self.passable[movement_class][index] = 0 if code in blocking else 1
+        if code == HEALING_ZONE:
+            self.healing_zones.append((x, y))
+        self.version += 1
@@ -0,0 +1,29 @@
+"""
+Configuration commune des tests : jeu sans fenêtre ni son, modules du jeu
+importables depuis la racine du dépôt et carte par défaut partagée.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+from maps import DEFAULT_MAP, load_map
+
+
+@pytest.fixture(scope="session")
+def game_map():
+    """La carte par défaut (chargée une seule fois)."""
+    return load_map(os.path.join(ROOT, DEFAULT_MAP))
+
+
+@pytest.fixture(scope="session")
+def terrain(game_map):
+    """Le terrain de la carte par défaut."""
+    return game_map.terrain
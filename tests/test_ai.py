@@ -0,0 +1,19 @@
+"""Recherche MCTS (ai.py) : respect de l'échéance absolue des recherches lancées dans les processus."""
+
+import time
+
+from ai import search
+from rules import GameState
+from unit import Archer, Wizard, Bomber, Swordsman, Invincible
+
+
+def test_search_stops_at_absolute_deadline(game_map):
+    terrain = game_map.terrain
+    units = {team: [unit_class(x, y, team, terrain) for unit_class, (x, y) in zip(classes, game_map.spawn_cells(team))]
+             for team, classes in (('player', [Archer, Wizard, Bomber]), ('enemy', [Swordsman, Invincible, Archer]))}
+    state = GameState(terrain, units['player'], units['enemy'], seed=0)
+
+    start = time.monotonic()
+    assert search(state, 10.0, seed=0, deadline=start) == {}  # Échéance déjà passée : budget ignoré
+    assert search(state, 10.0, seed=0, deadline=start + 0.2)
+    assert time.monotonic() - start < 1.0
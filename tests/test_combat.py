@@ -0,0 +1,74 @@
+"""Le calcul des combats par lots (combat.py) donne les mêmes dégâts que `rules.resolve_attack`."""
+
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from combat import UnitArrays, resolve_attacks, sight_mask
+from rules import resolve_attack
+from unit import Archer, Swordsman, Wizard, Invincible, Bomber
+
+UNIT_CLASSES = [Archer, Swordsman, Wizard, Invincible, Bomber]
+
+
+def random_units(terrain, rng, count=8, area=8):
+    """Retourne `count` unités au hasard (moitié par équipe) sur des cases distinctes d'un coin de la carte."""
+    cells = rng.sample([(x, y) for x in range(area) for y in range(area)], count)
+    units = []
+    for index, (x, y) in enumerate(cells):
+        unit = rng.choice(UNIT_CLASSES)(x, y, 'player' if index < count // 2 else 'enemy', terrain)
+        unit.health = rng.choice([unit.health, 1, 0.5])  # Certaines cibles meurent
+        units.append(unit)
+    return units
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_single_attacker_matches_rules(terrain, seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        units = random_units(terrain, rng)
+        arrays = UnitArrays.from_units(units)
+        attacker, attack_type = rng.randrange(len(units)), rng.randrange(2)
+
+        reference = [copy.copy(unit) for unit in units]
+        unit = reference[attacker]
+        targets = [target for target in reference if target.team != unit.team]
+        resolve_attack(unit, unit.get_attackable_cells(attack_type), targets, attack_type)
+
+        attackers = np.zeros(len(units), dtype=bool)
+        attackers[attacker] = True
+        resolve_attacks(arrays, attackers, attack_type, sight_mask(arrays, terrain))
+        assert np.allclose(arrays.health, [unit.health for unit in reference])
+
+
+def test_simultaneous_attacks_add_up(terrain):
+    # Sans mort pendant le lot, les attaques simultanées valent la somme des attaques une à une
+    rng = random.Random(0)
+    for _ in range(100):
+        units = random_units(terrain, rng)
+        for unit in units:
+            unit.health = 10 ** 6
+        arrays = UnitArrays.from_units(units)
+
+        reference = [copy.copy(unit) for unit in units]
+        for unit in reference:
+            targets = [target for target in reference if target.team != unit.team]
+            resolve_attack(unit, unit.get_attackable_cells(0), targets, 0)
+
+        resolve_attacks(arrays, np.ones(len(units), dtype=bool), 0, sight_mask(arrays, terrain))
+        assert np.allclose(arrays.health, [unit.health for unit in reference])
+
+
+def test_batch_of_matches_matches_single_match(terrain):
+    rng = random.Random(1)
+    units = random_units(terrain, rng)
+    single = UnitArrays.from_units(units)
+    batch = single.tile(4)
+
+    attackers = np.zeros(len(units), dtype=bool)
+    attackers[::2] = True
+    resolve_attacks(single, attackers, 1, sight_mask(single, terrain))
+    resolve_attacks(batch, np.broadcast_to(attackers, batch.x.shape), 1, sight_mask(batch, terrain))
+    assert np.allclose(batch.health, single.health)
@@ -0,0 +1,36 @@
+"""Format binaire des cartes (maps.py) : aller-retour et refus des fichiers invalides."""
+
+import pytest
+
+from maps import save_map, load_map
+from terrain import Terrain, TERRAIN_NAMES
+
+
+@pytest.fixture
+def map_path(tmp_path):
+    """Une carte 5 x 4 enregistrée, avec un mur et une zone de soin."""
+    grid = [["passage_vert"] * 5 for _ in range(4)]
+    grid[1][2] = "mur"
+    grid[3][4] = "healing_zone"
+    path = str(tmp_path / "test.map")
+    save_map(path, Terrain(grid), name="Test", spawns={'player': [(0, 0)], 'enemy': [(4, 0)]})
+    return path
+
+
+def test_round_trip(map_path):
+    game_map = load_map(map_path, use_cache=False)
+    terrain = game_map.terrain
+    assert (terrain.width, terrain.height) == (5, 4)
+    assert terrain.name(2, 1) == "mur" and terrain.name(4, 3) == "healing_zone"
+    assert game_map.name == "Test" and game_map.spawn_cells('enemy') == [(4, 0)]
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_unknown_terrain_code_is_rejected(map_path, use_cache):
+    with open(map_path, "rb") as file:
+        data = bytearray(file.read())
+    data[-1] = len(TERRAIN_NAMES)  # Dernière case : code sans terrain
+    with open(map_path, "wb") as file:
+        file.write(data)
+    with pytest.raises(ValueError, match="code de terrain inconnu"):
+        load_map(map_path, use_cache=use_cache)
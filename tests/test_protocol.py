@@ -0,0 +1,231 @@
+"""
+Protocole réseau (protocol.py) et diffusion aux spectateurs (broadcast.py) :
+les copies des joueurs et des spectateurs restent identiques à l'état du serveur.
+
+Le serveur (`server.Match`) écrit dans des connexions factices ; les trames sont
+décodées par le vrai client (`client.RemoteMatch.poll`), sans socket.
+"""
+
+import queue
+
+import pytest
+
+from ai import GreedyController
+from broadcast import MAX_SPECTATOR_BUFFER
+from client import RemoteMatch
+from maps import DEFAULT_MAP
+from protocol import (FRAME_HEADER, WELCOME, KEYFRAME, DELTA, DELTA_ENTRY, REMOVED, SEQUENCE,
+                      encode_frame, encode_welcome, encode_keyframe, encode_delta, unit_states)
+from rules import apply_action
+from server import Match
+from terrain import Terrain
+from unit import Archer, Wizard, Bomber, Swordsman, Invincible
+
+COMPOSITIONS = {'player': [Archer, Wizard, Bomber], 'enemy': [Swordsman, Invincible, Bomber]}
+
+
+class FakeTransport:
+    """Transport factice : données en attente d'envoi et fermeture réglables par le test."""
+
+    def __init__(self):
+        self.buffer_size = 0
+        self.closing = False
+
+    def get_write_buffer_size(self):
+        return self.buffer_size
+
+    def is_closing(self):
+        return self.closing
+
+
+class FakeWriter:
+    """Connexion factice qui garde les trames écrites."""
+
+    def __init__(self):
+        self.frames = []
+        self.transport = FakeTransport()
+
+    def write(self, frame):
+        self.frames.append(frame)
+
+    def is_closing(self):
+        return self.transport.closing
+
+    def close(self):
+        self.transport.closing = True
+
+
+def frame_kind(frame):
+    return FRAME_HEADER.unpack_from(frame)[0]
+
+
+def offline_client(terrain):
+    """Retourne un client dont les messages sont fournis par le test (voir `deliver`) au lieu d'un socket."""
+    client = object.__new__(RemoteMatch)
+    client.terrain = terrain
+    client.team = None
+    client.state = None
+    client.roster = []
+    client.sequence = None
+    client.messages = queue.SimpleQueue()
+    return client
+
+
+def deliver(client, frames):
+    """Transmet des trames au client et retourne les événements de `poll`."""
+    for frame in frames:
+        client.messages.put((frame_kind(frame), frame[FRAME_HEADER.size:]))
+    return client.poll()
+
+
+def signature(state):
+    return (state.turn, state.team, state.unit_index, state.phase, state.remaining_moves, state.winner,
+            state.reach.origin if state.winner is None else None,
+            [(unit.__class__.__name__, unit.team, unit.x, unit.y, unit.health)
+             for unit in state.player_units + state.enemy_units],
+            sorted(state.occupancy.cells))
+
+
+@pytest.fixture
+def match(game_map):
+    """Une partie du serveur, commencée, avec un spectateur arrivé avant le début."""
+    match = Match("test", game_map, DEFAULT_MAP)
+    for team in ('player', 'enemy'):
+        assert match.join(COMPOSITIONS[team], FakeWriter()) == team
+    early = FakeWriter()
+    match.feed.add(early)
+    match.start(seed=7)
+    match.early = early
+    return match
+
+
+def play(match, actions, on_update=None):
+    """Applique `actions` actions de l'IA gloutonne sur le serveur (moins si la partie se termine) et diffuse chaque état."""
+    state = match.state
+    controllers = {team: GreedyController(team, seed=index) for index, team in enumerate(('player', 'enemy'))}
+    played = deaths = 0
+    while state.winner is None and played < actions:
+        for action in controllers[state.team].choose_actions(state):
+            events = apply_action(state, action)
+            assert events
+            deaths += sum(event[0] == "death" for event in events)
+            match.broadcast_state()
+            played += 1
+            if on_update is not None:
+                on_update(played)
+            if played == actions:
+                break  # La suite du plan est choisie à nouveau au prochain appel
+    return deaths
+
+
+def test_players_and_spectators_mirror_server(match, terrain):
+    writers = {team: match.writers[team] for team in ('player', 'enemy')}
+    players = {team: offline_client(terrain) for team in writers}
+    spectator = offline_client(terrain)
+    late, lagging = FakeWriter(), FakeWriter()
+
+    def on_update(played):
+        if played == 30:
+            match.feed.add(late)     # Arrivée en cours de partie : état complet puis deltas
+            match.feed.add(lagging)
+        # Spectateur trop lent pendant un moment, puis de nouveau à jour
+        lagging.transport.buffer_size = MAX_SPECTATOR_BUFFER + 1 if 50 <= played < 80 else 0
+        for team, client in players.items():
+            deliver(client, writers[team].frames)
+            writers[team].frames.clear()
+            assert signature(client.state) == signature(match.state)
+        deliver(spectator, match.early.frames)
+        match.early.frames.clear()
+        assert signature(spectator.state) == signature(match.state)
+
+    deaths = play(match, 400, on_update)
+    assert deaths > 0  # Des unités ont été retirées par les deltas
+    match.broadcast_state()  # État final, reçu par le spectateur lent s'il était en retard
+
+    assert [players[team].team for team in ('player', 'enemy')] == ['player', 'enemy']
+    assert spectator.team is None
+    assert [frame_kind(frame) for frame in lagging.frames].count(KEYFRAME) == 2  # Arrivée, puis resynchronisation
+    for writer in (late, lagging):
+        client = offline_client(terrain)
+        deliver(client, writer.frames)
+        assert signature(client.state) == signature(match.state)
+
+
+def test_delta_after_gap_is_ignored_until_keyframe(match, terrain):
+    spectator = offline_client(terrain)
+    deliver(spectator, match.early.frames[:2])  # WELCOME puis KEYFRAME (état 0)
+    assert spectator.sequence == 0
+
+    play(match, 3)
+    deltas = match.early.frames[2:]
+    assert [frame_kind(frame) for frame in deltas] == [DELTA] * 3
+    before = signature(spectator.state)
+    assert deliver(spectator, deltas[1:]) == []  # Il manque l'état 1 : les deltas 2 et 3 sont ignorés
+    assert spectator.sequence == 0 and signature(spectator.state) == before
+
+    keyframe = encode_frame(KEYFRAME, encode_keyframe(match.feed.sequence, match.state, match.roster))
+    assert deliver(spectator, [keyframe]) == [("state",)]
+    assert spectator.sequence == 3 and signature(spectator.state) == signature(match.state)
+
+
+def test_late_joiners_share_one_keyframe(match):
+    play(match, 5)
+    first, second = FakeWriter(), FakeWriter()
+    match.feed.add(first)
+    match.feed.add(second)
+    assert [frame_kind(frame) for frame in first.frames] == [WELCOME, KEYFRAME]
+    assert first.frames[1] is second.frames[1]  # Encodé une seule fois pour les deux spectateurs
+    assert SEQUENCE.unpack_from(first.frames[1], FRAME_HEADER.size)[0] == match.feed.sequence
+
+    play(match, 1)
+    assert frame_kind(first.frames[-1]) == DELTA and first.frames[-1] is second.frames[-1]
+
+
+def test_lagging_spectator_resyncs_with_keyframe(match):
+    writer = FakeWriter()
+    match.feed.add(writer)
+    writer.transport.buffer_size = MAX_SPECTATOR_BUFFER + 1
+    written = len(writer.frames)
+    play(match, 3)
+    assert len(writer.frames) == written  # Rien n'est envoyé tant que la connexion ne se vide pas
+
+    writer.transport.buffer_size = 0
+    play(match, 2)
+    assert [frame_kind(frame) for frame in writer.frames[written:]] == [KEYFRAME, DELTA]
+
+
+def test_closed_spectator_is_removed(match):
+    writer = FakeWriter()
+    match.feed.add(writer)
+    writer.transport.closing = True
+    play(match, 1)
+    assert writer not in match.feed.spectators
+
+
+def test_removed_unit_delta(match, terrain):
+    state, roster = match.state, match.roster
+    previous = unit_states(state, roster)
+    target = state.enemy_units[1]
+    state.enemy_units.remove(target)
+    state.occupancy.remove(target)
+    current = unit_states(state, roster)
+
+    payload = encode_delta(1, state, previous, current)
+    index = roster.index(target)
+    assert payload.endswith(bytes([1]) + DELTA_ENTRY.pack(index, REMOVED))  # Une seule entrée, sans position ni santé
+
+    spectator = offline_client(terrain)
+    deliver(spectator, match.early.frames[:2])
+    deliver(spectator, [encode_frame(DELTA, payload)])
+    assert spectator.sequence == 1
+    assert spectator.roster[index] not in spectator.state.enemy_units
+    assert (target.x, target.y) not in spectator.state.occupancy.cells
+    assert signature(spectator.state) == signature(state)
+
+
+def test_welcome_for_other_map_is_rejected(match):
+    client = offline_client(Terrain([["passage_vert"] * 17 for _ in range(17)]))  # Pas la carte du serveur
+    client.close = lambda: None  # Pas de socket
+    frame = encode_frame(WELCOME, encode_welcome(None, match.state, DEFAULT_MAP, match.roster))
+    events = deliver(client, [frame])
+    assert events[0][0] == "rejected" and events[-1] == ("closed",)
@@ -0,0 +1,61 @@
+"""
+Affichage par cases modifiées (renderer.py) : un changement du brouillard de guerre
+ne repeint que les cases dont la visibilité a changé, avec le même résultat qu'une
+composition complète du fond.
+"""
+
+import pygame
+import pytest
+
+from renderer import Renderer
+from unit import Swordsman, Archer
+from visibility import TeamFog
+
+TILE_SIZE = 8
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pygame.display.init()
+    yield pygame.display.set_mode((16 * TILE_SIZE, 16 * TILE_SIZE))
+    pygame.display.quit()
+
+
+@pytest.fixture(params=["colors", "image"])
+def renderer(request, screen, terrain):
+    """Un renderer sur la carte par défaut, avec les couleurs des terrains ou une image de la carte."""
+    image = None
+    if request.param == "image":
+        image = pygame.Surface((terrain.width * TILE_SIZE, terrain.height * TILE_SIZE))
+        for x in range(terrain.width):
+            image.fill((x * 15 % 256, 80, 160), pygame.Rect(x * TILE_SIZE, 0, TILE_SIZE, image.get_height()))
+    return Renderer(screen, terrain, TILE_SIZE, 16, 16, image)
+
+
+def composed_layer(renderer, fog):
+    """Retourne le fond composé entièrement pour le brouillard donné."""
+    renderer.compose_background(fog)
+    return pygame.image.tobytes(renderer.static_layer, "RGB")
+
+
+def test_fog_change_repaints_only_changed_cells(renderer, terrain):
+    units = [Swordsman(1, 1, 'player', terrain), Archer(14, 14, 'enemy', terrain)]
+    fogs = {team: TeamFog(terrain, team) for team in ('player', 'enemy')}
+    for team, fog in fogs.items():
+        fog.update([unit for unit in units if unit.team == team])
+    renderer.draw_board(units, {}, fogs['player'])
+
+    units[0].x, units[0].y = 3, 2
+    before = fogs['player'].visible
+    assert fogs['player'].update([units[0]])
+    rects = renderer.draw_board(units, {}, fogs['player'])
+    changed = fogs['player'].changed_cells(before, renderer.camera.visible_cells())
+    assert changed and renderer.board_rect not in rects
+    assert {(rect.x // TILE_SIZE, rect.y // TILE_SIZE) for rect in rects} >= set(changed)
+    incremental = pygame.image.tobytes(renderer.static_layer, "RGB")
+    assert incremental == composed_layer(renderer, fogs['player'])
+
+    rects = renderer.draw_board(units, {}, fogs['enemy'])  # Changement d'équipe qui regarde l'écran
+    assert renderer.board_rect not in rects
+    incremental = pygame.image.tobytes(renderer.static_layer, "RGB")
+    assert incremental == composed_layer(renderer, fogs['enemy'])
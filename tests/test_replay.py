@@ -0,0 +1,112 @@
+"""Journal binaire (replay.py) : une partie enregistrée se rejoue à l'identique, en entier ou à partir d'un instantané."""
+
+import os
+
+import pytest
+
+from ai import GreedyController
+from maps import DEFAULT_MAP
+from replay import (ActionLog, ActionRecorder, encode_action, decode_action, ACTION, SNAPSHOT_HEADER,
+                    UNIT_STATE)
+from rules import GameState, VALIDATE_ACTION, HEAL_ACTION, SKIP_ACTION, move_action, attack_action, apply_action
+from unit import Archer, Wizard, Bomber, Swordsman, Invincible
+
+from conftest import ROOT
+
+MAX_TURNS = 40
+
+
+def signature(state):
+    """Résume un état : déroulement du tour, unités vivantes et générateur aléatoire."""
+    return (state.turn, state.team, state.unit_index, state.phase, state.remaining_moves, state.winner,
+            [(unit.__class__.__name__, unit.team, unit.x, unit.y, unit.health)
+             for unit in state.player_units + state.enemy_units],
+            state.rng.getstate())
+
+
+@pytest.fixture(scope="module")
+def recorded_match(tmp_path_factory, game_map):
+    """Joue une partie entre deux IA gloutonnes en l'enregistrant (instantané tous les 3 tours)."""
+    terrain = game_map.terrain
+    units = {team: [unit_class(x, y, team, terrain) for unit_class, (x, y) in zip(classes, game_map.spawn_cells(team))]
+             for team, classes in (('player', [Archer, Wizard, Bomber]), ('enemy', [Swordsman, Invincible, Archer]))}
+    state = GameState(terrain, units['player'], units['enemy'], seed=1234)
+    path = str(tmp_path_factory.mktemp("logs") / "match.glog")
+    recorder = ActionRecorder(path, state, os.path.join(ROOT, DEFAULT_MAP), snapshot_interval=3)
+    controllers = {team: GreedyController(team, seed=index) for index, team in enumerate(('player', 'enemy'))}
+
+    actions = []
+    while state.winner is None and state.turn <= MAX_TURNS:
+        for action in controllers[state.team].choose_actions(state):
+            events = apply_action(state, action)
+            assert events
+            recorder.record(action, events)
+            actions.append(action)
+    recorder.close()
+    return path, state, actions
+
+
+def test_header_and_actions_round_trip(recorded_match):
+    path, state, actions = recorded_match
+    log = ActionLog(path)
+    assert log.seed == 1234
+    assert log.map_path == os.path.join(ROOT, DEFAULT_MAP)
+    assert [(unit_class, team) for unit_class, team, _, _ in log.roster] == \
+           [(Archer, 'player'), (Wizard, 'player'), (Bomber, 'player'),
+            (Swordsman, 'enemy'), (Invincible, 'enemy'), (Archer, 'enemy')]
+    assert log.actions == actions
+    assert len(log.snapshots) >= 2
+
+
+def test_full_replay_equals_live_state(recorded_match):
+    path, state, _ = recorded_match
+    assert signature(ActionLog(path).replay()) == signature(state)
+
+
+def test_seek_equals_replay_from_start(recorded_match):
+    path, state, _ = recorded_match
+    log = ActionLog(path)
+    from_start = ActionLog(path)
+    from_start.snapshots = []  # Sans instantanés : rejeu depuis le début de la partie
+    terrain = log.load_terrain()
+    for turn in range(1, state.turn + 1):
+        assert signature(log.replay(turn=turn, terrain=terrain)) == \
+               signature(from_start.replay(turn=turn, terrain=terrain)), f"tour {turn}"
+
+
+def test_interrupted_log_stops_at_last_complete_action(recorded_match, tmp_path):
+    path, _, actions = recorded_match
+    with open(path, "rb") as file:
+        data = file.read()
+    truncated = tmp_path / "interrupted.glog"
+    truncated.write_bytes(data[:-1])  # Dernière action incomplète
+    log = ActionLog(str(truncated))
+    assert log.actions == actions[:-1]
+    log.replay()
+
+
+@pytest.mark.parametrize("offset, value", [
+    (0, 9),                         # Version inconnue du générateur
+    (1 + 624 * 4, 0xFFFF),          # Position hors de l'état (dernier des 625 mots)
+])
+def test_tampered_snapshot_is_rejected(recorded_match, tmp_path, offset, value):
+    path, state, _ = recorded_match
+    log = ActionLog(path)
+    turn, _, snapshot_offset = log.snapshots[0]
+    rng_offset = snapshot_offset + SNAPSHOT_HEADER.size + len(log.roster) * UNIT_STATE.size
+    data = bytearray(log.data)
+    data[rng_offset + offset:rng_offset + offset + 2] = value.to_bytes(2, "little")
+    tampered = tmp_path / "tampered.glog"
+    tampered.write_bytes(bytes(data))
+
+    log = ActionLog(str(tampered))
+    with pytest.raises(ValueError):
+        log.replay(turn=turn)
+
+
+@pytest.mark.parametrize("action", [move_action(0, -1), move_action(1, 0), VALIDATE_ACTION,
+                                    attack_action(0), attack_action(1), HEAL_ACTION, SKIP_ACTION])
+def test_action_encoding_round_trip(action):
+    data = encode_action(action)
+    assert len(data) == ACTION.size
+    assert decode_action(*ACTION.unpack(data)) == action
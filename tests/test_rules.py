@@ -0,0 +1,177 @@
+"""Moteur de règles (rules.py) : transitions des actions, refus des actions interdites, fin de tour et victoire."""
+
+import pytest
+
+from rules import (GameState, MOVE_PHASE, ACTION_PHASE, VALIDATE_ACTION, HEAL_ACTION, SKIP_ACTION,
+                   move_action, attack_action, apply_action, legal_actions, is_legal)
+from terrain import Terrain
+from unit import Swordsman, Wizard, Invincible, Bomber
+
+
+@pytest.fixture
+def open_terrain():
+    """Un terrain 7 x 7 entièrement praticable, avec un mur en (6, 0)."""
+    grid = [["passage_vert"] * 7 for _ in range(7)]
+    grid[0][6] = "mur"
+    return Terrain(grid)
+
+
+def make_state(terrain, players, enemies):
+    """Crée une partie à partir de listes (classe, x, y) pour chaque équipe."""
+    return GameState(terrain,
+                     [unit_class(x, y, 'player', terrain) for unit_class, x, y in players],
+                     [unit_class(x, y, 'enemy', terrain) for unit_class, x, y in enemies],
+                     seed=0)
+
+
+def end_unit_turn(state):
+    """Termine le tour de l'unité active sans agir (validation puis passe)."""
+    if state.phase == MOVE_PHASE:
+        assert apply_action(state, VALIDATE_ACTION)
+    assert apply_action(state, SKIP_ACTION)
+
+
+def test_initial_state(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [(Swordsman, 6, 6)])
+    assert state.team == 'player' and state.unit_index == 0 and state.turn == 1
+    assert state.phase == MOVE_PHASE
+    assert state.remaining_moves == Swordsman.movement_speed
+    assert state.winner is None
+    assert state.active_unit is state.player_units[0]
+
+
+def test_move(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [(Swordsman, 6, 6)])
+    unit = state.active_unit
+    events = apply_action(state, move_action(1, 0))
+    assert events == [("move", unit, (0, 0), (1, 0))]
+    assert (unit.x, unit.y) == (1, 0)
+    assert state.remaining_moves == Swordsman.movement_speed - 1
+    assert state.phase == MOVE_PHASE
+    assert state.occupancy.cells.get((1, 0)) is unit and (0, 0) not in state.occupancy.cells
+
+
+def test_last_move_starts_action_phase(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [(Swordsman, 6, 6)])
+    for _ in range(Swordsman.movement_speed):
+        assert apply_action(state, move_action(0, 1))
+    assert state.phase == ACTION_PHASE and state.remaining_moves == 0
+    assert legal_actions(state) == [attack_action(0), attack_action(1), SKIP_ACTION]
+
+
+def test_validate(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [(Swordsman, 6, 6)])
+    unit = state.active_unit
+    assert apply_action(state, VALIDATE_ACTION) == [("validate", unit)]
+    assert state.phase == ACTION_PHASE and state.remaining_moves == 0
+    assert state.active_unit is unit  # Le tour de l'unité continue jusqu'à son action
+
+
+def test_attack(open_terrain):
+    state = make_state(open_terrain, [(Invincible, 2, 2), (Swordsman, 0, 0)], [(Bomber, 3, 2), (Swordsman, 6, 6)])
+    attacker, target = state.player_units[0], state.enemy_units[0]
+    assert (target.x, target.y) in attacker.get_attackable_cells(0)
+    damage = max(0, attacker.attack_types[0].power - target.defense)
+    assert damage > 0
+
+    apply_action(state, VALIDATE_ACTION)
+    events = apply_action(state, attack_action(0))
+    assert ("damage", attacker, target, damage) in events
+    assert events[-1] == ("end_turn", attacker)
+    assert target.health == Bomber.max_health - damage
+    assert state.active_unit is state.player_units[1] and state.phase == MOVE_PHASE
+
+
+def test_heal_only_for_wounded_wizard(open_terrain):
+    state = make_state(open_terrain, [(Wizard, 0, 0)], [(Swordsman, 6, 6)])
+    wizard = state.active_unit
+    apply_action(state, VALIDATE_ACTION)
+    assert HEAL_ACTION not in legal_actions(state)  # Pleine santé
+    assert apply_action(state, HEAL_ACTION) == []
+
+    wizard.health = Wizard.max_health - 2
+    assert is_legal(state, HEAL_ACTION)
+    events = apply_action(state, HEAL_ACTION)
+    assert events[0] == ("heal", wizard, 2)  # Soin limité à la santé maximale
+    assert wizard.health == Wizard.max_health
+
+
+def test_heal_refused_for_other_classes(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [(Swordsman, 6, 6)])
+    state.active_unit.health = 1
+    apply_action(state, VALIDATE_ACTION)
+    assert apply_action(state, HEAL_ACTION) == []
+
+
+def test_skip_ends_unit_turn(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0), (Swordsman, 1, 1)], [(Swordsman, 6, 6)])
+    unit = state.active_unit
+    apply_action(state, VALIDATE_ACTION)
+    assert apply_action(state, SKIP_ACTION) == [("skip", unit), ("end_turn", unit)]
+    assert state.unit_index == 1 and state.active_unit is state.player_units[1]
+
+
+@pytest.mark.parametrize("action", [
+    move_action(-1, 0),          # Hors de la grille
+    move_action(0, 1),           # Case occupée par une unité alliée
+    attack_action(0),            # Attaque pendant la phase de déplacement
+    SKIP_ACTION,                 # Passe pendant la phase de déplacement
+    HEAL_ACTION,                 # Soin pendant la phase de déplacement
+    ("teleport", 3, 3),          # Action inconnue
+])
+def test_illegal_actions_are_refused(open_terrain, action):
+    state = make_state(open_terrain, [(Swordsman, 0, 0), (Swordsman, 0, 1)], [(Swordsman, 6, 6)])
+    unit = state.active_unit
+    assert not is_legal(state, action)
+    assert apply_action(state, action) == []
+    assert (unit.x, unit.y) == (0, 0) and unit.health == Swordsman.max_health
+    assert state.phase == MOVE_PHASE and state.remaining_moves == Swordsman.movement_speed
+    assert state.active_unit is unit
+
+
+def test_moves_refused_in_action_phase_and_into_walls(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 5, 0)], [(Swordsman, 6, 6)])
+    assert apply_action(state, move_action(1, 0)) == []  # Mur en (6, 0)
+    apply_action(state, VALIDATE_ACTION)
+    assert apply_action(state, move_action(0, 1)) == []
+    assert apply_action(state, VALIDATE_ACTION) == []
+
+
+def test_end_of_team_turn_and_next_turn(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0), (Swordsman, 1, 1)], [(Swordsman, 6, 6)])
+    end_unit_turn(state)
+    end_unit_turn(state)
+    assert state.team == 'enemy' and state.unit_index == 0 and state.turn == 1
+    assert state.active_unit is state.enemy_units[0]
+    assert apply_action(state, VALIDATE_ACTION)
+
+    end_unit_turn(state)
+    assert state.team == 'player' and state.unit_index == 0 and state.turn == 2
+    assert state.remaining_moves == Swordsman.movement_speed  # Nouveau tour de l'unité
+
+
+def test_killing_last_unit_wins(open_terrain):
+    state = make_state(open_terrain, [(Invincible, 2, 2)], [(Bomber, 3, 2)])
+    attacker, target = state.player_units[0], state.enemy_units[0]
+    target.health = 1
+    apply_action(state, VALIDATE_ACTION)
+    events = apply_action(state, attack_action(0))
+    assert ("death", target) in events
+    assert state.enemy_units == [] and (3, 2) not in state.occupancy.cells
+    assert state.winner == 'player'
+    assert state.active_unit is None and legal_actions(state) == []
+    assert apply_action(state, VALIDATE_ACTION) == []
+
+
+def test_state_without_units_is_already_won(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [])
+    assert state.winner == 'player' and state.active_unit is None
+
+
+def test_clone_is_independent(open_terrain):
+    state = make_state(open_terrain, [(Swordsman, 0, 0)], [(Swordsman, 6, 6)])
+    simulation = state.clone()
+    apply_action(simulation, move_action(1, 0))
+    assert (state.active_unit.x, state.active_unit.y) == (0, 0)
+    assert state.remaining_moves == Swordsman.movement_speed
+    assert apply_action(state, move_action(0, 1))
@@ -0,0 +1,91 @@
+"""
+Serveur de parties (server.py) : connexions de deux joueurs sur la boucle locale,
+refus des messages invalides et abandon d'un joueur.
+"""
+
+import asyncio
+import os
+
+from maps import DEFAULT_MAP
+from protocol import (ACTION_MESSAGE, JOIN, WELCOME, STATE, REJECTED, STATE_HEADER,
+                      encode_frame, encode_join, read_frame)
+from replay import encode_action
+from rules import VALIDATE_ACTION
+from server import MatchServer
+from unit import Archer, Wizard, Bomber, Swordsman, Invincible
+
+from conftest import ROOT
+
+COMPOSITIONS = {'player': [Archer, Wizard, Bomber], 'enemy': [Swordsman, Invincible, Bomber]}
+TIMEOUT = 5
+
+
+async def receive(reader):
+    """Attend la prochaine trame du serveur."""
+    return await asyncio.wait_for(read_frame(reader), TIMEOUT)
+
+
+async def started_match(server):
+    """Connecte deux joueurs à la partie "test" ; retourne leurs connexions une fois l'état initial reçu."""
+    tcp_server = await server.serve("127.0.0.1", 0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    players = {}
+    for team in ('player', 'enemy'):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(encode_frame(JOIN, encode_join("test", COMPOSITIONS[team])))
+        await writer.drain()
+        players[team] = reader, writer
+    for reader, _ in players.values():
+        assert [(await receive(reader))[0] for _ in range(2)] == [WELCOME, STATE]
+    return tcp_server, players
+
+
+def winner(payload):
+    """Retourne le code du vainqueur d'un message STATE (0 si la partie continue)."""
+    return STATE_HEADER.unpack_from(payload)[5]
+
+
+def test_malformed_action_is_rejected_without_losing():
+    async def scenario():
+        server = MatchServer(os.path.join(ROOT, DEFAULT_MAP), seed=0)
+        tcp_server, players = await started_match(server)
+        reader, writer = players['player']
+        match = server.matches["test"]
+
+        for payload in (b"\x02", bytes([99, 0, 0])):  # Taille incorrecte, type d'action inconnu
+            writer.write(encode_frame(ACTION_MESSAGE, payload))
+            await writer.drain()
+            assert (await receive(reader))[0] == REJECTED
+        assert server.matches.get("test") is match and match.state.winner is None
+
+        writer.write(encode_frame(ACTION_MESSAGE, encode_action(VALIDATE_ACTION)))  # La connexion reste utilisable
+        await writer.drain()
+        for team_reader, _ in players.values():
+            kind, payload = await receive(team_reader)
+            assert kind == STATE and winner(payload) == 0
+
+        for _, team_writer in players.values():
+            team_writer.close()
+        tcp_server.close()
+        await tcp_server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_disconnected_player_forfeits():
+    async def scenario():
+        server = MatchServer(os.path.join(ROOT, DEFAULT_MAP), seed=0)
+        tcp_server, players = await started_match(server)
+        match = server.matches["test"]
+
+        players['enemy'][1].close()
+        kind, payload = await receive(players['player'][0])
+        assert kind == STATE and winner(payload) == 1  # Victoire de 'player' par abandon
+        assert match.state.winner == 'player'
+        assert "test" not in server.matches and 'enemy' not in match.writers
+
+        players['player'][1].close()
+        tcp_server.close()
+        await tcp_server.wait_closed()
+
+    asyncio.run(scenario())
@@ -0,0 +1,123 @@
+"""
+Cache de polices et de textes rendus.
+
+Les polices sont partagées (une instance par taille) et les textes rendus sont
+mis en cache, indexés par (texte, police, couleur). Le découpage des textes
+longs en lignes est lui aussi mémorisé : les menus et le panneau d'information
+ne refont plus ce travail à chaque image.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """
+    Classe pour partager les polices et mettre en cache les textes rendus.
+
+    ...
+    Attributs
+    ---------
+    fonts : dict[int, pygame.font.Font]
+        Les polices partagées, indexées par leur taille.
+    surfaces : OrderedDict[tuple, pygame.Surface]
+        Les textes rendus, du moins au plus récemment utilisé.
+    lines : dict[tuple, list[str]]
+        Les découpages de textes en lignes déjà calculés.
+    max_surfaces : int
+        Le nombre maximal de textes rendus gardés en cache.
+    """
+
+    def __init__(self, max_surfaces=512):
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.lines = {}
+        self.max_surfaces = max_surfaces
+
+    def font(self, size):
+        """Retourne la police par défaut de la taille donnée (créée une seule fois)."""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, font, color):
+        """
+        Retourne le texte rendu, créé au premier appel puis mis en cache.
+
+        Paramètres
+        ----------
+        text : str
+            Le texte à afficher.
+        font : pygame.font.Font
+            La police (obtenue avec `font(size)`).
+        color : tuple
+            La couleur du texte.
+
+        Retourne
+        -------
+        surface : pygame.Surface
+            Le texte rendu.
+        """
+        key = (text, font, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)  # Plus récemment utilisé
+            return surface
+
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)  # Retirer le moins récemment utilisé
+        return surface
+
+    def wrap(self, text, font, max_width):
+        """
+        Découpe un texte en plusieurs lignes pour qu'il tienne dans une largeur donnée.
+
+        Paramètres
+        ----------
+        text : str
+            Le texte à découper.
+        font : pygame.font.Font
+            La police utilisée pour mesurer la largeur du texte.
+        max_width : int
+            La largeur maximale en pixels pour chaque ligne.
+
+        Retourne
+        -------
+        lines : list[str]
+            Liste des lignes découpées.
+        """
+        if not text:  # Vérifiez si le texte est vide ou None
+            return []
+
+        key = (text, font, max_width)
+        lines = self.lines.get(key)
+        if lines is not None:
+            return list(lines)
+
+        words = text.split(' ')  # Diviser le texte en mots
+        lines = []               # Initialisation
+        current_line = ""        # Initialisation
+
+        for word in words:
+            test_line = current_line + word + " "
+            # Vérifier si la ligne testée dépasse la largeur maximale
+            if font.size(test_line)[0] <= max_width:
+                current_line = test_line
+            else:
+                lines.append(current_line.strip()) # Ajouter la ligne actuelle à la liste
+                current_line = word + " "  # Commencer une nouvelle ligne avec le mot actuel
+
+        if current_line:
+            lines.append(current_line.strip())  # Ajouter la dernière ligne restante
+
+        self.lines[key] = lines
+        return list(lines)
+
+
+# Cache partagé par tout le jeu
+text_cache = TextCache()
@@ -0,0 +1,122 @@
+"""
+Carte des menaces de chaque équipe.
+
+Pour chaque case, la carte donne les dégâts qu'une unité de défense donnée y
+subirait si toutes les unités de l'équipe attaquaient depuis leur position
+actuelle, chacune avec son attaque la plus forte qui atteint la case (en ligne
+de vue) : somme sur les attaquants de max(0, puissance - défense).
+
+Chaque unité contribue par ses cases menacées, mises en cache par classe et
+position (`Unit.get_threatened_cells`). Quand une unité se déplace ou meurt,
+seule sa contribution est retirée puis ajoutée à sa nouvelle position : les
+totaux sont tenus à jour pour chaque défense déjà demandée et la lecture d'une
+case se fait en O(1).
+"""
+
+import copy
+
+
+class ThreatMap:
+    """
+    Classe pour représenter les dégâts que les unités d'une équipe peuvent infliger sur chaque case.
+
+    ...
+    Attributs
+    ---------
+    team : str
+        L'équipe qui attaque.
+    sources : dict[tuple, tuple]
+        Les cases menacées (indice y * width + x, puissance) de chaque unité, par (classe, x, y).
+        Les unités ne sont pas identifiées par leur id : une copie de la carte reste
+        valable pour les copies des unités (simulations de l'IA).
+    totals : dict[float, list[float]]
+        Pour chaque défense demandée, les dégâts subis sur chaque case (indice y * width + x).
+    version : int
+        Incrémenté quand les menaces changent.
+    """
+
+    def __init__(self, terrain, team):
+        self.terrain = terrain
+        self.terrain_version = terrain.version
+        self.width = terrain.width
+        self.size = terrain.width * terrain.height
+        self.team = team
+        self.sources = {}
+        self.totals = {}
+        self.version = 0
+
+    def copy(self):
+        """Retourne une copie indépendante de la carte (pour les copies de l'état de la partie)."""
+        threats = copy.copy(self)
+        threats.sources = dict(self.sources)
+        threats.totals = {defense: list(totals) for defense, totals in self.totals.items()}
+        return threats
+
+    def update(self, units):
+        """
+        Met à jour la carte après les déplacements ou la mort d'unités.
+
+        Seules les unités qui ont changé de case (ou sont apparues, ou mortes)
+        sont retirées puis ajoutées aux totaux.
+
+        Paramètres
+        ----------
+        units : list[Unit]
+            Les unités vivantes (ou visibles) de l'équipe.
+
+        Retourne
+        -------
+        changed : bool
+            True si les menaces ont changé.
+        """
+        if self.terrain.version != self.terrain_version:
+            # Le terrain a changé (lignes de vue) : tout recalculer
+            self.sources, self.totals = {}, {}
+            self.terrain_version = self.terrain.version
+            self.version += 1
+
+        current = {(unit.__class__, unit.x, unit.y): unit for unit in units}
+        removed = [key for key in self.sources if key not in current]
+        added = [key for key in current if key not in self.sources]
+        if not removed and not added:
+            return False
+
+        for key in removed:
+            self.add_source(self.sources.pop(key), -1)
+        width = self.width
+        for key in added:
+            source = tuple((y * width + x, power) for (x, y), power in current[key].get_threatened_cells())
+            self.sources[key] = source
+            self.add_source(source, 1)
+        self.version += 1
+        return True
+
+    def add_source(self, source, sign):
+        """Ajoute (sign = 1) ou retire (sign = -1) la contribution d'une unité aux totaux de chaque défense."""
+        for defense, totals in self.totals.items():
+            for index, power in source:
+                if power > defense:
+                    totals[index] += sign * (power - defense)
+
+    def damage_totals(self, defense):
+        """Retourne les dégâts subis sur chaque case pour la défense donnée (calculés une fois, puis tenus à jour)."""
+        totals = self.totals.get(defense)
+        if totals is None:
+            totals = [0] * self.size
+            for source in self.sources.values():
+                for index, power in source:
+                    if power > defense:
+                        totals[index] += power - defense
+            self.totals[defense] = totals
+        return totals
+
+    def damage_at(self, x, y, defense=0):
+        """Retourne les dégâts qu'une unité de défense `defense` subirait en (x, y)."""
+        totals = self.totals.get(defense) or self.damage_totals(defense)
+        return totals[y * self.width + x]
+
+    def threatened_cells(self, defense=0):
+        """Retourne les dégâts subis sur chaque case menacée, pour la défense donnée : {(x, y): dégâts}."""
+        width = self.width
+        return {(index % width, index // width): damage
+                for index, damage in enumerate(self.damage_totals(defense)) if damage > 0}
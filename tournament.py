@@ -0,0 +1,252 @@
+"""
+Tournoi entre IA pour l'équilibrage des unités.
+
+Chaque composition d'équipe autorisée par la sélection des unités (3 classes
+différentes parmi 5, soit 10 compositions) affronte chaque composition, dans
+les deux rôles ('player' joue en premier), plusieurs fois. Les parties sont
+jouées sans affichage par le moteur de règles et réparties sur tous les coeurs
+(`ProcessPoolExecutor`). Chaque partie a sa propre graine, dérivée de la graine
+du tournoi : relancer le tournoi avec la même graine donne les mêmes résultats.
+
+Le rapport donne le taux de victoire de chaque composition et de chaque classe,
+la durée moyenne des parties et les dégâts infligés par chaque classe :
+    python tournament.py [--games 10] [--seed 0] [--policy greedy|mcts] [--iterations 32]
+                         [--max-turns 100] [--workers N] [--map maps/default.map] [--output tournoi.json]
+"""
+
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import GreedyController, MCTSController
+from maps import DEFAULT_MAP, load_map
+from rules import GameState, apply_action
+from unit import Archer, Swordsman, Wizard, Invincible, Bomber
+
+UNIT_CLASSES = [Archer, Swordsman, Wizard, Invincible, Bomber]
+
+# Compositions autorisées par `Game.select_units` : 3 classes différentes (dans l'ordre du menu)
+COMPOSITIONS = list(itertools.combinations(UNIT_CLASSES, 3))
+
+POLICIES = ("greedy", "mcts")
+TEAMS = ('player', 'enemy')
+
+_maps = {}  # Cartes déjà chargées par chaque processus
+
+
+def composition_name(composition):
+    """Retourne le nom d'une composition, par exemple 'Archer+Swordsman+Wizard'."""
+    return "+".join(unit_class.__name__ for unit_class in composition)
+
+
+def match_seed(seed, player, enemy, game):
+    """Retourne la graine d'une partie, qui ne dépend que de la graine du tournoi et de la partie."""
+    return random.Random(f"{seed}/{player}/{enemy}/{game}").getrandbits(32)
+
+
+def make_controller(policy, team, seed, iterations):
+    """Retourne le contrôleur d'une équipe (la recherche MCTS reste dans le processus de la partie)."""
+    if policy == "mcts":
+        return MCTSController(team, workers=0, seed=seed, iterations=iterations)
+    return GreedyController(team, seed=seed)
+
+
+def play_match(match):
+    """
+    Joue une partie entre deux compositions, sans affichage.
+
+    Paramètres
+    ----------
+    match : tuple
+        (composition du joueur, composition de l'ennemi, numéro de la partie, graine,
+        politique, itérations MCTS, nombre maximal de tours, carte).
+
+    Retourne
+    -------
+    result : dict
+        Les compositions, la graine, le vainqueur (None si la partie atteint le
+        nombre maximal de tours), le nombre de tours joués (au plus `max_turns`) et les dégâts infligés par
+        chaque classe de chaque équipe.
+    """
+    player, enemy, game, seed, policy, iterations, max_turns, map_path = match
+    game_map = _maps.get(map_path)
+    if game_map is None:
+        game_map = _maps[map_path] = load_map(map_path)
+    terrain = game_map.terrain
+
+    units = {}
+    for team, composition in zip(TEAMS, (COMPOSITIONS[player], COMPOSITIONS[enemy])):
+        units[team] = [unit_class(x, y, team, terrain)
+                       for unit_class, (x, y) in zip(composition, game_map.spawn_cells(team))]
+    state = GameState(terrain, units['player'], units['enemy'], seed=seed)
+    controllers = {team: make_controller(policy, team, seed + index, iterations) for index, team in enumerate(TEAMS)}
+
+    damage = {team: {} for team in TEAMS}
+    while state.winner is None and state.turn <= max_turns:
+        for action in controllers[state.team].choose_actions(state):
+            events = apply_action(state, action)
+            if not events:
+                raise RuntimeError(f"Action {action} refusée (partie {seed}, tour {state.turn})")
+            for event in events:
+                if event[0] == "damage":
+                    attacker = event[1]
+                    name = attacker.__class__.__name__
+                    damage[attacker.team][name] = damage[attacker.team].get(name, 0) + event[3]
+
+    return {"player": player, "enemy": enemy, "game": game, "seed": seed,
+            "winner": state.winner, "turns": min(state.turn, max_turns), "damage": damage}
+
+
+def run_tournament(games=10, seed=0, policy="greedy", iterations=32, max_turns=100,
+                   map_path=DEFAULT_MAP, workers=None):
+    """
+    Joue toutes les rencontres du tournoi.
+
+    Paramètres
+    ----------
+    games : int
+        Le nombre de parties par rencontre (composition du joueur, composition de l'ennemi).
+    seed : int
+        La graine du tournoi.
+    policy : str
+        'greedy' (meilleur coup immédiat) ou 'mcts' (recherche arborescente).
+    iterations : int
+        Le nombre d'itérations de chaque recherche MCTS.
+    max_turns : int
+        Le nombre de tours au-delà duquel une partie est déclarée nulle.
+    map_path : str
+        La carte des parties.
+    workers : int, optional
+        Le nombre de processus (tous les coeurs par défaut, 0 pour jouer dans le processus courant).
+
+    Retourne
+    -------
+    results : list[dict]
+        Le résultat de chaque partie (voir `play_match`), dans l'ordre des rencontres.
+    """
+    matches = [(player, enemy, game, match_seed(seed, player, enemy, game), policy, iterations, max_turns, map_path)
+               for player in range(len(COMPOSITIONS))
+               for enemy in range(len(COMPOSITIONS))
+               for game in range(games)]
+
+    if workers == 0:
+        return [play_match(match) for match in matches]
+
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(workers) as pool:
+        # Parties regroupées par paquets pour limiter les échanges entre processus
+        chunksize = max(1, len(matches) // (workers * 8))
+        for result in pool.map(play_match, matches, chunksize=chunksize):
+            results.append(result)
+            if len(results) % max(1, len(matches) // 10) == 0:
+                print(f"{len(results)}/{len(matches)} parties jouées")
+    return results
+
+
+def summarize(results):
+    """
+    Calcule les statistiques du tournoi.
+
+    Retourne
+    -------
+    summary : dict
+        "games", "draws" et "average_turns" pour l'ensemble du tournoi ;
+        "compositions" : parties, victoires, nulles et taux de victoire de chaque composition ;
+        "classes" : parties, victoires, taux de victoire et dégâts infligés (total et par partie) de chaque classe ;
+        "matchups" : victoires du joueur, de l'ennemi et nulles de chaque rencontre.
+    """
+    compositions = {composition_name(composition): {"games": 0, "wins": 0, "draws": 0}
+                    for composition in COMPOSITIONS}
+    classes = {unit_class.__name__: {"games": 0, "wins": 0, "damage": 0}
+               for unit_class in UNIT_CLASSES}
+    matchups = {}
+
+    for result in results:
+        names = {'player': composition_name(COMPOSITIONS[result["player"]]),
+                 'enemy': composition_name(COMPOSITIONS[result["enemy"]])}
+        matchup = matchups.setdefault(f"{names['player']} vs {names['enemy']}", {"player": 0, "enemy": 0, "draws": 0})
+        matchup[result["winner"] or "draws"] += 1
+
+        for team in TEAMS:
+            won = result["winner"] == team
+            stats = compositions[names[team]]
+            stats["games"] += 1
+            stats["wins"] += won
+            stats["draws"] += result["winner"] is None
+            for unit_class in COMPOSITIONS[result[team]]:
+                stats = classes[unit_class.__name__]
+                stats["games"] += 1
+                stats["wins"] += won
+            for name, damage in result["damage"][team].items():
+                classes[name]["damage"] += damage
+
+    for stats in list(compositions.values()) + list(classes.values()):
+        stats["win_rate"] = stats["wins"] / stats["games"] if stats["games"] else 0.0
+    for stats in classes.values():
+        stats["damage_per_game"] = stats["damage"] / stats["games"] if stats["games"] else 0.0
+
+    return {
+        "games": len(results),
+        "draws": sum(result["winner"] is None for result in results),
+        "average_turns": sum(result["turns"] for result in results) / max(1, len(results)),
+        "compositions": compositions,
+        "classes": classes,
+        "matchups": matchups,
+    }
+
+
+def print_summary(summary):
+    """Affiche les statistiques du tournoi."""
+    print(f"{summary['games']} parties, {summary['draws']} nulles, "
+          f"{summary['average_turns']:.1f} tours en moyenne")
+
+    print("\nCompositions")
+    for name, stats in sorted(summary["compositions"].items(), key=lambda item: -item[1]["win_rate"]):
+        print(f"  {name:32} {stats['win_rate']:6.1%}  ({stats['wins']}/{stats['games']}, {stats['draws']} nulles)")
+
+    print("\nClasses")
+    for name, stats in sorted(summary["classes"].items(), key=lambda item: -item[1]["win_rate"]):
+        print(f"  {name:12} {stats['win_rate']:6.1%}  dégâts par partie {stats['damage_per_game']:6.1f}")
+
+
+def main(args):
+    """Lance le tournoi, affiche les statistiques et les enregistre."""
+    def option(name, default=None):
+        return args[args.index(name) + 1] if name in args else default
+
+    policy = option("--policy", "greedy")
+    if policy not in POLICIES:
+        print(f"Politique inconnue : {policy} ({', '.join(POLICIES)})")
+        return 1
+    workers = option("--workers")
+    settings = {
+        "games": int(option("--games", 10)),
+        "seed": int(option("--seed", 0)),
+        "policy": policy,
+        "iterations": int(option("--iterations", 32)),
+        "max_turns": int(option("--max-turns", 100)),
+        "map_path": option("--map", DEFAULT_MAP),
+        "workers": None if workers is None else int(workers),
+    }
+
+    start = time.perf_counter()
+    results = run_tournament(**settings)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results)
+    print_summary(summary)
+    print(f"\nTournoi joué en {elapsed:.1f} s")
+
+    output = option("--output", "tournament_results.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump({"settings": settings, "summary": summary, "results": results}, file, indent=2)
+    print(f"Résultats enregistrés dans {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,12 +2,15 @@ import pygame
 import random
 
 from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+from assets import assets
+from pathfinding import DistanceField
+from terrain import Terrain, GROUND, WATER_WALKER, HEALING_ZONE
+from visibility import Stencil, visibility_of
 
 # Constantes
-GRID_SIZE = 17
 CELL_SIZE = 45
-WIDTH = GRID_SIZE * CELL_SIZE
-HEIGHT = GRID_SIZE * CELL_SIZE
 FPS = 30
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -17,6 +20,47 @@ GREEN = (0, 255, 0)
 YELLOW = (255, 255, 0)
 
 
+class AttackType(NamedTuple):
+    """Type d'attaque d'une classe d'unité : nom, puissance et portée."""
+    name: str
+    power: float
+    range: int
+
+
+class UnitType(NamedTuple):
+    """
+    Caractéristiques fixes d'une classe d'unité, partagées par toutes ses instances.
+
+    ...
+    Attributs
+    ---------
+    max_health : int
+        La santé maximale (et initiale) de l'unité.
+    attack_power : int
+        La puissance d'attaque de base.
+    defense : int
+        La défense, retirée aux dégâts reçus.
+    movement_speed : int
+        Le nombre de déplacements par tour.
+    movement_class : int
+        La classe de déplacement (masque de passage du terrain).
+    move_step : int
+        Le nombre de cases parcourues par déplacement.
+    attack_types : tuple[AttackType]
+        Les attaques de l'unité (normale, puis spéciale).
+    sprite : str
+        Le nom de l'image de l'unité dans le gestionnaire d'images.
+    """
+    max_health: int
+    attack_power: int
+    defense: int
+    movement_speed: int
+    movement_class: int
+    move_step: int
+    attack_types: tuple
+    sprite: str
+
+
 class Unit(ABC):
     """
     Classe pour représenter une unité.
@@ -36,6 +80,9 @@ class Unit(ABC):
         L'équipe de l'unité ('player' ou 'enemy').
     is_selected : bool
         Si l'unité est sélectionnée ou non.
+    spec : UnitType
+        Les caractéristiques de la classe (santé maximale, attaques, déplacement),
+        aussi accessibles directement comme attributs de l'unité.
 
     Méthodes
     --------
@@ -45,11 +92,32 @@ class Unit(ABC):
         Attaque une unité cible.
     draw(screen)
         Dessine l'unité sur la grille.
+    can_enter(x, y)
+        Vérifie si l'unité peut aller sur la case (x, y).
     """
 
-    def __init__(self, x, y, health, attack_power, team, grid, movement_speed=3, attack_range=1, defense=0,image=None):
+    # Propres à chaque unité : position, santé, équipe, sélection, terrain et index d'occupation
+    # (les caractéristiques communes à la classe sont dans `spec`)
+    __slots__ = ("x", "y", "health", "team", "is_selected", "grid", "occupancy")
+
+    spec = None  # Caractéristiques partagées de la classe (UnitType)
+
+    # Caches partagés par toutes les unités
+    stencils = {}     # (classe, portée) -> décalages (dx, dy) des cases attaquables
+    cells_cache = {}  # (type, classe, portée, x, y, terrain, version) -> cases calculées
+    max_cached_cells = 100000
+
+    def __init_subclass__(cls, **kwargs):
+        """Expose les caractéristiques de la classe (`spec`) comme attributs de classe, en lecture seule pour les unités."""
+        super().__init_subclass__(**kwargs)
+        spec = cls.__dict__.get("spec")
+        if spec is not None:
+            for field, value in spec._asdict().items():
+                setattr(cls, field, value)
+
+    def __init__(self, x, y, team, grid):
         """
-        Construit une unité avec une position, une santé, une puissance d'attaque et une équipe.
+        Construit une unité avec une position et une équipe, en pleine santé.
 
         Paramètres
         ----------
@@ -57,69 +125,89 @@ class Unit(ABC):
             La position x de l'unité sur la grille.
         y : int
             La position y de l'unité sur la grille.
-        health : int
-            La santé de l'unité.
-        attack_power : int
-            La puissance d'attaque de l'unité.
         team : str
             L'équipe de l'unité ('player' ou 'enemy').
+        grid : Terrain
+            Le terrain de la grille (partagé, non copié) : toutes les unités d'une
+            partie doivent recevoir le même objet, dont dépendent les caches.
+            Une grille de noms se convertit une seule fois avec `Terrain(grille)`.
         """
+        if not isinstance(grid, Terrain):
+            raise TypeError(f"Terrain attendu, pas {type(grid).__name__} (convertir la grille une fois avec Terrain)")
         self.x = x
         self.y = y
-        self.health = health
-        self.max_health = health 
-        self.attack_power = attack_power
+        self.health = self.spec.max_health
         self.team = team  
         self.is_selected = False
-        self.grid = grid  
-        self.attack_range = attack_range
-        self.defense=defense
-        self.attack_types = [
-            {"name": "Basic Attack", "power": self.attack_power, "range": self.attack_range},   # Dictionnaire pour le nom des attaques, puissance et leur portée
-            {"name": "Special Attack", "power": self.attack_power, "range": self.attack_range}
-            ]
-        self.image = image  # Image associée à l'unité
-        self.movement_speed=movement_speed # Nombre de déplacement 
+        self.grid = grid
+        self.occupancy = None # Index d'occupation des cases (attribué à l'apparition sur la grille)
         
+    def __copy__(self):
+        """Copie rapide de l'unité (utilisée par les simulations de l'IA)."""
+        unit = object.__new__(self.__class__)
+        unit.x, unit.y, unit.health, unit.team = self.x, self.y, self.health, self.team
+        unit.is_selected, unit.grid, unit.occupancy = self.is_selected, self.grid, self.occupancy
+        return unit
+
+    @property
+    def image(self):
+        """Image associée à l'unité, partagée par toutes les unités de la même classe."""
+        return assets.get(self.sprite, (CELL_SIZE-3, CELL_SIZE-3))  # Ajustée à la taille de la case
+
     def move(self, dx, dy):
         """
         Déplacement de l'unité'
         """
-        if 0 <= self.x + dx < GRID_SIZE and 0 <= self.y + dy < GRID_SIZE:
-            if self.grid[self.y + dy][self.x + dx] not in ["mur", "arbre", "mer"]:  # Éviter les obstacles
-                self.x = self.x + dx
-                self.y = self.y + dy
-                if self.grid[self.y][self.x] in ["healing_zone"] and self.health < self.max_health:  
-                    self.health += 1   
+        if self.can_enter(self.x + dx, self.y + dy):  # Éviter les obstacles
+            self.place(self.x + dx, self.y + dy)
+            if self.grid.code(self.x, self.y) == HEALING_ZONE and self.health < self.max_health:
+                self.health += 1   
                 
     
+    def can_enter(self, x, y):
+        """Vérifie si la case (x, y) est dans la grille, praticable pour cette unité et libre."""
+        grid = self.grid
+        return (0 <= x < grid.width and 0 <= y < grid.height
+                and grid.passable[self.movement_class][y * grid.width + x] == 1
+                and (self.occupancy is None or (x, y) not in self.occupancy.cells))
+
+    def place(self, x, y):
+        """Place l'unité sur la case (x, y) et met à jour l'index d'occupation."""
+        old_cell = (self.x, self.y)
+        self.x, self.y = x, y
+        if self.occupancy is not None:
+            self.occupancy.moved(self, old_cell)
+
     def attack(self, target, attack_type=0):
         """Attaque une unité cible."""
         distance_x = abs(self.x - target.x)
         distance_y = abs(self.y - target.y)
-        attack_range = self.attack_types[attack_type]["range"]
-        attack_power = self.attack_types[attack_type]["power"]
+        attack_range = self.attack_types[attack_type].range
+        attack_power = self.attack_types[attack_type].power
 
         if distance_x <= attack_range and distance_y <= attack_range:
             damage=max(0, attack_power-target.defense) 
             target.health -= damage # dommage avec statistique de défense
 
-    def draw(self, screen):
+    def draw(self, screen, origin=(0, 0)):
         """Affiche l'unité avec son image et couleur de son équipe en fond (bleue ou rouge)
            Affiche la barre de vie de l'unité'
+           `origin` est la position à l'écran de la case (0, 0) de la carte (décalage de la caméra).
         """
+        left = origin[0] + self.x * CELL_SIZE  # Coin haut gauche de la case à l'écran
+        top = origin[1] + self.y * CELL_SIZE
 
         case_color = BLUE if self.team == 'player' else RED
 
         # Dessiner la case colorée derrière l'unité
         pygame.draw.rect(screen, case_color, 
-                     (self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+                     (left, top, CELL_SIZE, CELL_SIZE))
         
         if self.image:
             # Position centrée dans la case
             img_rect = self.image.get_rect(center=(
-                self.x * CELL_SIZE + CELL_SIZE // 2,
-                self.y * CELL_SIZE + CELL_SIZE // 2
+                left + CELL_SIZE // 2,
+                top + CELL_SIZE // 2
             ))
             screen.blit(self.image, img_rect)
 
@@ -131,44 +219,109 @@ class Unit(ABC):
         health_ratio = self.health / max_health  # ratio de santé restante
         
         # Calcul de la position et de la taille de la barre
-        bar_x = self.x * CELL_SIZE + 5  # Décalage pour centrer la barre dans la case
-        bar_y = self.y * CELL_SIZE + 35 # Position en-dessous de l'unité sur la même case
+        bar_x = left + 5  # Décalage pour centrer la barre dans la case
+        bar_y = top + 35 # Position en-dessous de l'unité sur la même case
         bar_current_width = int(bar_width * health_ratio)
         
         # Barre de vie (fond en rouge, santé restante en vert)
         pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))  # Fond rouge
         pygame.draw.rect(screen, GREEN, (bar_x, bar_y, bar_current_width, bar_height))  # Santé verte
     
+    def cached_cells(self, kind, attack_range, compute, context=None):
+        """
+        Retourne des cases mémorisées par (type, classe, portée, position, version du terrain).
+
+        Un déplacement ou une modification du terrain change la clé : le cache
+        est donc invalidé automatiquement. `context` complète la clé (par exemple
+        la version de l'index d'occupation).
+        """
+        grid = self.grid
+        key = (kind, self.__class__, attack_range, self.x, self.y, grid, grid.version, context)
+        cells = Unit.cells_cache.get(key)
+        if cells is None:
+            cells = tuple(compute())
+            if len(Unit.cells_cache) >= Unit.max_cached_cells:
+                Unit.cells_cache.clear()
+            Unit.cells_cache[key] = cells
+        return cells
+
     def get_movable_cells(self):
         """Retourne les cases accessibles en fonction de la vitesse de déplacement."""
-        cells = []
-        for dx in range(-self.movement_speed, self.movement_speed + 1):
-            for dy in range(-self.movement_speed, self.movement_speed + 1):
-                if abs(dx) + abs(dy) <= self.movement_speed:  # Respecte la vitesse de déplacement
-                    new_x, new_y = self.x + dx, self.y + dy
-                    if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                        if self.grid[new_y][new_x] not in ["mur", "arbre", "mer"]:  # Éviter les obstacles
-                            cells.append((new_x, new_y))
-        return cells
+        occupancy = self.occupancy
+        context = None if occupancy is None else (occupancy, occupancy.version)
+        return self.cached_cells("move", self.movement_speed, self.compute_movable_cells, context)
 
+    def compute_movable_cells(self):
+        """Calcule les cases accessibles en fonction de la vitesse de déplacement, en contournant les obstacles et les unités."""
+        return self.distance_field().reachable_cells()
+
+    def distance_field(self):
+        """
+        Calcule le champ de distances (en nombre de déplacements) depuis la position de l'unité.
+
+        Les cases occupées par les autres unités sont considérées comme des obstacles.
+
+        Retourne
+        -------
+        field : DistanceField
+            Le champ de distances, limité à la vitesse de déplacement.
+        """
+        occupied = () if self.occupancy is None else self.occupancy.occupied_except(self)
+        return DistanceField(self.grid, (self.x, self.y), self.movement_speed,
+                             self.movement_class, self.move_step, occupied)
+
+    def attack_offsets(self, attack_type=0):
+        """Retourne les décalages (dx, dy) d'un type d'attaque, calculés une fois par classe et portée."""
+        attack_range = self.attack_types[attack_type].range
+        key = (self.__class__, attack_range)
+        offsets = Unit.stencils.get(key)
+        if offsets is None:
+            offsets = tuple(self.attack_stencil(attack_range))
+            Unit.stencils[key] = offsets
+        return offsets
+
+    def get_attackable_cells(self, attack_type=0):
+        """Retourne les cases que cette unité peut attaquer avec le type d'attaque donné."""
+        attack_range = self.attack_types[attack_type].range
+        return self.cached_cells(("attack", attack_type), attack_range,
+                                 lambda: self.attackable_cells_at(self.x, self.y, attack_type))
+
+    def attackable_cells_at(self, x, y, attack_type=0):
+        """
+        Retourne les cases que cette unité attaquerait depuis (x, y) : les cases
+        du motif d'attaque dans la grille et en ligne de vue ("mur" et "arbre" arrêtent les attaques).
+        """
+        stencil = Stencil.of(self.attack_offsets(attack_type))
+        view = visibility_of(self.grid).field_of_view(x, y, stencil.radius)
+        return [(x + dx, y + dy) for dx, dy in view.visible_offsets(stencil)]  # Hors de la grille : jamais visible
+
+    def get_threatened_cells(self):
+        """Retourne les cases que cette unité peut attaquer depuis sa position, avec la plus forte puissance qui les atteint."""
+        return self.cached_cells("threat", None, self.compute_threatened_cells)
+
+    def compute_threatened_cells(self):
+        """Calcule la plus forte puissance d'attaque de l'unité sur chaque case attaquable : ((x, y), puissance)."""
+        powers = {}
+        for attack_type, attack in enumerate(self.attack_types):
+            for cell in self.attackable_cells_at(self.x, self.y, attack_type):
+                if attack.power > powers.get(cell, 0):
+                    powers[cell] = attack.power
+        return powers.items()
 
     @abstractmethod
-    def get_attackable_cells(self):
-        """Retourne une liste des cases que cette unité peut attaquer."""
+    def attack_stencil(self, attack_range):
+        """Retourne les décalages (dx, dy) des cases attaquables pour une portée donnée."""
         pass
 
 class Archer(Unit):
-    def __init__(self, x, y, team, grid):
-        """
-        Crée un archer avec 2 attaques de portées et puissances différentes 
-        """
-        image = pygame.image.load("images/archer.png").convert_alpha()  # Charge l'image
-        image = pygame.transform.scale(image, (CELL_SIZE-3, CELL_SIZE-3))  # Ajuste à la taille de la case
-        super().__init__(x, y, health=15, attack_power=2, team=team, grid=grid, movement_speed=3, attack_range=3, defense=6,image=image)
-        self.attack_types = [
-            {"name": "Arrow Shot", "power": self.attack_power, "range": self.attack_range}, 
-            {"name": "Power Arrow", "power": self.attack_power * 2, "range": self.attack_range-1}  
-        ]      
+    """
+    Archer avec 2 attaques de portées et puissances différentes 
+    """
+    __slots__ = ()
+    spec = UnitType(max_health=15, attack_power=2, defense=6, movement_speed=3,
+                    movement_class=GROUND, move_step=2,  # Se déplace de 2 cases
+                    attack_types=(AttackType("Arrow Shot", 2, 3), AttackType("Power Arrow", 2 * 2, 3 - 1)),
+                    sprite="archer")
 
     def move(self, dx, dy):
         """ L'unité se déplace avec une vitesse de 2 cases"""
@@ -177,166 +330,107 @@ class Archer(Unit):
         new_x_2, new_y_2 = self.x + dx * 2, self.y + dy * 2
 
         # Vérifie si la première case est libre
-        if 0 <= new_x_1 < GRID_SIZE and 0 <= new_y_1 < GRID_SIZE:
-            if self.grid[new_y_1][new_x_1] not in ["mur", "arbre", "mer"]:  # Case libre
-                # Si la deuxième case est libre, déplace l'unité
-                if 0 <= new_x_2 < GRID_SIZE and 0 <= new_y_2 < GRID_SIZE:
-                    if self.grid[new_y_2][new_x_2] not in ["mur", "arbre", "mer"]:
-                        self.x, self.y = new_x_2, new_y_2
-                    else:
-                        self.x, self.y = new_x_1, new_y_1  # S'arrête à la première case
-                else:
-                    self.x, self.y = new_x_1, new_y_1  # S'arrête à la première case
+        if self.can_enter(new_x_1, new_y_1):  # Case libre
+            # Si la deuxième case est libre, déplace l'unité
+            if self.can_enter(new_x_2, new_y_2):
+                self.place(new_x_2, new_y_2)
+            else:
+                self.place(new_x_1, new_y_1)  # S'arrête à la première case
         
-    def get_movable_cells(self):
-        """Retourne les cases atteignables en fonction des mouvements possibles, avec vérification des cases intermédiaires."""
-        directions = [(0, -2), (0, 2), (-2, 0), (2, 0)]  # Déplacements de 2 cases
-        reachable_cells = {(self.x, self.y)}  # La case de départ est toujours atteignable
-
-        for _ in range(3):  # Simule jusqu'à 3 mouvements
-            new_cells = set()
-            for x, y in reachable_cells:
-                for dx, dy in directions:
-                    nx1, ny1 = x + dx // 2, y + dy // 2  # Première case intermédiaire
-                    nx2, ny2 = x + dx, y + dy  # Deuxième case finale
-
-                    # Vérifier la première case intermédiaire
-                    if (
-                        0 <= nx1 < GRID_SIZE and
-                        0 <= ny1 < GRID_SIZE and
-                        self.grid[ny1][nx1] not in ["mur", "arbre", "mer"]
-                    ):
-                        new_cells.add((nx1, ny1))  # Ajouter la case intermédiaire si valide
-
-                        # Vérifier la deuxième case finale
-                        if (
-                            0 <= nx2 < GRID_SIZE and
-                            0 <= ny2 < GRID_SIZE and
-                            self.grid[ny2][nx2] not in ["mur", "arbre", "mer"]
-                        ):
-                            new_cells.add((nx2, ny2))  # Ajouter la case finale si valide
-            reachable_cells.update(new_cells)  # Ajouter les nouvelles cases atteignables
-
-        return list(reachable_cells)
-
 
     
-    def get_attackable_cells(self,attack_type=0):
+    def attack_stencil(self, attack_range):
         """
-        Retourne une liste des cases en direction cardinale.
+        Retourne les décalages des cases en direction cardinale (à partir de 2 cases).
         """
        
-        cells = []
-        attack_range = self.attack_types[attack_type]["range"]
+        offsets = []
         directions = [(0, -1), (0, 1), (-1, 0), (1, 0)]  
         
         for dx, dy in directions:
             for step in range(2, attack_range + 1):
-                new_x, new_y = self.x + dx * step, self.y + dy * step
-                if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                    cells.append((new_x, new_y))
+                offsets.append((dx * step, dy * step))
 
-        return cells
+        return offsets
            
 class Swordsman(Unit):
-    def __init__(self, x, y, team, grid):
-        """
-        Crée un épeiste avec 2 attaques de portées et puissances différentes.
-        """
-        image = pygame.image.load("images/swordsman.png").convert_alpha()  # Charge l'image
-        image = pygame.transform.scale(image, (CELL_SIZE-3, CELL_SIZE-3))  # Ajuste à la taille de la case
-        super().__init__(x, y, health=10, attack_power=3, team=team, grid=grid, movement_speed=3, attack_range=1,defense=6, image=image)
-        self.attack_types = [
-            {"name": "Sword Slash", "power": self.attack_power, "range": self.attack_range}, 
-            {"name": "Heavy Strike", "power": self.attack_power * 2, "range": self.attack_range}  
-        ]
-        
+    """
+    Épeiste avec 2 attaques de portées et puissances différentes.
+    """
+    __slots__ = ()
+    spec = UnitType(max_health=10, attack_power=3, defense=6, movement_speed=3,
+                    movement_class=GROUND, move_step=1,
+                    attack_types=(AttackType("Sword Slash", 3, 1), AttackType("Heavy Strike", 3 * 2, 1)),
+                    sprite="swordsman")
+
     def move(self, dx, dy):
         """Déplace l'unité dans une direction cardinale si possible."""
         new_x, new_y = self.x + dx, self.y + dy
-        if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-            if self.grid[new_y][new_x] not in ["mur", "arbre", "mer"]: 
-                self.x, self.y = new_x, new_y
+        if self.can_enter(new_x, new_y):
+            self.place(new_x, new_y)
     
         
-    def get_attackable_cells(self,attack_type=0):
+    def attack_stencil(self, attack_range):
         """
-        Retourne une liste des cases en direction cardinale.
+        Retourne les décalages des cases en direction cardinale.
         """
-        cells = []
-        attack_range = self.attack_types[attack_type]["range"]
+        offsets = []
         directions = [(0, -1), (0, 1), (-1, 0), (1, 0)]  
 
         for dx, dy in directions:
             for step in range(1, attack_range + 1):
-                new_x, new_y = self.x + dx * step, self.y + dy * step
-                if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                    cells.append((new_x, new_y))
+                offsets.append((dx * step, dy * step))
  
-        return cells
+        return offsets
 
 class Wizard (Unit):
-    def __init__(self, x, y, team, grid):
-       """
-       Crée un sorcier capable d'attaquer à un portée dispersée de 2 cases et de marcher sur l'eau.
-       """
-       image = pygame.image.load("images/wizard.png").convert_alpha()  # Charge l'image
-       image = pygame.transform.scale(image, (CELL_SIZE-3, CELL_SIZE-3))  # Ajuste à la taille de la case
-       super().__init__(x, y, health=12, attack_power=4, team=team, grid=grid,movement_speed=3, attack_range=2,defense=6, image=image)
-       
-       # Attaques
-       self.attack_types = [
-           {"name": "Gladio", "power": self.attack_power, "range": self.attack_range},  
-           {"name": "Incendio", "power": self.attack_power * 2, "range": self.attack_range}  
-       ]
+    """
+    Sorcier capable d'attaquer à un portée dispersée de 2 cases et de marcher sur l'eau.
+    """
+    __slots__ = ()
+    spec = UnitType(max_health=12, attack_power=4, defense=6, movement_speed=3,
+                    movement_class=WATER_WALKER, move_step=1,  # Le magicien marche sur l'eau
+                    attack_types=(AttackType("Gladio", 4, 2), AttackType("Incendio", 4 * 2, 2)),
+                    sprite="wizard")
 
     def move(self, dx, dy):
        """Déplace le magicien sur l'eau."""
        new_x = self.x + dx
        new_y = self.y + dy
-       if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-           if self.grid[new_y][new_x] not in ["mur", "arbre"]:
-               self.x = new_x
-               self.y = new_y
-               return  
+       if self.can_enter(new_x, new_y):
+           self.place(new_x, new_y)
+           return  
         
 
     def heal(self):
        """Ajoute 4 points de vie au magicien."""
        self.health = min(self.max_health, self.health + 4) 
     
-    def get_attackable_cells(self,attack_type=0):
+    def attack_stencil(self, attack_range):
         """
-        Retourne une liste des cases attaquables dispersées
+        Retourne les décalages des cases attaquables dispersées
         """
-        cells = []
-        attack_range = self.attack_types[attack_type]["range"]
+        offsets = []
 
         # Générer des cases dans la portée de l'attaque
         for dx in range(-attack_range, attack_range + 1):
             for dy in range(-attack_range, attack_range + 1):
-                new_x, new_y = self.x + dx, self.y + dy
-                if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                    # Filtrer selon le type d'attaque 
-                    if abs(dx) + abs(dy) <= attack_range:
-                        cells.append((new_x, new_y))
+                # Filtrer selon le type d'attaque 
+                if abs(dx) + abs(dy) <= attack_range:
+                    offsets.append((dx, dy))
 
-        return cells
+        return offsets
 
 class Invincible(Unit):
-    def __init__(self, x, y, team, grid):
-            """
-            Crée une unité invincible qui ne perd très peu de vie.
-            """
-            image = pygame.image.load("images/invincible.png").convert_alpha()  
-            image = pygame.transform.scale(image, (CELL_SIZE-3, CELL_SIZE-3))  
-            super().__init__(x, y, health=40, attack_power=4, team=team, grid=grid,movement_speed=3, attack_range=1,defense=3, image=image)
-            
-            
-            self.attack_types = [
-                {"name": "Big Slash", "power": self.attack_power, "range": self.attack_range},  # Attaque circulaire 1 case
-                {"name": "Two Blades Style", "power": self.attack_power*1.5, "range": self.attack_range*2} # Attaque circulaire 2 cases
-            ]
+    """
+    Unité invincible qui ne perd très peu de vie.
+    """
+    __slots__ = ()
+    spec = UnitType(max_health=40, attack_power=4, defense=3, movement_speed=3,
+                    movement_class=GROUND, move_step=2,  # Se déplace de 2 cases
+                    attack_types=(AttackType("Big Slash", 4, 1),  # Attaque circulaire 1 case
+                                  AttackType("Two Blades Style", 4 * 1.5, 1 * 2)),  # Attaque circulaire 2 cases
+                    sprite="invincible")
     
     def move(self, dx, dy):
         """" L'unité se déplace avec une vitesse de 2 cases"""
@@ -345,104 +439,55 @@ class Invincible(Unit):
         new_x_2, new_y_2 = self.x + dx * 2, self.y + dy * 2
 
         # Vérifie si la première case est libre
-        if 0 <= new_x_1 < GRID_SIZE and 0 <= new_y_1 < GRID_SIZE:
-            if self.grid[new_y_1][new_x_1] not in ["mur", "arbre", "mer"]:  # Case libre
-                # Si la deuxième case est libre, déplace l'unité
-                if 0 <= new_x_2 < GRID_SIZE and 0 <= new_y_2 < GRID_SIZE:
-                    if self.grid[new_y_2][new_x_2] not in ["mur", "arbre", "mer"]:
-                        self.x, self.y = new_x_2, new_y_2
-                    else:
-                        self.x, self.y = new_x_1, new_y_1  # S'arrête à la première case
-                else:
-                    self.x, self.y = new_x_1, new_y_1  # S'arrête à la première case
+        if self.can_enter(new_x_1, new_y_1):  # Case libre
+            # Si la deuxième case est libre, déplace l'unité
+            if self.can_enter(new_x_2, new_y_2):
+                self.place(new_x_2, new_y_2)
+            else:
+                self.place(new_x_1, new_y_1)  # S'arrête à la première case
     
-    def get_movable_cells(self):
-        """Retourne les cases atteignables en fonction des mouvements possibles, avec vérification des cases intermédiaires."""
-        directions = [(0, -2), (0, 2), (-2, 0), (2, 0)]  # Déplacements de 2 cases
-        reachable_cells = {(self.x, self.y)}  # La case de départ est toujours atteignable
-
-        for _ in range(3):  # Simule jusqu'à 3 mouvements
-            new_cells = set()
-            for x, y in reachable_cells:
-                for dx, dy in directions:
-                    nx1, ny1 = x + dx // 2, y + dy // 2  # Première case intermédiaire
-                    nx2, ny2 = x + dx, y + dy  # Deuxième case finale
-
-                    # Vérifier la première case intermédiaire
-                    if (
-                        0 <= nx1 < GRID_SIZE and
-                        0 <= ny1 < GRID_SIZE and
-                        self.grid[ny1][nx1] not in ["mur", "arbre", "mer"]
-                    ):
-                        new_cells.add((nx1, ny1))  # Ajouter la case intermédiaire si valide
-
-                        # Vérifier la deuxième case finale
-                        if (
-                            0 <= nx2 < GRID_SIZE and
-                            0 <= ny2 < GRID_SIZE and
-                            self.grid[ny2][nx2] not in ["mur", "arbre", "mer"]
-                        ):
-                            new_cells.add((nx2, ny2))  # Ajouter la case finale si valide
-            reachable_cells.update(new_cells)  # Ajouter les nouvelles cases atteignables
-
-        return list(reachable_cells)
-
 
     
-    def get_attackable_cells(self,attack_type=0):
+    def attack_stencil(self, attack_range):
             """
-            Retourne les cases attaquables direction circulaire
+            Retourne les décalages des cases attaquables direction circulaire
             """
-            cells = []
-            attack_range = self.attack_types[attack_type]["range"]
             directions = [(0, -1), (0, 1), (-1, 0), (-1, -1), (1, 0), (1, -1), (1, 1), (-1, 1),
                           (-2, -2), (-2,-1), (-2,0),(-2,1),(-2,2),
                           (-1,-2),(-1,2),(0,-2),(0,2),(1,-2),(1,2),
                           (2,-2),(2,-1),(2,0),(2,1),(2,2)]  
 
-            for dx, dy in directions:
-                    new_x, new_y = self.x + dx, self.y + dy
-                    if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                        cells.append((new_x, new_y))
-
-            return cells
+            return directions
 
 class Bomber(Unit):
-    def __init__(self, x, y, team, grid):
-            """
-            Crée une unité bombardier qui lance des bombes sur une longue portée.
-            """
-            image = pygame.image.load("images/bomber.png").convert_alpha()  
-            image = pygame.transform.scale(image, (CELL_SIZE-3, CELL_SIZE-3))  
-            super().__init__(x, y, health=15, attack_power=5, team=team, grid=grid,movement_speed=3, attack_range=3,defense=2, image=image)
-            
-            # Attaque sur une portée 5 cases dispersée
-            self.attack_types = [
-                {"name": "Aqua Bomb", "power": self.attack_power, "range": self.attack_range}, 
-                {"name": "Lava bomb", "power": self.attack_power*1.5, "range": self.attack_range*2} 
-            ]
+    """
+    Unité bombardier qui lance des bombes sur une longue portée.
+    """
+    __slots__ = ()
+    # Attaque sur une portée 5 cases dispersée
+    spec = UnitType(max_health=15, attack_power=5, defense=2, movement_speed=3,
+                    movement_class=GROUND, move_step=1,
+                    attack_types=(AttackType("Aqua Bomb", 5, 3), AttackType("Lava bomb", 5 * 1.5, 3 * 2)),
+                    sprite="bomber")
+
     def move(self, dx, dy):
         new_x, new_y = self.x + dx, self.y + dy
-        if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-            if self.grid[new_y][new_x] not in ["mur", "arbre", "mer"]:  
-                self.x, self.y = new_x, new_y
+        if self.can_enter(new_x, new_y):
+            self.place(new_x, new_y)
 
 
-    def get_attackable_cells(self,attack_type=0):
+    def attack_stencil(self, attack_range):
         """
-        Retourne une liste des cases attaquables loin de de Bomber.
+        Retourne les décalages des cases attaquables loin de de Bomber.
         """
-        cells = []
-        attack_range = self.attack_types[attack_type]["range"]
+        offsets = []
         min_distance = max(1, attack_range // 2)  # Exclure les cases proches
 
         for dx in range(-attack_range, attack_range + 1):
             for dy in range(-attack_range, attack_range + 1):
                 distance = abs(dx) + abs(dy)
                 if min_distance <= distance <= attack_range:  # Garder les cases éloignées
-                    new_x, new_y = self.x + dx, self.y + dy
-                    if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE:
-                        cells.append((new_x, new_y))
+                    offsets.append((dx, dy))
 
-        return cells
+        return offsets
 
@@ -0,0 +1,340 @@
+"""
+Lignes de vue et brouillard de guerre.
+
+La visibilité depuis une case est calculée par « shadowcasting » symétrique :
+chaque quadrant est parcouru ligne par ligne en suivant les pentes des ombres
+projetées par les obstacles ("mur" et "arbre" ; l'eau ne cache rien). Une case
+A voit une case B si et seulement si B voit A.
+
+Le champ de vision d'une case pour un rayon donné est un entier utilisé comme
+ensemble de bits, sur une fenêtre de (2 * rayon + 1) cases de côté centrée sur
+la case : il est mis en cache par (case, rayon) et se croise avec un motif
+d'attaque (lui aussi un ensemble de bits) en une seule opération `&`.
+
+Le brouillard de chaque équipe est l'union des champs de vision de ses unités,
+sur toute la carte. Quand une unité se déplace, seul son champ de vision est
+remplacé (lu dans le cache) avant de refaire l'union.
+"""
+
+import weakref
+
+from terrain import MUR, ARBRE
+
+# Terrains qui bloquent la vue (et donc les attaques)
+OPAQUE_TERRAIN = (MUR, ARBRE)
+OPACITY_TABLE = bytes(1 if code in OPAQUE_TERRAIN else 0 for code in range(256))
+
+# Rayon de vision des unités pour le brouillard de guerre (la plus longue portée d'attaque)
+SIGHT_RADIUS = 6
+
+# Parcours des quadrants : (profondeur, colonne) -> décalage (dx, dy)
+QUADRANTS = (
+    lambda depth, col: (col, -depth),  # Nord
+    lambda depth, col: (col, depth),   # Sud
+    lambda depth, col: (depth, col),   # Est
+    lambda depth, col: (-depth, col),  # Ouest
+)
+
+
+def shadowcast(opaque, width, height, x, y, radius):
+    """
+    Calcule les cases visibles depuis (x, y) dans un carré de rayon `radius`.
+
+    Paramètres
+    ----------
+    opaque : bytes
+        1 si la case bloque la vue, 0 sinon, indexé par y * width + x.
+    width, height : int
+        La taille de la grille.
+    x, y : int
+        La case d'origine.
+    radius : int
+        La distance maximale (en x et en y) des cases visibles.
+
+    Retourne
+    -------
+    bits : int
+        Le bit (dy + radius) * (2 * radius + 1) + (dx + radius) vaut 1 si la case
+        (x + dx, y + dy) est visible. Les cases hors de la grille ne le sont jamais.
+    """
+    side = 2 * radius + 1
+    bits = 1 << (radius * side + radius)  # L'origine est toujours visible
+    for transform in QUADRANTS:
+        # Lignes à parcourir : (profondeur, pente de début, pente de fin), pentes en fractions entières
+        rows = [(1, -1, 1, 1, 1)]
+        while rows:
+            depth, start_num, start_den, end_num, end_den = rows.pop()
+            if depth > radius:
+                continue
+            min_col = (2 * depth * start_num + start_den) // (2 * start_den)  # Arrondi au supérieur
+            max_col = -((end_den - 2 * depth * end_num) // (2 * end_den))    # Arrondi à l'inférieur
+            previous_wall = None
+            for col in range(min_col, max_col + 1):
+                dx, dy = transform(depth, col)
+                cell_x, cell_y = x + dx, y + dy
+                inside = 0 <= cell_x < width and 0 <= cell_y < height
+                wall = not inside or opaque[cell_y * width + cell_x] == 1
+                # Un obstacle est visible ; une case libre l'est si son centre est dans le secteur (symétrie)
+                if inside and (wall or (col * start_den >= depth * start_num and col * end_den <= depth * end_num)):
+                    bits |= 1 << ((dy + radius) * side + dx + radius)
+                if previous_wall and not wall:
+                    start_num, start_den = 2 * col - 1, 2 * depth  # Fin d'une ombre : le secteur reprend
+                if previous_wall is False and wall:
+                    rows.append((depth + 1, start_num, start_den, 2 * col - 1, 2 * depth))  # Secteur avant l'ombre
+                previous_wall = wall
+            if previous_wall is False:
+                rows.append((depth + 1, start_num, start_den, end_num, end_den))
+    return bits
+
+
+class Stencil:
+    """
+    Motif d'attaque sous forme d'ensemble de bits, pour le croiser avec un champ de vision.
+
+    ...
+    Attributs
+    ---------
+    offsets : tuple[tuple]
+        Les décalages (dx, dy) du motif, dans leur ordre d'origine.
+    radius : int
+        La plus grande distance (en x ou en y) du motif.
+    bits : tuple[int]
+        Le bit de chaque décalage, dans la fenêtre de rayon `radius`.
+    mask : int
+        L'union des bits du motif.
+    """
+
+    __slots__ = ("offsets", "radius", "bits", "mask")
+
+    cache = {}  # Décalages -> motif
+
+    def __init__(self, offsets):
+        self.offsets = tuple(offsets)
+        self.radius = max([max(abs(dx), abs(dy)) for dx, dy in self.offsets] or [0])
+        side = 2 * self.radius + 1
+        self.bits = tuple(1 << ((dy + self.radius) * side + dx + self.radius) for dx, dy in self.offsets)
+        self.mask = 0
+        for bit in self.bits:
+            self.mask |= bit
+
+    @classmethod
+    def of(cls, offsets):
+        """Retourne le motif des décalages donnés (construit une seule fois)."""
+        stencil = cls.cache.get(offsets)
+        if stencil is None:
+            stencil = cls.cache[offsets] = cls(offsets)
+        return stencil
+
+
+class FieldOfView:
+    """
+    Classe pour représenter les cases visibles depuis une case, dans un rayon donné.
+
+    ...
+    Attributs
+    ---------
+    x, y : int
+        La case d'origine.
+    radius : int
+        Le rayon du champ de vision.
+    bits : int
+        Les cases visibles (voir `shadowcast`).
+    """
+
+    __slots__ = ("x", "y", "radius", "bits", "width", "map_mask")
+
+    def __init__(self, x, y, radius, bits, width):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.bits = bits
+        self.width = width  # Largeur de la carte, pour `map_bits`
+        self.map_mask = None
+
+    def contains(self, x, y):
+        """Vérifie si la case (x, y) de la carte est visible."""
+        dx, dy, radius = x - self.x, y - self.y, self.radius
+        if abs(dx) > radius or abs(dy) > radius:
+            return False
+        return (self.bits >> ((dy + radius) * (2 * radius + 1) + dx + radius)) & 1 == 1
+
+    def visible_offsets(self, stencil):
+        """
+        Retourne les décalages du motif qui sont visibles, dans l'ordre du motif.
+
+        Le champ de vision doit avoir le rayon du motif.
+        """
+        if self.bits & stencil.mask == stencil.mask:
+            return stencil.offsets  # Tout le motif est visible (cas le plus courant)
+        bits = self.bits
+        return tuple(offset for offset, bit in zip(stencil.offsets, stencil.bits) if bits & bit)
+
+    def map_bits(self):
+        """Retourne les cases visibles sous forme d'ensemble de bits sur toute la carte (bit y * width + x)."""
+        if self.map_mask is None:
+            radius, width = self.radius, self.width
+            side = 2 * radius + 1
+            row_mask = (1 << side) - 1
+            mask = 0
+            for row in range(side):
+                row_bits = (self.bits >> (row * side)) & row_mask
+                if row_bits:
+                    # Les colonnes hors de la carte ne sont jamais visibles : le décalage ne déborde pas
+                    shift = (self.y + row - radius) * width + self.x - radius
+                    mask |= row_bits << shift if shift >= 0 else row_bits >> -shift
+            self.map_mask = mask
+        return self.map_mask
+
+
+class Visibility:
+    """
+    Classe pour calculer et mettre en cache les champs de vision sur un terrain.
+
+    ...
+    Attributs
+    ---------
+    terrain : Terrain
+        Le terrain.
+    opaque : bytes
+        1 si la case bloque la vue, 0 sinon (recalculé quand le terrain change).
+    views : dict[tuple, FieldOfView]
+        Les champs de vision calculés, indexés par (x, y, rayon).
+    """
+
+    max_views = 100000
+
+    def __init__(self, terrain):
+        self.terrain = terrain
+        self.version = None
+        self.opaque = b""
+        self.views = {}
+
+    def refresh(self):
+        """Recalcule l'opacité et vide le cache si le terrain a changé."""
+        terrain = self.terrain
+        if terrain.version != self.version:
+            self.opaque = bytes(terrain.codes).translate(OPACITY_TABLE)
+            self.views.clear()
+            self.version = terrain.version
+
+    def field_of_view(self, x, y, radius):
+        """Retourne le champ de vision de la case (x, y) pour le rayon donné (calculé une seule fois)."""
+        if self.terrain.version != self.version:
+            self.refresh()
+        key = (x, y, radius)
+        view = self.views.get(key)
+        if view is None:
+            terrain = self.terrain
+            bits = shadowcast(self.opaque, terrain.width, terrain.height, x, y, radius)
+            view = FieldOfView(x, y, radius, bits, terrain.width)
+            if len(self.views) >= self.max_views:
+                self.views.clear()
+            self.views[key] = view
+        return view
+
+    def line_of_sight(self, x0, y0, x1, y1):
+        """Vérifie si la case (x1, y1) est visible depuis (x0, y0) (et inversement)."""
+        return self.field_of_view(x0, y0, max(abs(x1 - x0), abs(y1 - y0))).contains(x1, y1)
+
+
+_visibilities = weakref.WeakKeyDictionary()  # Terrain -> Visibility
+
+
+def visibility_of(terrain):
+    """Retourne le calcul de visibilité partagé du terrain donné."""
+    visibility = _visibilities.get(terrain)
+    if visibility is None:
+        visibility = _visibilities[terrain] = Visibility(terrain)
+    return visibility
+
+
+class TeamFog:
+    """
+    Classe pour représenter ce qu'une équipe voit de la carte.
+
+    ...
+    Attributs
+    ---------
+    team : str
+        L'équipe.
+    radius : int
+        Le rayon de vision de chaque unité.
+    views : dict[int, FieldOfView]
+        Le champ de vision de chaque unité de l'équipe (par son id).
+    visible : int
+        Les cases vues actuellement par au moins une unité (bit y * width + x).
+    explored : int
+        Les cases vues au moins une fois depuis le début de la partie.
+    version : int
+        Incrémenté quand les cases visibles changent.
+    """
+
+    def __init__(self, terrain, team, radius=SIGHT_RADIUS):
+        self.visibility = visibility_of(terrain)
+        self.width = terrain.width
+        self.size = terrain.width * terrain.height
+        self.team = team
+        self.radius = radius
+        self.views = {}
+        self.visible = 0
+        self.explored = 0
+        self.version = 0
+
+    def update(self, units):
+        """
+        Met à jour le brouillard après les déplacements ou la mort d'unités.
+
+        Seules les unités qui ont changé de case sont recalculées (champs de
+        vision lus dans le cache) ; l'union n'est refaite que si besoin.
+
+        Paramètres
+        ----------
+        units : list[Unit]
+            Les unités vivantes de l'équipe.
+
+        Retourne
+        -------
+        changed : bool
+            True si les cases visibles ont changé.
+        """
+        moved = len(units) != len(self.views)
+        views = {}
+        for unit in units:
+            view = self.views.get(id(unit))
+            if view is None or (view.x, view.y) != (unit.x, unit.y):
+                view = self.visibility.field_of_view(unit.x, unit.y, self.radius)
+                moved = True
+            views[id(unit)] = view
+        self.views = views
+        if not moved:
+            return False
+
+        visible = 0
+        for view in views.values():
+            visible |= view.map_bits()
+        if visible == self.visible:
+            return False
+        self.visible = visible
+        self.explored |= visible
+        self.version += 1
+        return True
+
+    def is_visible(self, x, y):
+        """Vérifie si la case (x, y) est vue par l'équipe."""
+        return (self.visible >> (y * self.width + x)) & 1 == 1
+
+    def is_explored(self, x, y):
+        """Vérifie si la case (x, y) a déjà été vue par l'équipe."""
+        return (self.explored >> (y * self.width + x)) & 1 == 1
+
+    def changed_cells(self, previous, cells):
+        """Retourne les cases données dont la visibilité diffère de l'ensemble de bits `previous` (XOR)."""
+        data = (self.visible ^ previous).to_bytes((self.size + 7) // 8, "little")
+        width = self.width
+        return [(x, y) for x, y in cells if (data[(y * width + x) >> 3] >> ((y * width + x) & 7)) & 1]
+
+    def hidden_cells(self, cells):
+        """Retourne les cases données que l'équipe ne voit pas (une seule conversion de l'ensemble de bits)."""
+        data = self.visible.to_bytes((self.size + 7) // 8, "little")
+        width = self.width
+        return [(x, y) for x, y in cells if not (data[(y * width + x) >> 3] >> ((y * width + x) & 7)) & 1]